@@ -0,0 +1,88 @@
+import re
+
+# Contribution of each label to overall_sentiment_score (Negative counts 0)
+SENTIMENT_POINTS = {"Positive": 1.0, "Neutral": 0.5}
+SENTIMENT_KEYS = {"Positive": "positive", "Negative": "negative", "Neutral": "neutral"}
+
+TURKISH_MONTHS = {"ocak": 1, "şubat": 2, "mart": 3, "nisan": 4, "mayıs": 5, "haziran": 6, "temmuz": 7,
+                  "ağustos": 8, "eylül": 9, "ekim": 10, "kasım": 11, "aralık": 12}
+_ISO_DATE_RE = re.compile(r"(\d{4})-(\d{2})")
+# Review cards show "12 Ocak 2026"; the review API gives ISO dates
+_TEXT_DATE_RE = re.compile(r"(\d{1,2})\s+(\w+)\s+(\d{4})")
+
+
+def review_month(date):
+    """'2026-01-05...' or '5 Ocak 2026' -> '2026-01'; None when the date is missing or unreadable."""
+    if not date:
+        return None
+    match = _ISO_DATE_RE.search(date)
+    if match:
+        return f"{match.group(1)}-{match.group(2)}"
+    match = _TEXT_DATE_RE.search(date)
+    if match:
+        month = TURKISH_MONTHS.get(match.group(2).lower())
+        if month:
+            return f"{match.group(3)}-{month:02d}"
+    return None
+
+
+def compute_aggregates(reviews):
+    """
+    Everything the dashboard views need, in one pass over ReviewResult-like
+    objects (sentiment, confidence, rating, date, aspects):
+    sentiment distribution, mean confidence, per-aspect counts with mean
+    confidence, rating histogram and the sentiment score per month.
+    """
+    distribution = {"Positive": 0, "Negative": 0, "Neutral": 0}
+    ratings = {str(stars): 0 for stars in range(1, 6)}
+    aspects, periods = {}, {}
+    confidence_total = rating_total = 0.0
+    rated = undated = 0
+
+    for review in reviews:
+        sentiment = review.sentiment
+        distribution[sentiment] = distribution.get(sentiment, 0) + 1
+        confidence_total += review.confidence
+        points = SENTIMENT_POINTS.get(sentiment, 0.0)
+
+        if review.rating:
+            ratings[str(review.rating)] = ratings.get(str(review.rating), 0) + 1
+            rating_total += review.rating
+            rated += 1
+
+        period = review_month(review.date)
+        if period is None:
+            undated += 1
+        else:
+            entry = periods.get(period)
+            if entry is None:
+                entry = periods[period] = [0, 0.0]
+            entry[0] += 1
+            entry[1] += points
+
+        for aspect in review.aspects:
+            counts = aspects.get(aspect.aspect)
+            if counts is None:
+                counts = aspects[aspect.aspect] = {"mentions": 0, "positive": 0, "negative": 0, "neutral": 0,
+                                                   "confidence_total": 0.0}
+            counts["mentions"] += 1
+            key = SENTIMENT_KEYS.get(aspect.sentiment)
+            if key:
+                counts[key] += 1
+            counts["confidence_total"] += aspect.confidence
+
+    total = sum(distribution.values())
+    aspect_list = []
+    for name, counts in sorted(aspects.items(), key=lambda item: -item[1]["mentions"]):
+        confidence = counts.pop("confidence_total")
+        aspect_list.append({"aspect": name, **counts, "mean_confidence": round(confidence / counts["mentions"], 3)})
+    return {
+        "sentiment_distribution": distribution,
+        "mean_confidence": round(confidence_total / total, 3) if total else 0.0,
+        "aspects": aspect_list,
+        "rating_histogram": ratings,
+        "average_rating": round(rating_total / rated, 2) if rated else None,
+        "score_over_time": [{"period": period, "reviews": count, "score": round(score / count, 3)}
+                            for period, (count, score) in sorted(periods.items())],
+        "undated_reviews": undated,
+    }
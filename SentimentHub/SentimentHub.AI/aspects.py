@@ -0,0 +1,161 @@
+import json
+import os
+import re
+import threading
+
+# Lexicon terms are matched on whole words after Turkish-aware lowercasing.
+# "kargo*" also matches suffixed forms (kargoda, kargosu); a term without "*"
+# must be the whole word, so "tam" does not fire inside "tamamen".
+# Multi-word terms ("geç geldi") allow any whitespace between the words.
+# A short stem also begins unrelated words ("gün*" catches "güneş" and
+# "gündüz", "ilgi*" "ilgili", "değer*" "değerlendirme"), so short stems are
+# spelled out form by form.
+DEFAULT_LEXICON = {
+    "Kargo": ["kargo*", "teslimat*", "ulaşım*", "ulaştı*", "geç", "geç geldi*",
+              "paket", "paketi", "pakette", "paketten", "paketle*",
+              "hızlı", "hızlıydı", "hızlıca",
+              "gün", "günde", "günü", "güne", "günden", "günler*", "günlük", "gününde"],
+    "Kalite": ["kalite*", "kumaş*", "sağlam*", "bozuk*", "yırtık*", "dikiş*", "materyal*"],
+    "Beden/Uyum": ["beden*", "kalıp*", "dar", "bol", "küçük*", "büyük*", "tam", "tam oldu"],
+    "Fiyat/Performans": ["fiyat*", "pahalı*", "ucuz*", "değer", "değeri", "değerinde", "değmez", "indirim*",
+                         "performans*", "performance"],
+    "Satıcı": ["satıcı*", "ilgi", "ilgisi", "ilgiyle", "ilgisiz*", "ilgilen*", "cevap*", "yanlış*", "eksik*",
+               "hediye*"],
+}
+
+_TURKISH_UPPER = str.maketrans({"I": "ı", "İ": "i"})
+_SENTENCE_RE = re.compile(r"[^.!?\n]+[.!?]*")
+
+
+def turkish_lower(text):
+    """Lowercases with Turkish I/İ rules, keeping offsets aligned with `text`."""
+    if "I" in text or "İ" in text:  # translate() is slow; most reviews need no remapping
+        text = text.translate(_TURKISH_UPPER)
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # A few characters lowercase to two code points; fall back to one per input char
+        lowered = "".join(ch.lower()[:1] for ch in text)
+    return lowered
+
+
+def _parse_term(term):
+    """'geç geldi*' -> (("geç", "geldi"), True)"""
+    term = turkish_lower(term.strip())
+    return tuple(term.rstrip("*").split()), term.endswith("*")
+
+
+def sentence_spans(text):
+    """(start, end) of every sentence; a review without punctuation is one sentence."""
+    return [(m.start(), m.end()) for m in _SENTENCE_RE.finditer(text) if m.group().strip()]
+
+
+class AspectMatcher:
+    """
+    The whole lexicon compiled into one regex, so a review is scanned once
+    regardless of the lexicon size; each hit is then mapped to its aspect
+    with a dict lookup (whole term, else its longest matching stem).
+    """
+
+    def __init__(self, lexicon=None):
+        self.lexicon = lexicon or DEFAULT_LEXICON
+        self._exact = {}  # "tam", "tam oldu" -> aspect
+        self._stems = {}  # "kargo", "geç geldi" -> aspect (terms with "*")
+        alternatives = []
+        for aspect, terms in self.lexicon.items():
+            for term in terms:
+                words, is_stem = _parse_term(term)
+                if not words:
+                    continue
+                (self._stems if is_stem else self._exact).setdefault(" ".join(words), aspect)
+                body = r"\s+".join(re.escape(w) for w in words)
+                alternatives.append((len(words), len(body), body + (r"\w*" if is_stem else r"(?!\w)")))
+        # Longest first so "geç geldi" wins over "geç"
+        alternatives.sort(reverse=True)
+        self.pattern = re.compile(r"(?<!\w)(?:" + "|".join(a[2] for a in alternatives) + ")")
+        self._stem_lengths = sorted({len(stem) for stem in self._stems}, reverse=True)
+
+    def _aspect_of(self, matched):
+        term = " ".join(matched.split())
+        aspect = self._exact.get(term)
+        if aspect:
+            return aspect
+        for length in self._stem_lengths:
+            aspect = self._stems.get(term[:length])
+            if aspect:
+                return aspect
+        return None
+
+    def find(self, text):
+        """[{"aspect", "term", "start", "end"}] in order of appearance."""
+        hits = []
+        for m in self.pattern.finditer(turkish_lower(text or "")):
+            hits.append({
+                "aspect": self._aspect_of(m.group()),
+                "term": text[m.start():m.end()],
+                "start": m.start(),
+                "end": m.end(),
+            })
+        return hits
+
+    def find_batch(self, texts):
+        return [self.find(t) for t in texts]
+
+
+def extract_aspects_batch(texts, matcher, sentiment_fn):
+    """
+    Aspects for many reviews with sentence-level sentiment.
+    `sentiment_fn(sentences)` returns [{"sentiment", "score"}] and is called
+    once for the whole batch with each distinct sentence that mentions an
+    aspect. Returns, per review, [{"aspect", "sentiment", "confidence",
+    "spans"}] with one entry per aspect, labelled by its most confident
+    sentence.
+    """
+    matched = []  # per review: [(aspect, (start, end), sentence)]
+    sentences = {}
+    for text in texts:
+        hits = []
+        spans = sentence_spans(text) if text else []
+        for hit in matcher.find(text):
+            start, end = next(((s, e) for s, e in spans if s <= hit["start"] < e), (0, len(text)))
+            sentence = text[start:end].strip()
+            sentences.setdefault(sentence, None)
+            hits.append((hit["aspect"], (hit["start"], hit["end"]), sentence))
+        matched.append(hits)
+
+    if sentences:
+        sentence_list = list(sentences)
+        sentences = dict(zip(sentence_list, sentiment_fn(sentence_list)))
+
+    results = []
+    for hits in matched:
+        by_aspect = {}
+        for aspect, span, sentence in hits:
+            sent = sentences[sentence]
+            entry = by_aspect.setdefault(aspect, {"aspect": aspect, "sentiment": sent["sentiment"],
+                                                  "confidence": float(sent["score"]), "spans": []})
+            entry["spans"].append(list(span))
+            if float(sent["score"]) > entry["confidence"]:
+                entry["sentiment"], entry["confidence"] = sent["sentiment"], float(sent["score"])
+        results.append(list(by_aspect.values()))
+    return results
+
+
+def load_lexicon(path=None):
+    """ASPECT_LEXICON_PATH may point to a JSON file {aspect: [terms]} replacing the default."""
+    path = path or os.getenv("ASPECT_LEXICON_PATH")
+    if not path:
+        return DEFAULT_LEXICON
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher():
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = AspectMatcher(load_lexicon())
+        return _matcher
@@ -0,0 +1,47 @@
+import re
+
+DEFAULT_AUTHOR = "Müşteri"
+DEFAULT_BUSINESS_NAME = "Trendyol Product"
+
+
+class ScraperBackend:
+    """
+    Common interface for review scrapers.
+    stream() is a generator of (new_reviews, business_name) chunks as they are
+    scraped; each review is a dict with author, text, rating and date - the
+    shape main.run_analysis expects. Reviews are deduplicated across chunks and
+    at most `max_reviews` are produced.
+    scrape() collects the stream into (reviews, business_name).
+    Backends may record timings into the optional `stats` dict.
+    """
+    name = "base"
+
+    def stream(self, url, max_reviews=100, should_stop=None, stats=None):
+        raise NotImplementedError
+
+    def scrape(self, url, max_reviews=100, should_stop=None, stats=None):
+        return collect(self.stream(url, max_reviews, should_stop, stats))
+
+
+def collect(chunks):
+    reviews, business_name = [], DEFAULT_BUSINESS_NAME
+    for new_reviews, business_name in chunks:
+        reviews.extend(new_reviews)
+    return reviews, business_name
+
+
+def reviews_page_url(url):
+    # Pre-process URL: Ensure we are on the reviews page
+    if "/yorumlar" in url:
+        return url
+    # Check if it has query params
+    if "?" in url:
+        base, query = url.split("?", 1)
+        return f"{base}/yorumlar?{query}"
+    return f"{url}/yorumlar"
+
+
+def product_content_id(url):
+    """Trendyol product URLs end with '-p-<contentId>'."""
+    match = re.search(r"-p-(\d+)", url)
+    return match.group(1) if match else None
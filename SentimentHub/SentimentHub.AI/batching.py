@@ -0,0 +1,100 @@
+import os
+import time
+import telemetry
+
+# Rough chars-per-token for Turkish/English review text with BPE tokenizers;
+# the planner only needs to be in the right ballpark, budgets keep a margin.
+CHARS_PER_TOKEN = float(os.getenv("LLM_CHARS_PER_TOKEN", "3.5"))
+# Fixed instructions + JSON framing per prompt, and expected answer size per review
+PROMPT_OVERHEAD_TOKENS = int(os.getenv("LLM_PROMPT_OVERHEAD_TOKENS", "400"))
+OUTPUT_TOKENS_PER_REVIEW = int(os.getenv("LLM_OUTPUT_TOKENS_PER_REVIEW", "60"))
+MAX_BATCH_REVIEWS = int(os.getenv("LLM_MAX_BATCH_REVIEWS", "50"))
+# How many times a malformed batch is halved before its reviews are left to
+# the local model (2 levels: at most 1 + 2 + 4 calls per planned batch)
+MAX_SPLIT_DEPTH = int(os.getenv("LLM_MAX_SPLIT_DEPTH", "2"))
+
+
+def estimate_tokens(text):
+    # +4 for the quotes, comma and separator each review adds to the JSON list
+    return int(len(text) / CHARS_PER_TOKEN) + 4
+
+
+def plan_batches(texts, input_budget, output_budget,
+                 per_review_output=OUTPUT_TOKENS_PER_REVIEW, max_batch=MAX_BATCH_REVIEWS):
+    """
+    Greedily packs reviews (in order) into batches whose estimated prompt fits
+    `input_budget` and whose expected answer fits `output_budget`. Short reviews
+    share a call, long ones get smaller batches. A review bigger than the whole
+    budget still gets a batch of its own.
+    Returns a list of lists of indexes into `texts`.
+    """
+    max_by_output = max(1, output_budget // max(per_review_output, 1))
+    limit = max(1, min(max_batch, max_by_output))
+    available = max(input_budget - PROMPT_OVERHEAD_TOKENS, 1)
+
+    batches, current, used = [], [], 0
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text)
+        if current and (used + cost > available or len(current) >= limit):
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _valid(results, expected):
+    return (isinstance(results, list) and len(results) == expected
+            and all(isinstance(r, dict) and r.get("sentiment") for r in results))
+
+
+def classify_adaptive(texts, classify_fn, stats=None, depth=0, on_valid=None, max_depth=None):
+    """
+    Runs `classify_fn(texts) -> (results, provider, usage)` and, when the answer
+    is malformed or has the wrong number of entries (typically output cut off
+    at the token limit), splits the batch in half and retries only the halves,
+    at most `max_depth` (default MAX_SPLIT_DEPTH) levels deep.
+    No provider answering (provider None) is not retried here.
+
+    Returns results aligned with `texts`; entries that could not be classified
+    are None. Every call made is appended to `stats` when given. `depth` is
+    the split level (0 for the batch as planned). `on_valid(texts, results,
+    provider)` is called for each answer that passed validation, e.g. to cache it.
+    """
+    max_depth = MAX_SPLIT_DEPTH if max_depth is None else max_depth
+    started = time.perf_counter()
+    est_input_tokens = PROMPT_OVERHEAD_TOKENS + sum(estimate_tokens(t) for t in texts)
+    with telemetry.span("llm_call", reviews=len(texts), est_input_tokens=est_input_tokens,
+                        split_depth=depth) as span:
+        results, provider, usage = classify_fn(texts)
+        usage = usage or {}
+        record = {
+            "size": len(texts),
+            "est_input_tokens": est_input_tokens,
+            "input_tokens": usage.get("input_tokens"),
+            "output_tokens": usage.get("output_tokens"),
+            "provider": provider.name if provider else None,
+            "latency_s": round(time.perf_counter() - started, 3),
+            "ok": _valid(results, len(texts)),
+        }
+        span.update(provider=record["provider"], input_tokens=record["input_tokens"],
+                    output_tokens=record["output_tokens"], ok=record["ok"])
+    if provider is not None:
+        telemetry.LLM_BATCH_REVIEWS.observe(len(texts), provider=provider.name)
+    if stats is not None:
+        stats.append(record)
+
+    if provider is None:
+        return [None] * len(texts)
+    if _valid(results, len(texts)):
+        if on_valid is not None:
+            on_valid(texts, results, provider)
+        return results
+    if len(texts) == 1 or depth >= max_depth:
+        return [None] * len(texts)
+
+    mid = len(texts) // 2
+    return (classify_adaptive(texts[:mid], classify_fn, stats, depth + 1, on_valid, max_depth)
+            + classify_adaptive(texts[mid:], classify_fn, stats, depth + 1, on_valid, max_depth))
@@ -0,0 +1,53 @@
+"""
+Throughput of the scraper backends against the local fixture server.
+
+    python benchmarks/bench_backends.py --reviews 300 --latency-ms 80
+    python benchmarks/bench_backends.py --selenium      # also time Selenium (needs Chrome)
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fixture_server import FixtureServer  # noqa: E402
+from http_scraper import HttpBackend  # noqa: E402
+
+
+def timed(backend, url, limit, runs):
+    best, count = None, 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        reviews, _ = backend.scrape(url, limit)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        count = len(reviews)
+    return best, count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reviews", type=int, default=300)
+    parser.add_argument("--latency-ms", type=int, default=50, help="Simulated per-request server latency")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--selenium", action="store_true")
+    args = parser.parse_args()
+
+    server = FixtureServer(review_count=args.reviews, latency_ms=args.latency_ms).start()
+    try:
+        backends = [("http (serial)", HttpBackend(api_template=server.api_template, concurrency=1)),
+                    ("http (4 conns)", HttpBackend(api_template=server.api_template, concurrency=4))]
+        if args.selenium:
+            import scraper
+            backends.append(("selenium", scraper.SeleniumBackend()))
+
+        for name, backend in backends:
+            elapsed, count = timed(backend, server.product_url, args.reviews, args.runs)
+            print(f"{name:15s} {elapsed:7.2f} s  {count:5d} reviews  {count / elapsed:8.1f} reviews/s")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Multi-product analysis: N products one after another through /analyze versus
+one /analyze/batch call, against the fixture server and the fake LLM server.
+
+    python benchmarks/bench_batch.py --products 4 --reviews 120 --llm-latency-ms 400
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fake_llm_server import FakeLLMServer  # noqa: E402
+from fixture_server import FixtureServer, generate_reviews  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=4)
+    parser.add_argument("--reviews", type=int, default=120)
+    parser.add_argument("--latency-ms", type=int, default=80, help="fixture page latency")
+    parser.add_argument("--llm-latency-ms", type=int, default=400)
+    args = parser.parse_args()
+
+    ids = [str(2000 + i) for i in range(args.products)]
+    fixture = FixtureServer(latency_ms=args.latency_ms,
+                            products={cid: generate_reviews(args.reviews + 20 * i) for i, cid in enumerate(ids)}).start()
+    llm = FakeLLMServer(latency_ms=args.llm_latency_ms).start()
+    os.environ.update({
+        "TRENDYOL_REVIEWS_API": fixture.api_template,
+        "OPENAI_BASE_URL": llm.openai_base_url,
+        "OPENAI_API_KEY": "fake",
+        "GOOGLE_API_KEY": "",
+        "SENTIMENT_CACHE": "0",
+        "CHROME_POOL_PRELAUNCH": "0",
+    })
+
+    from fastapi.testclient import TestClient
+    import main as service
+    client = TestClient(service.app)
+    urls = [fixture.product_url_for(cid) for cid in ids]
+    limit = args.reviews + 20 * args.products
+
+    started = time.perf_counter()
+    for url in urls:
+        client.post("/analyze", json={"url": url, "limit": limit, "backend": "http"}).raise_for_status()
+    serial = time.perf_counter() - started
+
+    started = time.perf_counter()
+    response = client.post("/analyze/batch", json={"urls": urls, "limit": limit, "backend": "http"})
+    response.raise_for_status()
+    batch = time.perf_counter() - started
+    body = response.json()
+
+    slowest = max(p["elapsed_s"] for p in body["products"])
+    print(f"{args.products} products, {args.reviews}+ reviews each, LLM latency {args.llm_latency_ms}ms")
+    print(f"  serial /analyze   {serial:6.2f}s")
+    print(f"  /analyze/batch    {batch:6.2f}s   (slowest product {slowest:.2f}s)")
+    print(f"  aspects compared: {', '.join(a['aspect'] for a in body['comparison']['aspects'])}")
+    print(f"  best overall: {body['comparison']['best_overall']}")
+
+    llm.stop()
+    fixture.stop()
+
+
+if __name__ == "__main__":
+    main()
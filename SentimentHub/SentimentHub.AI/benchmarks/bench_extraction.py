@@ -0,0 +1,100 @@
+"""
+Compares bulk (single execute_script) and per-element review card extraction
+on a saved review page.
+
+    python benchmarks/bench_extraction.py --page saved_yorumlar.html
+    python benchmarks/bench_extraction.py --cards 300   # synthetic page
+
+Needs Chrome, like the scraper itself.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import driver_pool  # noqa: E402
+import scraper  # noqa: E402
+
+
+def synthetic_page(card_count):
+    cards = []
+    for i in range(card_count):
+        stars = '<i class="full"></i>' * (1 + i % 5)
+        # Every 7th card misses the Trendyol text class to exercise the fallbacks
+        text = f"Ürün {i} gayet güzel, kargo hızlı geldi. Tavsiye ederim."
+        body = f'<p>{text}</p>' if i % 7 == 0 else f'<div class="rnr-com-tx">{text}</div>'
+        cards.append(
+            f'<div class="rnr-com-w"><div class="rnr-com-sr">{stars}</div>{body}'
+            f'<span class="rnr-com-usr">K** M**</span><span class="rnr-com-dt">{1 + i % 28} Ocak 2026</span></div>'
+        )
+    return f'<html><body><h1>Benchmark Ürünü</h1>{"".join(cards)}</body></html>'
+
+
+DETACH_JS = """
+window.__benchCards = Array.prototype.slice.call(document.getElementsByClassName('rnr-com-w'));
+window.__benchCards.forEach(function (c) { c.parentNode.removeChild(c); });
+return window.__benchCards.length;
+"""
+
+# Appends the next batch of detached cards, like one infinite-scroll pass
+REVEAL_JS = """
+window.__benchCards.splice(0, arguments[0]).forEach(function (c) { document.body.appendChild(c); });
+return window.__benchCards.length;
+"""
+
+
+def run_passes(driver, path, mode, step):
+    """Simulates scroll passes that each reveal `step` more cards."""
+    driver.get("file://" + os.path.abspath(path))
+    driver.execute_script(DETACH_JS)
+    watermark, parsed, seen = 0, [], set()
+    started = time.perf_counter()
+    while driver.execute_script(REVEAL_JS, step) or watermark < len(scraper._find_containers(driver)):
+        start = 0 if mode.endswith("-rescan") else watermark
+        extraction = mode.split("-")[0]
+        count, cards = scraper._extract_cards(driver, extraction, start, seen)
+        for card in cards:
+            if card["text"] not in seen:
+                seen.add(card["text"])
+                parsed.append(card)
+        watermark = count
+    return time.perf_counter() - started, parsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page", help="Saved Trendyol /yorumlar HTML file")
+    parser.add_argument("--cards", type=int, default=200)
+    parser.add_argument("--step", type=int, default=20, help="Cards revealed per simulated pass")
+    args = parser.parse_args()
+
+    path = args.page
+    if not path:
+        fd, path = tempfile.mkstemp(suffix=".html")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(synthetic_page(args.cards))
+
+    pool = driver_pool.DriverPool(size=1)
+    try:
+        with pool.session() as driver:
+            results = {}
+            for mode in ("element-rescan", "element", "bulk"):
+                elapsed, parsed = run_passes(driver, path, mode, args.step)
+                results[mode] = parsed
+                print(f"{mode:15s} {elapsed * 1000:9.1f} ms  {len(parsed)} reviews  "
+                      f"{len(parsed) / elapsed if elapsed else 0:9.1f} cards/s")
+
+            same = [(c["text"], c["rating"], c["date"]) for c in results["element"]] == \
+                   [(c["text"], c["rating"], c["date"]) for c in results["bulk"]]
+            print(f"bulk output matches element output: {same}")
+    finally:
+        pool.shutdown()
+        if not args.page:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
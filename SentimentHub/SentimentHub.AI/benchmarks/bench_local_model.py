@@ -0,0 +1,71 @@
+"""
+CPU throughput (reviews/sec) of the local sentiment model: the old
+one-review-at-a-time pipeline call versus the batched engine.
+
+    python benchmarks/bench_local_model.py --reviews 256
+    python benchmarks/bench_local_model.py --backends torch int8 onnx --batch-sizes 8 16 32
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_model import LocalSentimentEngine  # noqa: E402
+
+PHRASES = [
+    "Ürün çok güzel", "kargo hızlı geldi", "kumaşı biraz ince", "fiyatına göre idare eder",
+    "paketleme özensizdi", "bedeni tam oldu", "satıcıya teşekkürler", "iade etmek zorunda kaldım",
+    "rengi fotoğraftaki gibi değil", "herkese tavsiye ederim",
+]
+
+
+def synthetic_reviews(count, seed=7):
+    """Realistic length spread: mostly short reviews with a long tail."""
+    rng = random.Random(seed)
+    reviews = []
+    for _ in range(count):
+        n = min(int(rng.expovariate(1 / 4)) + 1, 120)
+        reviews.append(", ".join(rng.choice(PHRASES) for _ in range(n)) + ".")
+    return reviews
+
+
+def measure(fn, texts):
+    started = time.perf_counter()
+    fn(texts)
+    elapsed = time.perf_counter() - started
+    return len(texts) / elapsed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="savasy/bert-base-turkish-sentiment-cased")
+    parser.add_argument("--reviews", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8"])
+    parser.add_argument("--skip-pipeline", action="store_true")
+    args = parser.parse_args()
+
+    texts = synthetic_reviews(args.reviews)
+    print(f"{len(texts)} reviews, mean length {sum(map(len, texts)) / len(texts):.0f} chars")
+
+    if not args.skip_pipeline:
+        from transformers import pipeline
+        pipe = pipeline("sentiment-analysis", model=args.model)
+        pipe(texts[0][:512])  # warm up
+        rate, elapsed = measure(lambda ts: [pipe(t[:512])[0] for t in ts], texts)
+        print(f"{'pipeline (1 by 1)':24s} {rate:8.1f} reviews/s  ({elapsed:.2f}s)")
+
+    for backend in args.backends:
+        for batch_size in args.batch_sizes:
+            engine = LocalSentimentEngine(args.model, batch_size=batch_size, backend=backend)
+            engine.predict(texts[:batch_size])  # warm up
+            rate, elapsed = measure(engine.predict, texts)
+            label = f"engine {backend} bs={batch_size}"
+            print(f"{label:24s} {rate:8.1f} reviews/s  ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
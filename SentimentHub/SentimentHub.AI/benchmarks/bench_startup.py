@@ -0,0 +1,61 @@
+"""
+Import time and peak RSS of the AI service modules, each measured in a fresh
+interpreter.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --warmup local   # include a model load
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import {module}
+imported = time.perf_counter() - started
+warm = None
+if {warmup!r}:
+    import sentiment
+    t = time.perf_counter()
+    sentiment.warmup({warmup!r}.split(","))
+    warm = time.perf_counter() - t
+try:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+except ImportError:  # Windows
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        peak = getattr(info, "peak_wset", info.rss) / 2 ** 20
+    except ImportError:
+        peak = None
+print(json.dumps({{"import_s": imported, "warmup_s": warm, "peak_rss_mb": peak}}))
+"""
+
+
+def probe(module, warmup):
+    out = subprocess.run([sys.executable, "-c", PROBE.format(module=module, warmup=warmup)],
+                         cwd=HERE, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modules", nargs="+", default=["sentiment", "main"])
+    parser.add_argument("--warmup", default="", help="Comma list of backends to load after import")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        r = probe(module, args.warmup)
+        warm = f"  warmup {r['warmup_s']:.2f}s" if r["warmup_s"] is not None else ""
+        rss = f"{r['peak_rss_mb']:7.1f} MB" if r["peak_rss_mb"] is not None else "    n/a"
+        print(f"import {module:10s} {r['import_s']:6.2f}s  peak RSS {rss}{warm}")
+
+
+if __name__ == "__main__":
+    main()
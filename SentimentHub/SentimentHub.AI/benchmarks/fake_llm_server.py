@@ -0,0 +1,154 @@
+"""
+Fake Gemini (REST generateContent) and OpenAI (chat completions) server with
+configurable latency and failure rate, for exercising the provider registry
+without paid APIs. `max_answer_reviews` simulates an output token limit: longer
+review lists get a truncated (invalid) JSON answer.
+
+    server = FakeLLMServer(latency_ms=200, failure_rate=0.1).start()
+    os.environ["OPENAI_BASE_URL"] = server.openai_base_url
+    os.environ["GEMINI_API_ENDPOINT"] = server.gemini_endpoint
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+POSITIVE_WORDS = ("güzel", "hızlı", "iyi", "tavsiye", "teşekkür", "kaliteli", "harika")
+NEGATIVE_WORDS = ("kötü", "berbat", "geç", "yırtık", "iade", "özensiz", "kalitesiz", "küçük")
+ASPECT_WORDS = {"Kargo": ("kargo", "teslimat"), "Kalite": ("kalite", "kumaş", "dikiş"),
+                "Paketleme": ("paket", "kutu"), "Fiyat": ("fiyat", "ucuz", "pahalı")}
+
+
+def extract_review_list(prompt):
+    """The review list is the JSON array that runs to the end of the prompt."""
+    decoder = json.JSONDecoder()
+    for match in re.finditer(r"\[", prompt):
+        try:
+            value, end = decoder.raw_decode(prompt, match.start())
+        except ValueError:
+            continue
+        if isinstance(value, list) and not prompt[end:].strip():
+            return value
+    return []
+
+
+def classify(text):
+    lower = text.lower()
+    pos = sum(w in lower for w in POSITIVE_WORDS)
+    neg = sum(w in lower for w in NEGATIVE_WORDS)
+    sentiment = "Positive" if pos > neg else "Negative" if neg > pos else "Neutral"
+    aspects = [{"aspect": a, "sentiment": sentiment, "confidence": 0.8}
+               for a, words in ASPECT_WORDS.items() if any(w in lower for w in words)]
+    return {"sentiment": sentiment, "score": 0.9, "aspects": aspects}
+
+
+def answer(prompt):
+    reviews = extract_review_list(prompt)
+    if '"strengths"' in prompt:
+        return {"strengths": ["Kargo hızlı"], "weaknesses": ["Paketleme özensiz"],
+                "advice": [f"{len(reviews)} yorum incelendi"]}
+    return [classify(str(r)) for r in reviews]
+
+
+def render(result, max_reviews):
+    """JSON text of the answer, cut mid-way like a response that hit max_tokens."""
+    text = json.dumps(result, ensure_ascii=False)
+    reviews = result.get("reviews") if isinstance(result, dict) else result
+    if max_reviews and isinstance(reviews, list) and len(reviews) > max_reviews:
+        text = text[:len(text) * max_reviews // len(reviews)]
+    return text
+
+
+class FakeLLMServer:
+    def __init__(self, latency_ms=100, jitter_ms=0, failure_rate=0.0, failure_status=503, seed=None,
+                 max_answer_reviews=None):
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.max_answer_reviews = max_answer_reviews
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.failures = 0
+        self.prompt_chars = 0
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with fake._lock:
+                    fake.requests += 1
+                    fail = fake.rng.random() < fake.failure_rate
+                    delay = fake.latency + fake.rng.uniform(0, fake.jitter)
+                    if fail:
+                        fake.failures += 1
+                time.sleep(delay)
+                if fail:
+                    self._send(fake.failure_status, {"error": {"message": "fake failure", "code": fake.failure_status}})
+                    return
+
+                if self.path.endswith("/chat/completions"):
+                    prompt = body["messages"][-1]["content"]
+                    result = answer(prompt)
+                    if isinstance(result, list):
+                        result = {"reviews": result}
+                    self._send(200, {
+                        "id": "fake", "object": "chat.completion", "created": int(time.time()), "model": body.get("model"),
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": render(result, fake.max_answer_reviews)}}],
+                        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 0, "total_tokens": len(prompt) // 4},
+                    })
+                elif ":generateContent" in self.path:
+                    prompt = "".join(p.get("text", "") for c in body.get("contents", []) for p in c.get("parts", []))
+                    self._send(200, {"candidates": [{
+                        "index": 0, "finishReason": "STOP",
+                        "content": {"role": "model", "parts": [{"text": render(answer(prompt), fake.max_answer_reviews)}]},
+                    }], "usageMetadata": {"promptTokenCount": len(prompt) // 4}})
+                else:
+                    self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+                with fake._lock:
+                    fake.prompt_chars += len(prompt)
+
+        return Handler
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    @property
+    def openai_base_url(self):
+        return self.base_url + "/v1"
+
+    @property
+    def gemini_endpoint(self):
+        return self.base_url
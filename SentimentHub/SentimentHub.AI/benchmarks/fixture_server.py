@@ -0,0 +1,191 @@
+"""
+Local stand-in for Trendyol: serves a product review page and the paged
+review JSON from generated (or recorded) data on 127.0.0.1.
+
+    server = FixtureServer(review_count=300).start()
+    url = server.product_url          # http://127.0.0.1:<port>/urun-p-123456
+    os.environ["TRENDYOL_REVIEWS_API"] = server.api_template
+
+    server = FixtureServer(**load_recording("recordings/some-product")).start()
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CONTENT_ID = "123456"
+
+SAMPLE_TEXTS = [
+    "Ürün çok güzel, kargo hızlı geldi. Tavsiye ederim.",
+    "Kumaşı kalitesiz, bir yıkamada dikişleri açıldı.",
+    "Fiyatına göre gayet iyi, beden tam oldu.",
+    "Paketleme özensizdi, kutu yırtık geldi.",
+    "Satıcı çok ilgili, hediye de göndermiş teşekkürler.",
+    "Beklediğimden küçük çıktı, iade edeceğim.",
+]
+
+
+def generate_reviews(count):
+    return [{
+        "comment": f"{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} (#{i})",
+        "rate": 5 - (i % 5),
+        "userFullName": f"K** {chr(65 + i % 26)}**",
+        "commentDateISOtype": f"2026-01-{1 + i % 28:02d}",
+    } for i in range(count)]
+
+
+# Building blocks for generate_varied_reviews: realistic, mostly distinct reviews
+# (the six SAMPLE_TEXTS collapse into six near-duplicate clusters)
+OPENERS = ["Ürün", "Elbise", "Ayakkabı", "Çanta", "Gömlek", "Mont", "Kazak", "Pantolon", "Tişört", "Etek"]
+CLAUSES = [
+    "çok güzel", "beklediğimden kaliteli", "fotoğraftaki gibi", "rengi soluk", "kumaşı ince",
+    "dikişleri özensiz", "bedeni tam oldu", "bir beden küçük geldi", "kalıbı dar", "fiyatına göre gayet iyi",
+    "biraz pahalı", "kargo hızlı geldi", "teslimat geç oldu", "paketleme özenliydi", "kutu yırtık geldi",
+    "satıcı ilgiliydi", "eksik parça çıktı", "yanlış ürün gönderildi", "ilk yıkamada çekti", "rahat ve şık",
+]
+CLOSERS = ["Tavsiye ederim.", "İade edeceğim.", "Tekrar alırım.", "Pişman oldum.", "Teşekkürler.", "", "", ""]
+
+
+def generate_varied_reviews(count, seed=0, duplicate_rate=0.0):
+    """
+    Reviews composed from random clauses, so texts rarely repeat. A share of
+    `duplicate_rate` repeats an earlier review with different case/punctuation,
+    like copy-pasted or templated reviews on real pages.
+    """
+    rng = random.Random(seed)
+    reviews = []
+    for i in range(count):
+        if reviews and rng.random() < duplicate_rate:
+            text = rng.choice(reviews)["comment"]
+            text = rng.choice([text.upper(), text.lower(), text + "!!", text.replace(",", ""), text + " 👍"])
+        else:
+            clauses = rng.sample(CLAUSES, rng.randint(1, 4))
+            text = f"{rng.choice(OPENERS)} {', '.join(clauses)}. {rng.choice(CLOSERS)}".strip()
+        reviews.append({
+            "comment": text,
+            "rate": rng.randint(1, 5),
+            "userFullName": f"K** {chr(65 + i % 26)}**",
+            "commentDateISOtype": f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}",
+        })
+    return reviews
+
+
+def load_recording(directory):
+    """
+    FixtureServer kwargs for a product captured with record_fixture.py:
+    `reviews.json` (the review items of every API page, in order) and
+    `page.html` (the /yorumlar page) when it was recorded.
+    """
+    with open(os.path.join(directory, "reviews.json"), encoding="utf-8") as f:
+        recording = {"reviews": json.load(f)}
+    html_path = os.path.join(directory, "page.html")
+    if os.path.exists(html_path):
+        with open(html_path, encoding="utf-8") as f:
+            recording["page_html"] = f.read()
+    return recording
+
+
+def save_recording(directory, reviews, page_html=None):
+    """Writes a recording in the layout load_recording() reads."""
+    os.makedirs(directory, exist_ok=True)
+    if page_html is not None:
+        with open(os.path.join(directory, "page.html"), "w", encoding="utf-8") as f:
+            f.write(page_html)
+    with open(os.path.join(directory, "reviews.json"), "w", encoding="utf-8") as f:
+        json.dump(reviews, f, ensure_ascii=False, indent=1)
+
+
+def render_review_page(reviews, title="Fixture Ürün"):
+    cards = []
+    for r in reviews:
+        stars = '<i class="full"></i>' * r["rate"]
+        cards.append(
+            f'<div class="rnr-com-w"><div class="rnr-com-sr">{stars}</div>'
+            f'<div class="rnr-com-tx">{r["comment"]}</div>'
+            f'<span class="rnr-com-usr">{r["userFullName"]}</span>'
+            f'<span class="rnr-com-dt">{r["commentDateISOtype"]}</span></div>'
+        )
+    return f'<html><body><h1>{title}</h1>{"".join(cards)}</body></html>'
+
+
+class FixtureServer:
+    def __init__(self, review_count=200, html_reviews=10, latency_ms=0, reviews=None, page_html=None, products=None):
+        self.reviews = reviews if reviews is not None else generate_reviews(review_count)
+        # Extra products by content id, e.g. {"2001": generate_reviews(80)}; see product_url_for()
+        self.products = {CONTENT_ID: self.reviews, **(products or {})}
+        self.html_reviews = html_reviews
+        self.latency = latency_ms / 1000.0
+        self.page_html = page_html
+        self.requests = 0
+        self._httpd = None
+
+    def _handler(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body, content_type):
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                fixture.requests += 1
+                if fixture.latency:
+                    time.sleep(fixture.latency)
+                parsed = urlparse(self.path)
+                if parsed.path.startswith("/api/review/"):
+                    query = parse_qs(parsed.query)
+                    page = int(query.get("page", ["0"])[0])
+                    size = int(query.get("pageSize", ["30"])[0])
+                    reviews = fixture.products.get(parsed.path.rsplit("/", 1)[-1], [])
+                    content = reviews[page * size:(page + 1) * size]
+                    total_pages = -(-len(reviews) // size)
+                    payload = {"result": {"productReviews": {"content": content, "totalPages": total_pages, "page": page}}}
+                    self._send(json.dumps(payload, ensure_ascii=False), "application/json; charset=utf-8")
+                elif parsed.path.endswith("/yorumlar"):
+                    match = re.search(r"-p-(\d+)", parsed.path)
+                    content_id = match.group(1) if match else CONTENT_ID
+                    reviews = fixture.products.get(content_id, [])[:fixture.html_reviews]
+                    title = "Fixture Ürün" if content_id == CONTENT_ID else f"Fixture Ürün {content_id}"
+                    html = fixture.page_html or render_review_page(reviews, title)
+                    self._send(html, "text/html; charset=utf-8")
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+
+        return Handler
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    @property
+    def product_url(self):
+        return self.product_url_for(CONTENT_ID)
+
+    def product_url_for(self, content_id):
+        return f"{self.base_url}/fixture-urun-p-{content_id}"
+
+    @property
+    def api_template(self):
+        return self.base_url + "/api/review/{content_id}?page={page}&pageSize={page_size}"
@@ -0,0 +1,69 @@
+"""
+Records a real Trendyol product (review page HTML + every review API page) so
+the benchmark suite can replay it offline from the fixture server.
+
+    python benchmarks/record_fixture.py https://www.trendyol.com/...-p-123456 --max-pages 20
+    python benchmarks/suite.py --recording benchmarks/recordings/p-123456
+
+--synthetic N writes N generated reviews in the same layout instead, without
+touching the network (that is how recordings/synthetic-300 was made).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from backends import product_content_id, reviews_page_url  # noqa: E402
+from http_scraper import REVIEWS_API_TEMPLATE, _build_session, _find_review_list, _find_total_pages  # noqa: E402
+from fixture_server import generate_varied_reviews, render_review_page, save_recording  # noqa: E402
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url", nargs="?")
+    parser.add_argument("--max-pages", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=30)
+    parser.add_argument("--delay", type=float, default=0.5, help="pause between API pages (be polite)")
+    parser.add_argument("--out", help=f"output directory (default {RECORDINGS_DIR}/p-<content id>)")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="write N generated reviews instead of recording")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        out = args.out or os.path.join(RECORDINGS_DIR, f"synthetic-{args.synthetic}")
+        reviews = generate_varied_reviews(args.synthetic, seed=args.seed, duplicate_rate=args.duplicate_rate)
+        save_recording(out, reviews, render_review_page(reviews[:10]))
+        print(f"Wrote {len(reviews)} generated reviews into {out}")
+        return
+    if not args.url:
+        parser.error("a product URL is required unless --synthetic is given")
+
+    content_id = product_content_id(args.url)
+    if not content_id:
+        parser.error("Could not find the product content id (-p-<digits>) in the URL")
+    out = args.out or os.path.join(RECORDINGS_DIR, f"p-{content_id}")
+    session = _build_session(1)
+
+    response = session.get(reviews_page_url(args.url), timeout=15)
+    response.raise_for_status()
+
+    reviews, page, total_pages = [], 0, 1
+    while page < min(total_pages, args.max_pages):
+        url = REVIEWS_API_TEMPLATE.format(content_id=content_id, page=page, page_size=args.page_size)
+        payload = session.get(url, headers={"Accept": "application/json"}, timeout=15).json()
+        reviews.extend(_find_review_list(payload) or [])
+        total_pages = _find_total_pages(payload) or 0
+        page += 1
+        time.sleep(args.delay)
+
+    save_recording(out, reviews, response.text)
+    print(f"Recorded {len(reviews)} reviews from {page} pages into {out}")
+
+
+if __name__ == "__main__":
+    main()
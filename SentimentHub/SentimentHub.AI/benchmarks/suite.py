@@ -0,0 +1,300 @@
+"""
+Offline benchmark suite: scraping, /analyze, aspect extraction and the
+executive summary end to end against the fixture server (generated or
+recorded reviews) and the fake LLM server. No Trendyol or paid API calls.
+
+    python benchmarks/suite.py
+    python benchmarks/suite.py --scenarios scrape,analyze --reviews 600 --iterations 20
+    python benchmarks/suite.py --recording benchmarks/recordings/p-123456
+    python benchmarks/suite.py --llm-latency-ms 300 --llm-failure-rate 0.1 --provider gemini
+    python benchmarks/suite.py --save-baseline          # benchmarks/baselines/default.json
+    python benchmarks/suite.py --compare                # exits 1 when a metric regressed
+
+Each scenario reports reviews/s, p50/p95 latency per operation and the
+process's peak RSS while it ran (scenarios share the process, so this
+includes whatever earlier ones loaded). Baselines are machine specific:
+record them on the machine you compare on.
+
+--compare flags a timing metric only when it is worse by more than the
+tolerance, by more than NOISE_SIGMAS times the measured run-to-run noise,
+and by more than --min-delta-ms per operation: a few milliseconds of
+scheduling jitter is a large percentage of a 10ms scenario.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from fake_llm_server import FakeLLMServer  # noqa: E402
+from fixture_server import FixtureServer, generate_varied_reviews, load_recording  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+BASELINE_DIR = os.path.join(HERE, "baselines")
+SCENARIOS = ("scrape", "analyze", "aspects", "summary")
+# metric -> True when higher is better
+COMPARED_METRICS = {"reviews_per_s": True, "p50_s": False, "p95_s": False, "peak_rss_mb": False}
+TIMING_METRICS = ("reviews_per_s", "p50_s", "p95_s")
+# A timing change within this many standard deviations of the two runs is noise
+NOISE_SIGMAS = 3
+
+
+class RssSampler:
+    """Peak resident memory while a scenario runs (ru_maxrss only ever grows)."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def current():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            pass
+        if psutil is not None:
+            return psutil.Process().memory_info().rss
+        if resource is not None:
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KB on Linux
+        return 0
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.current()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = (len(ordered) - 1) * q
+    low, high = int(index), min(int(index) + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+
+
+def measure(op, reviews_per_op, iterations, llm, warmup=2):
+    """Runs `op` `warmup` times untimed (lazy loading, connection pools, caches), then `iterations` times."""
+    for _ in range(warmup):
+        op()
+    latencies = []
+    llm_before = llm.requests
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            op_started = time.perf_counter()
+            op()
+            latencies.append(time.perf_counter() - op_started)
+        elapsed = time.perf_counter() - started
+    return {
+        "operations": iterations,
+        "reviews_per_op": reviews_per_op,
+        "reviews_per_s": round(reviews_per_op * iterations / elapsed, 1) if elapsed else 0.0,
+        "p50_s": round(percentile(latencies, 0.5), 4),
+        "p95_s": round(percentile(latencies, 0.95), 4),
+        "mean_s": round(statistics.fmean(latencies), 4),
+        "stdev_s": round(statistics.stdev(latencies), 4) if len(latencies) > 1 else 0.0,
+        "peak_rss_mb": round(rss.peak / 2 ** 20, 1),
+        "llm_requests_per_op": round((llm.requests - llm_before) / iterations, 2),
+    }
+
+
+def run_scenarios(names, fixture, llm, args):
+    # Imported only now: the service modules read their settings at import time
+    import scraper
+    import sentiment
+    from fastapi.testclient import TestClient
+    import main as service
+
+    client = TestClient(service.app)
+    url = fixture.product_url
+    texts = [r["text"] for r in scraper.scrape_trendyol_reviews(url, args.reviews, backend="http")[0]]
+    if not texts:
+        raise SystemExit("The fixture server returned no reviews")
+
+    def scrape():
+        scraper.scrape_trendyol_reviews(url, args.reviews, backend="http")
+
+    def analyze():
+        client.post("/analyze", json={"url": url, "limit": args.reviews, "backend": "http"}).raise_for_status()
+
+    def aspects():
+        for text in texts:  # per-review entry point, as used by the fallback path
+            sentiment.analyze_aspects(text)
+
+    def summary():
+        sentiment.generate_business_summary(texts)
+
+    plans = {
+        "scrape": (scrape, len(texts), args.iterations),
+        "analyze": (analyze, len(texts), args.iterations),
+        "aspects": (aspects, len(texts), args.iterations),
+        "summary": (summary, len(texts), args.iterations),
+    }
+    results = {}
+    for name in names:
+        op, per_op, iterations = plans[name]
+        results[name] = measure(op, per_op, iterations, llm, args.warmup)
+        print(format_result(name, results[name]))
+    return results
+
+
+def format_result(name, r):
+    return (f"{name:8s} {r['reviews_per_s']:9.1f} reviews/s  p50 {r['p50_s'] * 1000:8.1f}ms  "
+            f"p95 {r['p95_s'] * 1000:8.1f}ms  peak RSS {r['peak_rss_mb']:7.1f} MB  "
+            f"LLM req/op {r['llm_requests_per_op']:g}")
+
+
+def noise(base, current):
+    """Relative run-to-run noise of a scenario: the combined coefficient of variation of both runs."""
+    cvs = [r.get("stdev_s", 0.0) / r["mean_s"] for r in (base, current) if r.get("mean_s")]
+    return sum(cv ** 2 for cv in cvs) ** 0.5
+
+
+def compare(results, baseline, tolerance, min_delta_s=0.0):
+    """Prints per-metric changes; returns the list of regressions beyond the allowed change."""
+    regressions = []
+    print(f"\nAgainst baseline from {baseline['meta'].get('created')} "
+          f"(tolerance {tolerance:.0%} or {NOISE_SIGMAS} sigma, at least {min_delta_s * 1000:g}ms/op):")
+    for name, current in results.items():
+        base = baseline["scenarios"].get(name)
+        if not base:
+            print(f"  {name:8s} no baseline")
+            continue
+        timing_tolerance = max(tolerance, NOISE_SIGMAS * noise(base, current))
+        # Per-operation time difference; below the floor timing changes are not gated
+        delta_s = abs(current.get("mean_s", 0.0) - base.get("mean_s", 0.0))
+        changes = []
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = base.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            flag = ""
+            if metric in TIMING_METRICS:
+                if worse > timing_tolerance and delta_s >= min_delta_s:
+                    flag = " REGRESSION"
+            elif worse > tolerance:
+                flag = " REGRESSION"
+            if flag:
+                regressions.append(f"{name}.{metric}")
+            changes.append(f"{metric} {old:g} -> {new:g} ({change:+.0%}){flag}")
+        print(f"  {name:8s} " + "; ".join(changes) + f"  [timing tolerance {timing_tolerance:.0%}]")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma list of " + ", ".join(SCENARIOS))
+    parser.add_argument("--reviews", type=int, default=300)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2, help="untimed runs before each scenario")
+    parser.add_argument("--recording", help="directory written by record_fixture.py instead of generated reviews")
+    parser.add_argument("--duplicate-rate", type=float, default=0.1, help="near-duplicate share of generated reviews")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--latency-ms", type=int, default=20, help="fixture page latency")
+    parser.add_argument("--provider", choices=("openai", "gemini"), default="openai")
+    parser.add_argument("--llm-latency-ms", type=int, default=150)
+    parser.add_argument("--llm-jitter-ms", type=int, default=50)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-max-answer-reviews", type=int, default=None)
+    parser.add_argument("--baseline-name", default="default")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative change before a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=25.0,
+                        help="timing changes smaller than this per operation are never regressions")
+    parser.add_argument("--output", help="also write the results JSON here")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+
+    fixture_kwargs = load_recording(args.recording) if args.recording else {
+        "reviews": generate_varied_reviews(args.reviews, seed=args.seed, duplicate_rate=args.duplicate_rate)}
+    fixture = FixtureServer(latency_ms=args.latency_ms, **fixture_kwargs).start()
+    llm = FakeLLMServer(latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms, seed=args.seed,
+                        failure_rate=args.llm_failure_rate, max_answer_reviews=args.llm_max_answer_reviews).start()
+    os.environ.update({
+        "TRENDYOL_REVIEWS_API": fixture.api_template,
+        "OPENAI_API_KEY": "fake" if args.provider == "openai" else "",
+        "OPENAI_BASE_URL": llm.openai_base_url,
+        "GOOGLE_API_KEY": "fake" if args.provider == "gemini" else "",
+        "GEMINI_API_ENDPOINT": llm.gemini_endpoint,
+        "SENTIMENT_CACHE": "0",  # every operation pays for its LLM calls
+        "SNAPSHOTS": "0",
+        "CHROME_POOL_PRELAUNCH": "0",
+    })
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")  # a cached local model still loads; never download mid-run
+    # The fake has no quota; export GEMINI_RPM/OPENAI_RPM to measure under the real limits
+    os.environ.setdefault("GEMINI_RPM", "6000")
+    os.environ.setdefault("OPENAI_RPM", "6000")
+
+    print(f"{len(fixture.reviews)} {'recorded' if args.recording else 'generated'} reviews, "
+          f"{args.provider} fake at {args.llm_latency_ms}ms (failure rate {args.llm_failure_rate:g})")
+    results = run_scenarios(names, fixture, llm, args)
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "args": vars(args),
+        },
+        "scenarios": results,
+    }
+    fixture.stop()
+    llm.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    baseline_path = os.path.join(BASELINE_DIR, f"{args.baseline_name}.json")
+    if args.compare:
+        if not os.path.exists(baseline_path):
+            raise SystemExit(f"No baseline at {baseline_path}; run with --save-baseline first")
+        with open(baseline_path, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta_ms / 1000)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+from aggregates import SENTIMENT_KEYS, SENTIMENT_POINTS
+
+
+def _empty_counts():
+    return {"mentions": 0, "positive": 0, "negative": 0, "neutral": 0}
+
+
+def _with_score(counts):
+    # Same scale as overall_sentiment_score
+    mentions = counts["mentions"]
+    points = sum(SENTIMENT_POINTS.get(label, 0.0) * counts[key] for label, key in SENTIMENT_KEYS.items())
+    score = points / mentions if mentions else 0.0
+    return {**counts, "score": round(score, 3)}
+
+
+def product_overview(result):
+    """Headline numbers for one AnalyzeResponse."""
+    counts = _empty_counts()
+    for review in result.reviews:
+        counts["mentions"] += 1
+        key = SENTIMENT_KEYS.get(review.sentiment)
+        if key:
+            counts[key] += 1
+    total = counts["mentions"]
+    return {
+        "business_name": result.business_name,
+        "total_reviews": total,
+        "overall_sentiment_score": round(result.overall_sentiment_score, 3),
+        "positive_rate": round(100.0 * counts["positive"] / total, 1) if total else 0.0,
+        "negative_rate": round(100.0 * counts["negative"] / total, 1) if total else 0.0,
+    }
+
+
+def aspect_counts(result):
+    """{aspect: {mentions, positive, negative, neutral}} over every review of one product."""
+    aspects = {}
+    for review in result.reviews:
+        for aspect in review.aspects:
+            counts = aspects.setdefault(aspect.aspect, _empty_counts())
+            counts["mentions"] += 1
+            key = SENTIMENT_KEYS.get(aspect.sentiment)
+            if key:
+                counts[key] += 1
+    return aspects
+
+
+def compare_products(results, min_mentions=1):
+    """
+    Side-by-side view of several products.
+    `results` maps a product key (its URL) to its AnalyzeResponse. Returns
+    {"overview": {key: ...}, "aspects": [{aspect, products: {key: stats}, best}],
+    "best_overall": key}. Aspects are sorted by total mentions; `best` is the
+    product with the highest aspect score among those mentioning it at least
+    `min_mentions` times.
+    """
+    overview = {key: product_overview(result) for key, result in results.items()}
+    per_product = {key: aspect_counts(result) for key, result in results.items()}
+
+    names = sorted({name for counts in per_product.values() for name in counts},
+                   key=lambda name: -sum(c.get(name, {}).get("mentions", 0) for c in per_product.values()))
+    aspects = []
+    for name in names:
+        products = {key: _with_score(counts.get(name, _empty_counts())) for key, counts in per_product.items()}
+        eligible = {key: stats for key, stats in products.items() if stats["mentions"] >= min_mentions}
+        best = max(eligible, key=lambda key: eligible[key]["score"]) if len(eligible) > 1 else None
+        aspects.append({"aspect": name, "products": products, "best": best})
+
+    best_overall = max(overview, key=lambda key: overview[key]["overall_sentiment_score"]) if len(overview) > 1 else None
+    return {"overview": overview, "aspects": aspects, "best_overall": best_overall}
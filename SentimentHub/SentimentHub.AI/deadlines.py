@@ -0,0 +1,89 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+# Request deadlines ("deadline_ms"). The budget is split into stage cutoffs:
+# scraping stops once DEADLINE_SCRAPE_SHARE of it is used, LLM calls (review
+# batches and the summary) must be done before the last
+# DEADLINE_FINALIZE_SHARE, which is kept for the local model, the keyword
+# summary and building the response. Like the trace, the deadline lives in a
+# context variable and reaches worker threads through telemetry.bind().
+
+SCRAPE_SHARE = float(os.getenv("DEADLINE_SCRAPE_SHARE", "0.4"))
+FINALIZE_SHARE = float(os.getenv("DEADLINE_FINALIZE_SHARE", "0.15"))
+# Less LLM time than this left and the stage goes straight to the local tier
+MIN_LLM_MS = int(os.getenv("DEADLINE_MIN_LLM_MS", "1500"))
+# Floor for clamped network timeouts, so a call is never given zero seconds
+MIN_TIMEOUT_S = 0.05
+
+
+class DeadlineExceeded(Exception):
+    """An LLM call was skipped or cut off because the request's LLM cutoff passed."""
+
+
+class Deadline:
+    """Time budget of one request, with the monotonic cutoff of each stage."""
+
+    def __init__(self, budget_ms):
+        self.budget_ms = budget_ms
+        self.started = time.monotonic()
+        budget = budget_ms / 1000.0
+        self.cutoffs = {
+            "scrape": self.started + budget * SCRAPE_SHARE,
+            "llm": self.started + budget * (1 - FINALIZE_SHARE),
+            "total": self.started + budget,
+        }
+
+    def remaining(self, stage="total"):
+        return self.cutoffs[stage] - time.monotonic()
+
+    def elapsed_ms(self):
+        return int((time.monotonic() - self.started) * 1000)
+
+
+_current = contextvars.ContextVar("deadline", default=None)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def scope(deadline_ms):
+    """
+    Runs the block under a new deadline of `deadline_ms`. None keeps whatever
+    deadline is already active (a batch request's products share the batch's).
+    """
+    if deadline_ms is None:
+        yield current()
+        return
+    deadline = Deadline(deadline_ms)
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def remaining(stage="total"):
+    """Seconds left before `stage`'s cutoff, or None when there is no deadline."""
+    deadline = current()
+    return None if deadline is None else deadline.remaining(stage)
+
+
+def expired(stage="total"):
+    left = remaining(stage)
+    return left is not None and left <= 0
+
+
+def clamp(timeout, stage="total"):
+    """`timeout` (seconds), shortened so it ends at `stage`'s cutoff."""
+    left = remaining(stage)
+    return timeout if left is None else max(MIN_TIMEOUT_S, min(timeout, left))
+
+
+def llm_window_open():
+    """True when there is no deadline or enough time is left to try the LLM."""
+    left = remaining("llm")
+    return left is None or left * 1000 >= MIN_LLM_MS
@@ -0,0 +1,189 @@
+import hashlib
+import os
+import re
+import zlib
+from aspects import turkish_lower
+
+# Near-duplicate clustering of review texts before analysis. Reviews whose
+# character 4-gram Jaccard similarity is at least DEDUP_THRESHOLD share one
+# analysis result, provided they also agree word by word (word-set Jaccard at
+# least DEDUP_WORD_THRESHOLD) and carry the same negations: "güzel" and
+# "güzel değil", "oldu" and "olmadı" are a few characters apart but opposite.
+DEDUP_ENABLED = os.getenv("DEDUP", "1") == "1"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+DEDUP_WORD_THRESHOLD = float(os.getenv("DEDUP_WORD_THRESHOLD", "0.6"))
+
+SHINGLE_SIZE = 4
+# One-permutation MinHash: NUM_BINS signature slots, LSH over BANDS x ROWS
+NUM_BINS = 50
+BANDS = 10
+ROWS = NUM_BINS // BANDS
+# Members kept per LSH bucket. Early members are the cluster representatives;
+# the cap keeps reviews built from a tiny vocabulary from going quadratic.
+BUCKET_LIMIT = 16
+
+_PUNCT_RE = re.compile(r"[^\w\s]|_")
+# Negating words; "değil"/"yok" also match their inflections (değildi, yoktu)
+NEGATION_WORDS = ("değil", "yok", "hiç", "asla")
+# Negative verb forms: -madı/-medi, -maz/-mez, -mamış, -mayacak, -mayın,
+# -masın, -madan and -mıyor. The stem must be at least two letters.
+_NEGATED_VERB_RE = re.compile(r"^\w{2,}?(?:m[ae](?:d[ıiuü]|z|m[ıiuü]ş|y[ae]c[ae]k|y[ıi]n|s[ıi]n|d[ae]n)|m[ıiuü]yor)")
+
+
+def normalize(text):
+    """Turkish-aware lowercase, punctuation removed, whitespace collapsed."""
+    return " ".join(_PUNCT_RE.sub(" ", turkish_lower(text or "")).split())
+
+
+def negations(words):
+    """
+    Sorted negation markers of a normalized word list. A negating word is
+    keyed with the word before it, so "güzel değil" and "hızlı değil" differ.
+    """
+    marks = []
+    for i, word in enumerate(words):
+        if word.startswith(NEGATION_WORDS):
+            marks.append((words[i - 1] if i else "", word))
+        elif _NEGATED_VERB_RE.match(word):
+            marks.append(("", word))
+    return tuple(sorted(marks))
+
+
+def shingles(norm):
+    if len(norm) <= SHINGLE_SIZE:
+        return {norm}
+    return {norm[i:i + SHINGLE_SIZE] for i in range(len(norm) - SHINGLE_SIZE + 1)}
+
+
+def signature(shingle_set):
+    """
+    One-permutation MinHash: each shingle is hashed once and lands in one of
+    NUM_BINS bins keeping the minimum; empty bins borrow the next filled bin
+    (rotation densification) so short reviews still get a full signature.
+    """
+    bins = [None] * NUM_BINS
+    for s in shingle_set:
+        h = zlib.crc32(s.encode("utf-8"))
+        slot, value = h % NUM_BINS, h // NUM_BINS
+        if bins[slot] is None or value < bins[slot]:
+            bins[slot] = value
+    for i in range(NUM_BINS):
+        if bins[i] is None:
+            for step in range(1, NUM_BINS):
+                source = bins[(i + step) % NUM_BINS]
+                if source is not None:
+                    bins[i] = source + step * 0x100000000  # offset keeps borrowed values distinct
+                    break
+    return bins
+
+
+def cluster_key(text):
+    """
+    Stable cluster id: 48 bits of the representative's normalized-text hash.
+    Ids end up in snapshots, so they must not depend on the run that made them
+    (a per-run counter would reuse 0, 1, ... for unrelated clusters).
+    """
+    return int(hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()[:12], 16)
+
+
+class Clusters:
+    """
+    representative: text -> text of its cluster's representative (itself if unique)
+    cluster_id:     text -> cluster_key() of the representative, only for clusters with 2+ members
+    representatives: distinct representative texts in order of first appearance
+    """
+
+    def __init__(self, representative, cluster_id, representatives):
+        self.representative = representative
+        self.cluster_id = cluster_id
+        self.representatives = representatives
+
+    def stats(self):
+        return {
+            "reviews": len(self.representative),
+            "representatives": len(self.representatives),
+            "clusters": len(set(self.cluster_id.values())),
+            "duplicates": len(self.representative) - len(self.representatives),
+        }
+
+
+def cluster_texts(texts, threshold=None, enabled=None):
+    """
+    Groups near-duplicate texts. Candidates come from MinHash LSH buckets and
+    are confirmed with the exact shingle Jaccard similarity, the word-set
+    Jaccard similarity and identical negation markers; the first text of
+    each cluster (scrape order) is its representative.
+    """
+    threshold = DEDUP_THRESHOLD if threshold is None else threshold
+    enabled = DEDUP_ENABLED if enabled is None else enabled
+    texts = list(dict.fromkeys(texts))
+    if not enabled:
+        return Clusters({t: t for t in texts}, {}, texts)
+
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)  # lowest index stays the root
+
+    norms, shingle_sets, word_sets, negation_marks = [], [], [], []
+    by_norm = {}
+    buckets = {}
+    for i, text in enumerate(texts):
+        norm = normalize(text)
+        norms.append(norm)
+        shingle_sets.append(shingles(norm))
+        words = norm.split()
+        word_sets.append(set(words))
+        negation_marks.append(negations(words))
+        if norm in by_norm:
+            union(by_norm[norm], i)  # identical after normalization
+            continue
+        by_norm[norm] = i
+        sig = signature(shingle_sets[i])
+        candidates = set()
+        for band in range(BANDS):
+            key = (band, tuple(sig[band * ROWS:(band + 1) * ROWS]))
+            bucket = buckets.setdefault(key, [])
+            candidates.update(bucket)
+            if len(bucket) < BUCKET_LIMIT:
+                bucket.append(i)
+        a = shingle_sets[i]
+        checked = set()
+        for j in sorted(candidates):
+            root = find(j)
+            if root == find(i) or root in checked:
+                continue
+            b = shingle_sets[j]
+            if min(len(a), len(b)) < threshold * max(len(a), len(b)):
+                continue  # the size gap alone rules out the threshold
+            checked.add(root)
+            common = len(a & b)
+            if common < threshold * (len(a) + len(b) - common):
+                continue
+            if negation_marks[i] != negation_marks[j]:
+                continue  # one of them negates what the other says
+            wa, wb = word_sets[i], word_sets[j]
+            common = len(wa & wb)
+            if common >= DEDUP_WORD_THRESHOLD * (len(wa) + len(wb) - common):
+                union(i, j)
+
+    representative, cluster_id, members = {}, {}, {}
+    for i, text in enumerate(texts):
+        root = find(i)
+        representative[text] = texts[root]
+        members.setdefault(root, []).append(text)
+    for root in sorted(members):
+        if len(members[root]) > 1:
+            key = cluster_key(texts[root])
+            for text in members[root]:
+                cluster_id[text] = key
+    representatives = [texts[root] for root in sorted(members)]
+    return Clusters(representative, cluster_id, representatives)
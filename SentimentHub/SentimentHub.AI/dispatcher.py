@@ -0,0 +1,144 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import deadlines
+import telemetry
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1, timeout=None):
+        """Blocks until `tokens` are available; False (nothing taken) if that takes longer than `timeout`."""
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if give_up_at is not None and now + wait > give_up_at:
+                return False
+            time.sleep(wait)
+
+
+class ProviderLimiter:
+    """Concurrency cap + request rate limit for one LLM provider."""
+
+    def __init__(self, name, max_concurrency, requests_per_minute):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._bucket = TokenBucket(rate=requests_per_minute / 60.0, capacity=max(1, max_concurrency))
+
+    def acquire(self, timeout=None):
+        """Takes a slot and a request token; False if both are not available within `timeout`."""
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=None if timeout is None else max(0.0, timeout)):
+            return False
+        left = None if timeout is None else timeout - (time.monotonic() - started)
+        if not self._bucket.acquire(timeout=left):
+            self._slots.release()
+            return False
+        return True
+
+    def release(self):
+        self._slots.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+# Defaults sized for the free Gemini tier and a standard OpenAI tier
+LIMITERS = {
+    "gemini": ProviderLimiter("gemini",
+                              int(os.getenv("GEMINI_CONCURRENCY", "4")),
+                              float(os.getenv("GEMINI_RPM", "15"))),
+    "openai": ProviderLimiter("openai",
+                              int(os.getenv("OPENAI_CONCURRENCY", "8")),
+                              float(os.getenv("OPENAI_RPM", "500"))),
+}
+
+
+def status_of(error):
+    """Best-effort HTTP status from google-api-core / openai / requests exceptions."""
+    for attr in ("status_code", "code", "http_status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def _retry_after(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retry(provider, fn, *args, max_attempts=3, base_delay=0.5, max_delay=8.0):
+    """
+    Runs fn under the provider's limiter, retrying 429/5xx with full-jitter
+    exponential backoff. Other errors propagate immediately. Under a request
+    deadline, waiting for the limiter or a retry past the LLM cutoff raises
+    DeadlineExceeded instead.
+    """
+    limiter = LIMITERS.get(provider)
+    for attempt in range(1, max_attempts + 1):
+        try:
+            if limiter:
+                if not limiter.acquire(timeout=deadlines.remaining("llm")):
+                    raise deadlines.DeadlineExceeded(f"{provider} rate limit wait would pass the request deadline")
+                try:
+                    return fn(*args)
+                finally:
+                    limiter.release()
+            return fn(*args)
+        except Exception as e:
+            status = status_of(e)
+            if status not in RETRYABLE_STATUS or attempt == max_attempts:
+                raise
+            delay = _retry_after(e) or random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            left = deadlines.remaining("llm")
+            if left is not None and delay >= left:
+                raise deadlines.DeadlineExceeded(f"{provider} returned {status}, no time left to retry") from e
+            telemetry.LLM_RETRIES.inc(provider=provider, status=status)
+            telemetry.log(f"{provider} returned {status}, retry {attempt}/{max_attempts - 1} in {delay:.2f}s")
+            time.sleep(delay)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Shared pool for LLM calls; per-provider limits are enforced by call_with_retry."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_MAX_WORKERS", "8")),
+                                           thread_name_prefix="llm")
+        return _executor
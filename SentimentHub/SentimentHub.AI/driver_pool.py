@@ -0,0 +1,238 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+import telemetry
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+
+def build_chrome_options():
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument(f"user-agent={USER_AGENT}")
+    return options
+
+
+class PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.time()
+
+
+class DriverPool:
+    """
+    Keeps up to `size` headless Chrome sessions alive between scrapes.
+    The chromedriver binary is resolved once; sessions are reset (cookies,
+    storage, extra tabs) when returned and recycled after `max_uses` or
+    whenever they look crashed.
+    """
+
+    def __init__(self, size=2, max_uses=20, acquire_timeout=300):
+        self.size = size
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._driver_path = None
+        self._closed = False
+        self._stats = {
+            "launched": 0,
+            "recycled": 0,
+            "crashed": 0,
+            "borrowed": 0,
+            "in_use": 0,
+            "launch_seconds_total": 0.0,
+            "wait_seconds_total": 0.0,
+        }
+
+    def _resolve_driver_path(self):
+        with self._lock:
+            if self._driver_path is None:
+                self._driver_path = os.getenv("CHROMEDRIVER_PATH") or ChromeDriverManager().install()
+                telemetry.log(f"Resolved chromedriver: {self._driver_path}")
+            return self._driver_path
+
+    def _launch(self):
+        started = time.perf_counter()
+        with telemetry.span("chrome_launch"):
+            driver = webdriver.Chrome(service=Service(self._resolve_driver_path()), options=build_chrome_options())
+        with self._lock:
+            self._stats["launched"] += 1
+            self._stats["launch_seconds_total"] += time.perf_counter() - started
+        return PooledDriver(driver)
+
+    def _quit(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            telemetry.log(f"Driver quit error: {e}")
+
+    @staticmethod
+    def _is_alive(pooled):
+        try:
+            return bool(pooled.driver.window_handles)
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(pooled):
+        driver = pooled.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except WebDriverException:
+            pass  # about:blank and some error pages have no storage
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def warm(self, count=None):
+        """
+        Pre-launch browsers so the first scrapes skip Chrome startup. Each
+        launch holds a slot like acquire() does, and sessions already borrowed
+        count towards `count`, so warming never exceeds the pool size.
+        """
+        count = self.size if count is None else min(count, self.size)
+        while not self._closed:
+            if not self._slots.acquire(blocking=False):
+                break  # every slot is busy, so the pool is already full
+            try:
+                with self._lock:
+                    if self._idle.qsize() + self._stats["in_use"] >= count:
+                        break
+                self._idle.put(self._launch())
+            except Exception as e:
+                telemetry.log(f"Driver pool warmup failed: {e}")
+                break
+            finally:
+                self._slots.release()
+
+    def acquire(self, timeout=None):
+        """A live session; waits at most `timeout` seconds (default acquire_timeout) for a free slot."""
+        started = time.perf_counter()
+        timeout = self.acquire_timeout if timeout is None else max(0.0, timeout)
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No Chrome session became available in time")
+        # Counted from here, so warm() also sees sessions that are still launching
+        with self._lock:
+            self._stats["in_use"] += 1
+        try:
+            pooled = None
+            while pooled is None:
+                try:
+                    candidate = self._idle.get_nowait()
+                except queue.Empty:
+                    pooled = self._launch()
+                    break
+                if self._is_alive(candidate):
+                    pooled = candidate
+                else:
+                    with self._lock:
+                        self._stats["crashed"] += 1
+                    self._quit(candidate)
+        except Exception:
+            with self._lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+            raise
+
+        pooled.uses += 1
+        with self._lock:
+            self._stats["borrowed"] += 1
+            self._stats["wait_seconds_total"] += time.perf_counter() - started
+        return pooled
+
+    def release(self, pooled, broken=False):
+        try:
+            if self._closed:
+                self._quit(pooled)
+                return
+
+            if broken or not self._is_alive(pooled):
+                with self._lock:
+                    self._stats["crashed"] += 1
+                self._quit(pooled)
+                return
+
+            if pooled.uses >= self.max_uses:
+                with self._lock:
+                    self._stats["recycled"] += 1
+                self._quit(pooled)
+                return
+
+            try:
+                self._reset(pooled)
+            except Exception as e:
+                telemetry.log(f"Driver reset failed, discarding session: {e}")
+                with self._lock:
+                    self._stats["crashed"] += 1
+                self._quit(pooled)
+                return
+
+            self._idle.put(pooled)
+        finally:
+            with self._lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+
+    @contextmanager
+    def session(self, timeout=None):
+        with telemetry.span("driver_acquire") as span:
+            pooled = self.acquire(timeout)
+            span["uses"] = pooled.uses
+        broken = False
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            with telemetry.span("driver_release", broken=broken):
+                self.release(pooled, broken=broken)
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["size"] = self.size
+        stats["max_uses"] = self.max_uses
+        stats["idle"] = self._idle.qsize()
+        stats["driver_resolved"] = self._driver_path is not None
+        return stats
+
+    def shutdown(self):
+        self._closed = True
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(
+                size=int(os.getenv("CHROME_POOL_SIZE", "2")),
+                max_uses=int(os.getenv("CHROME_MAX_USES", "20")),
+            )
+        return _pool
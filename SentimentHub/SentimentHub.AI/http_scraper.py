@@ -0,0 +1,221 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import deadlines
+import telemetry
+from backends import ScraperBackend, DEFAULT_AUTHOR, DEFAULT_BUSINESS_NAME, reviews_page_url, product_content_id
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# JSON endpoint behind the infinite scroll. Overridable so tests/benchmarks can
+# point it at a local fixture server.
+REVIEWS_API_TEMPLATE = os.getenv(
+    "TRENDYOL_REVIEWS_API",
+    "https://public-mdc.trendyol.com/discovery-web-socialgw-service/api/review/{content_id}"
+    "?page={page}&pageSize={page_size}&culture=tr-TR&storefrontId=1"
+)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+
+def _build_session(pool_size):
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept-Language": "tr-TR,tr;q=0.9",
+    })
+    return session
+
+
+def _clean(value):
+    return " ".join(str(value).split()) if value else ""
+
+
+def parse_review_cards(html):
+    """Parses server-rendered review cards with the same selector fallbacks as the Selenium path."""
+    soup = BeautifulSoup(html, HTML_PARSER)
+
+    business_name = ""
+    h1 = soup.find("h1")
+    if h1:
+        business_name = _clean(h1.get_text(" "))
+    if not business_name:
+        brand = soup.select_one(".brand-name")
+        prod = soup.select_one(".product-name")
+        if brand and prod:
+            business_name = f"{_clean(brand.get_text(' '))} {_clean(prod.get_text(' '))}"
+
+    cards = soup.select(".rnr-com-w") or soup.select("div[class*='comment']")
+    reviews = []
+    for card in cards:
+        text = ""
+        for selector in (".rnr-com-tx", "div[class*='comment-text']", "p"):
+            el = card.select_one(selector)
+            if el:
+                text = _clean(el.get_text(" "))
+            if text:
+                break
+        if not text:
+            lines = [line.strip() for line in card.get_text("\n").split("\n")]
+            text = max(lines, key=len) if lines else ""
+        if len(text) < 3:
+            continue
+
+        rating = len(card.select(".rnr-com-sr .full")) or len(card.select("i.i-star-orange")) or 5
+        author = card.select_one(".rnr-com-usr")
+        date_el = card.select_one(".rnr-com-dt")
+        reviews.append({
+            "author": _clean(author.get_text(" ")) if author else DEFAULT_AUTHOR,
+            "text": text,
+            "rating": rating,
+            "date": _clean(date_el.get_text(" ")) if date_el else ""
+        })
+    return reviews, business_name
+
+
+def _find_review_list(payload):
+    """The review JSON has changed shape over time; look for the first list of comment dicts."""
+    if isinstance(payload, list):
+        if payload and isinstance(payload[0], dict) and ("comment" in payload[0] or "text" in payload[0]):
+            return payload
+        return None
+    if isinstance(payload, dict):
+        for key in ("productReviews", "reviews", "content", "result", "data"):
+            if key in payload:
+                found = _find_review_list(payload[key])
+                if found is not None:
+                    return found
+    return None
+
+
+def _find_total_pages(payload):
+    if isinstance(payload, dict):
+        if "totalPages" in payload:
+            return int(payload["totalPages"] or 0)
+        for value in payload.values():
+            pages = _find_total_pages(value)
+            if pages:
+                return pages
+    return 0
+
+
+def parse_review_json(payload):
+    reviews = []
+    for item in _find_review_list(payload) or []:
+        text = _clean(item.get("comment") or item.get("text"))
+        if len(text) < 3:
+            continue
+        reviews.append({
+            "author": _clean(item.get("userFullName") or item.get("author")) or DEFAULT_AUTHOR,
+            "text": text,
+            "rating": int(item.get("rate") or item.get("rating") or 5),
+            "date": _clean(item.get("commentDateISOtype") or item.get("lastModifiedDate") or item.get("date"))
+        })
+    return reviews, _find_total_pages(payload)
+
+
+class HttpBackend(ScraperBackend):
+    """
+    Browserless scraper: one HTML request for the product name and any
+    server-rendered cards, then the review JSON pages fetched concurrently over
+    a pooled requests.Session.
+    """
+    name = "http"
+
+    def __init__(self, api_template=None, page_size=30, concurrency=4, timeout=10):
+        self.api_template = api_template or REVIEWS_API_TEMPLATE
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._session = _build_session(concurrency)
+
+    def _get(self, url, **kwargs):
+        # Under a request deadline a slow page cannot hold the scrape past its cutoff
+        response = self._session.get(url, timeout=deadlines.clamp(self.timeout, "scrape"), **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _fetch_page(self, content_id, page):
+        url = self.api_template.format(content_id=content_id, page=page, page_size=self.page_size)
+        with telemetry.span("http_page", page=page) as span:
+            reviews, total_pages = parse_review_json(self._get(url, headers={"Accept": "application/json"}).json())
+            span["reviews"] = len(reviews)
+        return reviews, total_pages
+
+    def _stream_pages(self, content_id, pages_needed, fresh, business_name, done):
+        """
+        Pages 1..pages_needed-1 with at most `concurrency` requests ahead of the
+        consumer, yielded in page order. Stopping early (or closing the
+        generator) leaves the remaining pages unfetched.
+        """
+        pages = iter(range(1, pages_needed))
+        fetch = telemetry.bind(self._fetch_page)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            pending = deque(pool.submit(fetch, content_id, p) for p in islice(pages, self.concurrency))
+            try:
+                while pending:
+                    page_reviews, _ = pending.popleft().result()
+                    yield fresh(page_reviews), business_name
+                    if done():
+                        break
+                    for p in islice(pages, 1):
+                        pending.append(pool.submit(fetch, content_id, p))
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def stream(self, url, max_reviews=100, should_stop=None, stats=None):
+        started = time.monotonic()
+        target_url = reviews_page_url(url)
+        business_name = DEFAULT_BUSINESS_NAME
+        seen = set()
+
+        def fresh(reviews):
+            out = []
+            for review in reviews:
+                if review["text"] in seen or len(seen) >= max_reviews:
+                    continue
+                seen.add(review["text"])
+                out.append(review)
+            return out
+
+        try:
+            try:
+                telemetry.log(f"[http] Fetching: {target_url}")
+                with telemetry.span("http_html") as span:
+                    html_reviews, name = parse_review_cards(self._get(target_url).text)
+                    span["reviews"] = len(html_reviews)
+                business_name = name or business_name
+                yield fresh(html_reviews), business_name
+            except Exception as e:
+                telemetry.log(f"[http] Review page fetch failed: {e}")
+
+            content_id = product_content_id(url)
+            if content_id and len(seen) < max_reviews:
+                try:
+                    first_page, total_pages = self._fetch_page(content_id, 0)
+                    yield fresh(first_page), business_name
+                    pages_needed = min(total_pages, -(-max_reviews // self.page_size)) if total_pages else 0
+                    if pages_needed > 1 and len(seen) < max_reviews and not (should_stop and should_stop()):
+                        yield from self._stream_pages(content_id, pages_needed, fresh, business_name,
+                                                      lambda: len(seen) >= max_reviews or (should_stop and should_stop()))
+                except Exception as e:
+                    telemetry.log(f"[http] Review API failed: {e}")
+        finally:
+            telemetry.log(f"[http] Collected {len(seen)} reviews")
+            if stats is not None:
+                stats["elapsed_s"] = round(time.monotonic() - started, 3)
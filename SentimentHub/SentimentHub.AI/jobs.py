@@ -0,0 +1,188 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+import telemetry
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+class JobCancelled(Exception):
+    """Raised inside the pipeline when the job was cancelled by the caller."""
+
+
+class Job:
+    """
+    A single scrape -> analyze -> summarize run.
+    The pipeline reports into it via update() and polls check_cancelled().
+    """
+
+    def __init__(self, url, limit, options=None):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.limit = limit
+        self.options = options or {}
+        self.status = QUEUED
+        self.stage = QUEUED
+        self.progress = 0.0
+        self.partial = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def update(self, stage=None, progress=None, **partial):
+        with self._lock:
+            if stage:
+                self.stage = stage
+            if progress is not None:
+                self.progress = round(max(self.progress, min(progress, 1.0)), 3)
+            self.partial.update(partial)
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} cancelled")
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "url": self.url,
+                "limit": self.limit,
+                "options": dict(self.options),
+                "status": self.status,
+                "stage": self.stage,
+                "progress": self.progress,
+                "partial": dict(self.partial),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class JobManager:
+    """
+    Runs analysis jobs on a bounded worker pool.
+    Identical in-flight requests (same URL + limit) share one job instead of
+    starting another browser.
+    """
+
+    def __init__(self, runner, max_workers=2, max_finished=200):
+        self._runner = runner
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        self._max_finished = max_finished
+        self._jobs = {}
+        self._inflight = {}  # dedupe key -> job id
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _dedupe_key(url, limit, options=None):
+        # Scheme and host are case-insensitive, path and query are not; the
+        # fragment never reaches the server
+        parts = urlsplit(url.strip())
+        url = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+        return (url, int(limit), tuple(sorted((k, repr(v)) for k, v in (options or {}).items())))
+
+    def submit(self, url, limit, **options):
+        """
+        Returns (job, deduplicated). Extra keyword options are passed through to
+        the runner and are part of the dedupe key.
+        """
+        options = {k: v for k, v in options.items() if v is not None}
+        key = self._dedupe_key(url, limit, options)
+        with self._lock:
+            existing_id = self._inflight.get(key)
+            if existing_id:
+                existing = self._jobs.get(existing_id)
+                if existing and existing.status in ACTIVE_STATES and not existing.cancelled:
+                    return existing, True
+
+            job = Job(url, limit, options)
+            self._jobs[job.id] = job
+            self._inflight[key] = job.id
+            self._prune()
+            job.future = self._executor.submit(self._run, job, key)
+        return job, False
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if not job:
+            return None
+        job.cancel()
+        # Still waiting for a worker: drop it from the queue right away
+        if job.future and job.future.cancel():
+            self._finish(job, CANCELLED)
+        return job
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _run(self, job, key):
+        if job.cancelled:
+            self._finish(job, CANCELLED, key)
+            return
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            result = self._runner(job.url, job.limit, job=job, **job.options)
+            job.result = result
+            job.update(stage=COMPLETED, progress=1.0)
+            self._finish(job, COMPLETED, key)
+        except JobCancelled:
+            telemetry.log(f"Job cancelled during '{job.stage}'", request_id=job.id)
+            self._finish(job, CANCELLED, key)
+        except Exception as e:
+            telemetry.log(f"Job failed: {e}", request_id=job.id)
+            job.error = str(e)
+            self._finish(job, FAILED, key)
+
+    def _finish(self, job, status, key=None):
+        job.status = status
+        if status != COMPLETED:
+            job.stage = status
+        job.finished_at = time.time()
+        key = key or self._dedupe_key(job.url, job.limit, job.options)
+        with self._lock:
+            if self._inflight.get(key) == job.id:
+                del self._inflight[key]
+
+    def _prune(self):
+        # Keep memory bounded: forget the oldest finished jobs
+        finished = [j for j in self._jobs.values() if j.status not in ACTIVE_STATES]
+        overflow = len(finished) - self._max_finished
+        if overflow > 0:
+            finished.sort(key=lambda j: j.finished_at or j.created_at)
+            for j in finished[:overflow]:
+                del self._jobs[j.id]
+
+    def shutdown(self):
+        for job in self.list():
+            job.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
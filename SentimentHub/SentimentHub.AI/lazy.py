@@ -0,0 +1,66 @@
+import threading
+import time
+import telemetry
+
+
+class LazyResource:
+    """
+    Thread-safe, load-once wrapper for expensive optional dependencies
+    (SDK imports, model weights). A failed load is remembered so every request
+    does not pay for it again; reset() allows another attempt.
+    """
+
+    def __init__(self, name, factory):
+        self.name = name
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._value = None
+        self._attempted = False
+        self.error = None
+        self.load_seconds = None
+
+    def get(self):
+        if self._attempted:
+            return self._value
+        with self._lock:
+            if not self._attempted:
+                started = time.perf_counter()
+                try:
+                    self._value = self._factory()
+                    telemetry.log(f"Loaded {self.name} in {time.perf_counter() - started:.2f}s")
+                except Exception as e:
+                    self.error = str(e)
+                    telemetry.log(f"{self.name} unavailable: {e}")
+                self.load_seconds = round(time.perf_counter() - started, 3)
+                self._attempted = True
+        return self._value
+
+    def get_nowait(self):
+        """
+        The value if it is already loaded, else None right away; a load that
+        has not been attempted yet is started in the background.
+        """
+        if self._attempted:
+            return self._value
+        if self._lock.acquire(blocking=False):
+            self._lock.release()
+            threading.Thread(target=self.get, daemon=True, name=f"load {self.name}").start()
+        return None
+
+    @property
+    def loaded(self):
+        return self._attempted and self._value is not None
+
+    def reset(self):
+        with self._lock:
+            self._value = None
+            self._attempted = False
+            self.error = None
+
+    def status(self):
+        return {
+            "loaded": self.loaded,
+            "attempted": self._attempted,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+        }
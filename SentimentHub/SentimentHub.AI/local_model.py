@@ -0,0 +1,128 @@
+import os
+import threading
+
+LABEL_MAP = {
+    "positive": "Positive",
+    "negative": "Negative",
+    "neutral": "Neutral"
+}
+
+
+def window_step(max_length, special_tokens, stride):
+    """
+    (window body, step) in tokens for reviews split into overlapping windows.
+    Raises ValueError when the windows would not advance (step <= 0), e.g.
+    LOCAL_MODEL_MAX_TOKENS too small for the stride plus special tokens.
+    """
+    body = max_length - special_tokens
+    step = body - stride
+    if step <= 0:
+        raise ValueError(f"max_length {max_length} leaves {body} tokens per window after {special_tokens} special "
+                         f"tokens, not more than the stride {stride}; use at least {special_tokens + stride + 1}")
+    return body, step
+
+
+class LocalSentimentEngine:
+    """
+    Batched CPU inference around a HuggingFace sequence classifier.
+
+    - inputs are tokenized once, sorted by length and padded per batch only to
+      the longest member (dynamic padding)
+    - truncation is by tokens, not characters; reviews longer than the model
+      limit are split into overlapping windows whose probabilities are
+      averaged (weighted by window length)
+    - backend "torch" (fp32), "int8" (dynamic quantization of Linear layers)
+      or "onnx" (ONNX Runtime via optimum, if installed)
+    """
+
+    def __init__(self, model_name, batch_size=16, max_length=512, stride=64, backend="torch"):
+        import torch
+        from transformers import AutoTokenizer
+
+        self.torch = torch
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.stride = stride
+        self.backend = backend
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        # BERT-style [CLS] ... [SEP] framing (falls back to BOS/EOS tokenizers)
+        tok = self.tokenizer
+        self._prefix = [t for t in (tok.cls_token_id if tok.cls_token_id is not None else tok.bos_token_id,) if t is not None]
+        self._suffix = [t for t in (tok.sep_token_id if tok.sep_token_id is not None else tok.eos_token_id,) if t is not None]
+        # Checked before the weights load, so a bad config fails fast
+        self._body, self._step = window_step(max_length, len(self._prefix) + len(self._suffix), stride)
+        self.model = self._load_model(model_name, backend)
+        self.id2label = {int(k): v.lower() for k, v in self.model.config.id2label.items()}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _load_model(model_name, backend):
+        if backend == "onnx":
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+            return ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+
+        import torch
+        from transformers import AutoModelForSequenceClassification
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        model.eval()
+        if backend == "int8":
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+
+    def _windows(self, ids):
+        """Splits token ids (without special tokens) into model-sized windows."""
+        body, step = self._body, self._step
+        if len(ids) <= body:
+            return [ids]
+        return [ids[start:start + body] for start in range(0, max(len(ids) - self.stride, 1), step)]
+
+    def predict(self, texts):
+        """Returns [{"sentiment", "score"}] aligned with `texts`."""
+        if not texts:
+            return []
+
+        encoded = self.tokenizer(list(texts), add_special_tokens=False, truncation=False)["input_ids"]
+        chunks = []  # (text index, token ids)
+        for idx, ids in enumerate(encoded):
+            for window in self._windows(ids):
+                chunks.append((idx, self._prefix + window + self._suffix))
+
+        # Length-sorted batches keep padding (and wasted compute) minimal
+        order = sorted(range(len(chunks)), key=lambda i: len(chunks[i][1]))
+        probs = [None] * len(chunks)
+        with self._lock, self.torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                batch_ids = order[start:start + self.batch_size]
+                batch = self.tokenizer.pad({"input_ids": [chunks[i][1] for i in batch_ids]},
+                                           padding=True, return_tensors="pt")
+                logits = self.model(**batch).logits
+                for row, i in zip(logits.softmax(dim=-1).tolist(), batch_ids):
+                    probs[i] = row
+
+        # Aggregate windows back to reviews, weighted by window length
+        totals = [None] * len(texts)
+        weights = [0] * len(texts)
+        for (idx, ids), row in zip(chunks, probs):
+            w = len(ids)
+            totals[idx] = [w * p for p in row] if totals[idx] is None else [t + w * p for t, p in zip(totals[idx], row)]
+            weights[idx] += w
+
+        results = []
+        for total, weight in zip(totals, weights):
+            avg = [t / weight for t in total]
+            best = max(range(len(avg)), key=avg.__getitem__)
+            results.append({
+                "sentiment": LABEL_MAP.get(self.id2label.get(best, ""), "Neutral"),
+                "score": float(avg[best])
+            })
+        return results
+
+
+def engine_from_env(model_name):
+    return LocalSentimentEngine(
+        model_name,
+        batch_size=int(os.getenv("LOCAL_MODEL_BATCH_SIZE", "16")),
+        max_length=int(os.getenv("LOCAL_MODEL_MAX_TOKENS", "512")),
+        backend=os.getenv("LOCAL_MODEL_BACKEND", "torch"),
+    )
@@ -1,20 +1,55 @@
-from fastapi import FastAPI, HTTPException
+from dotenv import load_dotenv
+load_dotenv() # Before the service modules read their settings
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from contextlib import closing
+from jobs import JobManager, JobCancelled
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+import aggregates
+import comparison
+import deadlines
+import dedup
+import dispatcher
+import result_cache
+import driver_pool
 import scraper
 import sentiment
+import snapshots
+import summary
+import telemetry
 import uvicorn
 
+try:
+    import orjson
+except ImportError: # optional; responses fall back to the json module
+    orjson = None
+
 app = FastAPI(title="SentimentHub AI Service")
+app.add_middleware(telemetry.TraceMiddleware)
 
 class AnalyzeRequest(BaseModel):
     url: str
     limit: int = 50
+    backend: Optional[str] = None # "selenium", "http" or "auto"; defaults to SCRAPER_BACKEND
+    incremental: bool = False # scrape only reviews newer than the stored snapshot
+    mode: str = "full" # "full", "compact" (aggregates + projected reviews) or "aggregate" (no reviews)
+    fields: Optional[List[str]] = None # ReviewResult fields to return per review (compact default: COMPACT_FIELDS)
+    deadline_ms: Optional[int] = None # best answer within this budget instead of all or nothing (see deadlines.py)
 
 class AspectResult(BaseModel):
     aspect: str
     sentiment: str
     confidence: float
+    spans: Optional[List[List[int]]] = None # [start, end) offsets in the review text (lexicon aspects)
 
 class ReviewResult(BaseModel):
     author: str
@@ -24,110 +59,895 @@ class ReviewResult(BaseModel):
     sentiment: str
     confidence: float
     aspects: List[AspectResult]
+    cluster_id: Optional[int] = None # shared by near-duplicate reviews; they share one analysis
+    tier: Optional[str] = None # "llm", "local" or "placeholder" (no model answered; neutral stand-in)
 
 class SummaryResult(BaseModel):
     strengths: List[str]
     weaknesses: List[str]
     advice: List[str]
 
+class DeadlineReport(BaseModel):
+    deadline_ms: int
+    elapsed_ms: int
+    met: bool
+    scrape: str # "complete", or "partial" when the scrape cutoff passed before `limit` reviews
+    reviews: Dict[str, int] # analyzed reviews per tier ("llm", "local", "placeholder"); only the new ones when incremental
+    summary: Optional[str] = None # "llm", "keyword" or (incremental, nothing new) "snapshot"
+
 class AnalyzeResponse(BaseModel):
     reviews: List[ReviewResult]
     total_reviews: int
     overall_sentiment_score: float
     business_name: Optional[str] = None
     summary: Optional[SummaryResult] = None
+    new_reviews: Optional[int] = None # incremental runs: reviews added since the last snapshot
+    deadline: Optional[DeadlineReport] = None # requests with deadline_ms: which tier each part came from
+
+class AspectAggregate(BaseModel):
+    aspect: str
+    mentions: int
+    positive: int
+    negative: int
+    neutral: int
+    mean_confidence: float
+
+class PeriodScore(BaseModel):
+    period: str # "YYYY-MM"
+    reviews: int
+    score: float
+
+class Aggregates(BaseModel):
+    sentiment_distribution: Dict[str, int]
+    mean_confidence: float
+    aspects: List[AspectAggregate]
+    rating_histogram: Dict[str, int] # "1".."5" -> reviews
+    average_rating: Optional[float] = None
+    score_over_time: List[PeriodScore]
+    undated_reviews: int
+
+class ShapedAnalyzeResponse(AnalyzeResponse):
+    """/analyze body for mode "compact"/"aggregate" or when `fields` is given."""
+    reviews: Optional[List[Dict[str, Any]]] = None # only the requested fields; absent in "aggregate" mode
+    aggregates: Optional[Aggregates] = None # absent in mode "full"
+
+class BatchAnalyzeRequest(BaseModel):
+    urls: List[str]
+    limit: int = 50 # per product
+    backend: Optional[str] = None
+    incremental: bool = False
+    deadline_ms: Optional[int] = None # shared by all products, counted from the request
+
+class ProductAnalysis(BaseModel):
+    url: str
+    result: Optional[AnalyzeResponse] = None
+    error: Optional[str] = None
+    elapsed_s: float
+
+class ProductOverview(BaseModel):
+    business_name: Optional[str] = None
+    total_reviews: int
+    overall_sentiment_score: float
+    positive_rate: float
+    negative_rate: float
+
+class AspectStats(BaseModel):
+    mentions: int
+    positive: int
+    negative: int
+    neutral: int
+    score: float
+
+class AspectComparison(BaseModel):
+    aspect: str
+    products: Dict[str, AspectStats] # keyed by product URL
+    best: Optional[str] = None
+
+class ComparisonResult(BaseModel):
+    overview: Dict[str, ProductOverview]
+    aspects: List[AspectComparison]
+    best_overall: Optional[str] = None
+
+class BatchAnalyzeResponse(BaseModel):
+    products: List[ProductAnalysis]
+    comparison: ComparisonResult
+    elapsed_s: float
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+    deduplicated: bool = False
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    url: str
+    limit: int
+    options: Dict[str, Any] = {}
+    status: str
+    stage: str
+    progress: float
+    partial: Dict[str, Any] = {}
+    result: Optional[AnalyzeResponse] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+def _report(job, stage, progress=None, **partial):
+    if job is None:
+        return
+    job.check_cancelled()
+    job.update(stage=stage, progress=progress, **partial)
+
+SENTIMENT_POINTS = aggregates.SENTIMENT_POINTS
+
+def _to_review_result(r, api_res, fallback_res) -> ReviewResult:
+    """Builds the response row from an API result, or the local-model fallback when there is none."""
+    if api_res:
+        tier = "llm"
+        final_sentiment = api_res.get('sentiment', 'Neutral')
+        final_score = float(api_res.get('score', 0.8))
+        raw_aspects = api_res.get('aspects', [])
+        aspects_obj = []
+        for a in raw_aspects:
+            aspects_obj.append(AspectResult(
+                aspect=str(a.get('aspect') or a.get('feature') or "General"),
+                sentiment=str(a.get('sentiment') or final_sentiment),
+                confidence=float(a.get('score') or a.get('confidence') or 0.8)
+            ))
+    else:
+        sent_res = fallback_res or sentiment.NEUTRAL_RESULT
+        tier = "placeholder" if sent_res.get('placeholder') else "local"
+        final_sentiment = sent_res['sentiment']
+        final_score = float(sent_res['score'])
+        aspects_obj = [AspectResult(**a) for a in sent_res.get('aspects', [])]
+
+    return ReviewResult(
+        author=r['author'],
+        text=r['text'],
+        rating=r['rating'],
+        date=r['date'],
+        sentiment=final_sentiment,
+        confidence=final_score,
+        aspects=aspects_obj,
+        tier=tier
+    )
+
+def _dedup_and_lookup(texts):
+    """Near-duplicate clusters, and cached API results for their representatives."""
+    with telemetry.span("dedup") as span:
+        clusters = dedup.cluster_texts(texts)
+        span.update(clusters.stats())
+    telemetry.REVIEWS.inc(span["duplicates"], source="duplicate")
+    with telemetry.span("cache_lookup", reviews=len(clusters.representatives)) as span:
+        cached = sentiment.cached_api_results(clusters.representatives)
+        span["hits"] = len(cached)
+    telemetry.REVIEWS.inc(len(cached), source="cache")
+    return clusters, cached
 
-@app.post("/analyze", response_model=AnalyzeResponse)
-def analyze_param_url(request: AnalyzeRequest):
+def _local_fallback(texts):
+    """{text: result} from the local model, in one batched call."""
+    with telemetry.span("local_fallback", reviews=len(texts)):
+        results = dict(zip(texts, sentiment.analyze_local_batch(texts)))
+    telemetry.REVIEWS.inc(len(texts), source="local")
+    return results
+
+def _review_results(raw_reviews, clusters, analyzed, fallback_map) -> List[ReviewResult]:
+    """Response rows in scrape order; near-duplicates take their representative's result."""
+    results = []
+    for r in raw_reviews:
+        rep = clusters.representative.get(r['text'], r['text'])
+        review = _to_review_result(r, analyzed.get(rep), fallback_map.get(rep))
+        review.cluster_id = clusters.cluster_id.get(r['text'])
+        if rep != r['text']:
+            for a in review.aspects:
+                a.spans = None # offsets point into the representative's text
+        results.append(review)
+    return results
+
+def _summary_result(raw_summary) -> Optional[SummaryResult]:
+    if not raw_summary:
+        return None
+    return SummaryResult(
+        strengths=raw_summary.get('strengths', []),
+        weaknesses=raw_summary.get('weaknesses', []),
+        advice=raw_summary.get('advice', [])
+    )
+
+def _should_stop(job):
+    """Scraper stop check: the job was cancelled or the request deadline's scrape cutoff passed."""
+    return lambda: (job is not None and job.cancelled) or deadlines.expired("scrape")
+
+def _scrape_tier(scraped, limit):
+    return "partial" if scraped < limit and deadlines.expired("scrape") else "complete"
+
+def _deadline_report(scrape_tier, results, summary_tier) -> Optional[DeadlineReport]:
+    deadline = deadlines.current()
+    if deadline is None:
+        return None
+    tiers = {}
+    for r in results:
+        if r.tier:
+            tiers[r.tier] = tiers.get(r.tier, 0) + 1
+    elapsed_ms = deadline.elapsed_ms()
+    telemetry.log(f"Deadline {deadline.budget_ms}ms: answered in {elapsed_ms}ms, scrape {scrape_tier}, "
+                  f"reviews {tiers}, summary {summary_tier}")
+    return DeadlineReport(deadline_ms=deadline.budget_ms, elapsed_ms=elapsed_ms, met=elapsed_ms <= deadline.budget_ms,
+                          scrape=scrape_tier, reviews=tiers, summary=summary_tier)
+
+def _dispatch_llm_batches(pending_texts, batch_stats, job=None):
+    """
+    Sends reviews to the LLM in batches sized by estimated tokens against the
+    provider's prompt/answer budgets. Batches run concurrently on the
+    dispatcher pool (per-provider limits apply inside sentiment) and are
+    mapped back by batch index. Returns {text: result} for what came back;
+    batches still unfinished at the deadline's LLM cutoff are dropped.
+    """
+    analyzed = {}
+    batches = [[pending_texts[i] for i in plan] for plan in sentiment.plan_api_batches(pending_texts)]
+    if batches and not deadlines.llm_window_open():
+        telemetry.log(f"Deadline: no time for the LLM, {len(pending_texts)} reviews go to the local model")
+        batches = []
+    analyze_batch = telemetry.bind(sentiment.analyze_sentiment_with_api)
+    executor = dispatcher.get_executor()
+    futures = {executor.submit(analyze_batch, batch, batch_stats): idx
+               for idx, batch in enumerate(batches)}
+    batch_results = [None] * len(batches)
+    try:
+        # Without a deadline the timeout is None and every batch is waited for
+        for batches_done, future in enumerate(as_completed(futures, timeout=deadlines.remaining("llm")), 1):
+            idx = futures[future]
+            try:
+                batch_results[idx] = future.result()
+            except Exception as e:
+                telemetry.log(f"Detail API batch {idx} failed: {e}")
+            _report(job, "analyzing", 0.4 + 0.45 * batches_done / len(batches),
+                    batches_done=batches_done, batches_total=len(batches))
+    except JobCancelled:
+        for f in futures:
+            f.cancel()
+        raise
+    except TimeoutError:
+        # Running calls end at the LLM cutoff on their own (clamped timeouts)
+        # and still fill the result cache; queued ones are dropped
+        late = [f for f in futures if not f.done()]
+        for f in late:
+            f.cancel()
+        telemetry.log(f"Deadline: {len(late)} of {len(batches)} LLM batches unfinished, "
+                      f"their reviews go to the local model")
+
+    for batch, api_responses in zip(batches, batch_results):
+        if api_responses and isinstance(api_responses, list):
+            for j, res in enumerate(api_responses):
+                if j < len(batch) and res:
+                    analyzed[batch[j]] = res
+    return analyzed
+
+def run_analysis(url: str, limit: int, job=None, backend: Optional[str] = None, incremental: bool = False,
+                 deadline_ms: Optional[int] = None) -> AnalyzeResponse:
+    """
+    Full scrape -> analyze -> summarize pipeline.
+    When called from the job worker, `job` receives stage/progress updates and
+    is polled for cancellation between steps.
+    With `incremental`, a product that already has a snapshot is only
+    scraped up to the reviews it knows (see run_incremental_analysis).
+    With `deadline_ms`, each stage steps down instead of overrunning: the
+    scrape stops early (fewer reviews), unfinished LLM batches go to the local
+    model and an unfinished summary becomes the keyword summary. The
+    response's `deadline` field tells which tier each part came from.
+    """
+    with deadlines.scope(deadline_ms):
+        if incremental and snapshots.get_store().get_product(url):
+            return run_incremental_analysis(url, limit, job=job, backend=backend)
+        return _run_full_analysis(url, limit, job=job, backend=backend)
+
+def _run_full_analysis(url: str, limit: int, job=None, backend: Optional[str] = None) -> AnalyzeResponse:
+    # Scrape
+    telemetry.log(f"Scraping {url} with limit {limit}")
+    _report(job, "scraping", 0.05)
+    scrape_stats = {}
+    with telemetry.span("scrape", limit=limit) as span:
+        raw_reviews, business_name = scraper.scrape_trendyol_reviews(url, limit, should_stop=_should_stop(job), backend=backend, stats=scrape_stats)
+        span.update(reviews=len(raw_reviews), backend=scrape_stats.get("backend"))
+    scrape_tier = _scrape_tier(len(raw_reviews), limit)
+    _report(job, "analyzing", 0.4, business_name=business_name, reviews_scraped=len(raw_reviews), scrape_stats=scrape_stats)
+
+    results = []
+    total_score = 0
+
+    # Analyze
+    review_texts = [r['text'] for r in raw_reviews if r['text']]
+    analyzed_results_map = {}
+
+    executor = dispatcher.get_executor()
+
+    # 2. Executive Summary only needs the raw texts, so it runs alongside the detail batches
+    summary_future = None
+    summary_stats = {}
+    if review_texts:
+        telemetry.log("Generating Executive Summary...")
+        summary_future = executor.submit(telemetry.bind(sentiment.generate_business_summary), review_texts, summary_stats)
+
+    # 1. Detail Analysis: one representative per near-duplicate cluster, and
+    # only those without a cached result are sent out. Batches are dispatched
+    # concurrently (per-provider limits apply inside sentiment) and mapped
+    # back by batch index
+    clusters, cached = _dedup_and_lookup(review_texts)
+    dedup_stats = clusters.stats()
+    analyzed_results_map.update(cached)
+    cached_count = len(analyzed_results_map)
+    pending_texts = [t for t in clusters.representatives if t not in analyzed_results_map]
+    telemetry.log(f"{dedup_stats['duplicates']} near-duplicate reviews share a result, "
+          f"{cached_count} served from cache, {len(pending_texts)} to analyze")
+    batch_stats = []
     try:
-        # Scrape
-        print(f"Scraping {request.url} with limit {request.limit}")
-        raw_reviews, business_name = scraper.scrape_trendyol_reviews(request.url, request.limit)
-        
-        results = []
-        total_score = 0
-        
-        # Analyze
-        review_texts = [r['text'] for r in raw_reviews if r['text']]
-        analyzed_results_map = {} 
-        
-        # 1. Detail Analysis (Existing batch logic)
+        analyzed_results_map.update(_dispatch_llm_batches(pending_texts, batch_stats, job))
+    except JobCancelled:
+        if summary_future: summary_future.cancel()
+        raise
+
+    _report(job, "summarizing", 0.85, reviews_analyzed=len(analyzed_results_map),
+            reviews_cached=cached_count, llm_calls=batch_stats, dedup=dedup_stats)
+    strategic_summary = summary_tier = None
+    if summary_future:
+        try:
+            raw_summary = summary_future.result(timeout=deadlines.remaining("llm"))
+            summary_tier = "keyword" if summary_stats.get("mode") == "offline" else "llm"
+        except TimeoutError:
+            telemetry.log("Deadline: LLM summary unfinished, using the keyword summary")
+            raw_summary, summary_tier = summary.offline_summary(review_texts), "keyword"
+        except Exception as e:
+            telemetry.log(f"Executive Summary failed: {e}")
+            raw_summary = None
+        strategic_summary = _summary_result(raw_summary)
+
+    telemetry.log(f"Finalizing {len(raw_reviews)} reviews")
+    _report(job, "finalizing", 0.95, summary=strategic_summary, summary_stats=summary_stats)
+
+    # Local model fallback for everything the API did not cover, in one batched call
+    fallback_map = _local_fallback([t for t in clusters.representatives if t not in analyzed_results_map])
+
+    for review in _review_results(raw_reviews, clusters, analyzed_results_map, fallback_map):
+        total_score += SENTIMENT_POINTS.get(review.sentiment, 0.0)
+        results.append(review)
+
+    avg_score = total_score / len(results) if results else 0
+    with telemetry.span("snapshot_save", reviews=len(results)):
+        snapshots.get_store().save(url, business_name, [r.model_dump() for r in results],
+                                   summary=strategic_summary.model_dump() if strategic_summary else None)
+
+    return AnalyzeResponse(
+        reviews=results,
+        total_reviews=len(results),
+        overall_sentiment_score=avg_score,
+        business_name=business_name,
+        summary=strategic_summary,
+        deadline=_deadline_report(scrape_tier, results, summary_tier)
+    )
+
+# Streaming pipeline: reviews are analyzed in batches of STREAM_BATCH_SIZE while
+# scraping continues. At most STREAM_MAX_INFLIGHT batches are being analyzed and
+# as many scraped chunks are queued; beyond that the scraper blocks, so memory
+# does not grow with the number of reviews (only the texts are kept, for the
+# executive summary, which covers every review as in the non-streaming path).
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "20"))
+STREAM_MAX_INFLIGHT = int(os.getenv("STREAM_MAX_INFLIGHT", "4"))
+
+def _analyze_chunk(raw_reviews, batch_stats=None, job=None, parallel=False) -> List[ReviewResult]:
+    """
+    Dedup -> cache -> LLM -> local model for one slice of reviews. With
+    `parallel` the LLM batches go through the dispatcher pool; the stream
+    leaves it off because its chunks already run on that pool, and waiting on
+    the pool from inside it could starve it.
+    """
+    clusters, analyzed = _dedup_and_lookup([r['text'] for r in raw_reviews if r['text']])
+    texts = clusters.representatives
+    pending = [t for t in texts if t not in analyzed]
+    if parallel:
+        analyzed.update(_dispatch_llm_batches(pending, batch_stats, job))
+        pending = []
+    for plan in sentiment.plan_api_batches(pending):
+        if not deadlines.llm_window_open():
+            break # the rest goes to the local model
+        batch = [pending[i] for i in plan]
+        for text, res in zip(batch, sentiment.analyze_sentiment_with_api(batch, batch_stats) or []):
+            if res:
+                analyzed[text] = res
+    fallback_map = _local_fallback([t for t in texts if t not in analyzed])
+    return _review_results(raw_reviews, clusters, analyzed, fallback_map)
+
+_SCRAPE_DONE = object()
+
+def stream_analysis(url: str, limit: int, backend: Optional[str] = None):
+    """
+    Generator of events for /analyze/stream:
+      meta     {business_name}                      once the product name is known
+      reviews  {reviews}                            raw reviews as they are scraped
+      results  {reviews, aggregate}                 analyzed batch + running totals
+      scraped  {total_reviews, scrape_stats}        scraping finished
+      summary  {summary}                            executive summary
+      error    {detail}
+      done     {total_reviews, overall_sentiment_score, business_name, elapsed_s}
+    Closing the generator (client disconnect) stops the scraper and drops
+    pending batches.
+    """
+    started = time.monotonic()
+    stop = threading.Event()
+    chunks = queue.Queue(maxsize=STREAM_MAX_INFLIGHT)
+    scrape_stats = {}
+    scrape_errors = []
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
         try:
-            batch_size = 20
-            for i in range(0, len(review_texts), batch_size):
-                batch = review_texts[i:i+batch_size]
-                if not batch: continue
-                api_responses = sentiment.analyze_sentiment_with_api(batch)
-                if api_responses and isinstance(api_responses, list):
-                    for j, res in enumerate(api_responses):
-                        if j < len(batch):
-                            analyzed_results_map[batch[j]] = res
+            with closing(scraper.stream_trendyol_reviews(url, limit, should_stop=stop.is_set,
+                                                         backend=backend, stats=scrape_stats)) as stream:
+                for item in stream:
+                    # Blocks while the analysis side is behind (backpressure)
+                    if not put(item):
+                        break
         except Exception as e:
-            print(f"Detail API Analysis failed: {e}")
-
-        # 2. Executive Summary (New)
-        strategic_summary = None
-        if review_texts:
-             print("Generating Executive Summary...")
-             raw_summary = sentiment.generate_business_summary(review_texts)
-             if raw_summary:
-                 strategic_summary = SummaryResult(
-                     strengths=raw_summary.get('strengths', []),
-                     weaknesses=raw_summary.get('weaknesses', []),
-                     advice=raw_summary.get('advice', [])
-                 )
-
-        print(f"Finalizing {len(raw_reviews)} reviews")
-        
-        for r in raw_reviews:
-            # Check if we have API result
-            api_res = analyzed_results_map.get(r['text'])
-            
-            if api_res:
-                final_sentiment = api_res.get('sentiment', 'Neutral')
-                final_score = float(api_res.get('score', 0.8))
-                raw_aspects = api_res.get('aspects', [])
-                aspects_obj = []
-                for a in raw_aspects:
-                    aspects_obj.append(AspectResult(
-                        aspect=str(a.get('aspect') or a.get('feature') or "General"),
-                        sentiment=str(a.get('sentiment') or final_sentiment),
-                        confidence=float(a.get('score') or a.get('confidence') or 0.8)
-                    ))
+            telemetry.log(f"Streaming scrape failed: {e}")
+            scrape_errors.append(str(e))
+        finally:
+            put(_SCRAPE_DONE)
+
+    threading.Thread(target=telemetry.bind(produce), daemon=True, name="stream-scraper").start()
+    executor = dispatcher.get_executor()
+    analyze_chunk = telemetry.bind(_analyze_chunk)
+    inflight = set()
+    buffer, review_texts = [], []
+    business_name = None
+    summary_future = None
+    summary_sent = False
+    scraping = True
+    scraped = analyzed = 0
+    total_score = 0.0
+    sentiment_counts = {}
+
+    try:
+        while True:
+            for future in [f for f in inflight if f.done()]:
+                inflight.discard(future)
+                try:
+                    batch = future.result()
+                except Exception as e:
+                    telemetry.log(f"Streaming batch failed: {e}")
+                    yield "error", {"detail": str(e)}
+                    continue
+                for review in batch:
+                    total_score += SENTIMENT_POINTS.get(review.sentiment, 0.0)
+                    sentiment_counts[review.sentiment] = sentiment_counts.get(review.sentiment, 0) + 1
+                analyzed += len(batch)
+                yield "results", {
+                    "reviews": [review.model_dump() for review in batch],
+                    "aggregate": {
+                        "reviews_analyzed": analyzed,
+                        "reviews_scraped": scraped,
+                        "overall_sentiment_score": total_score / analyzed if analyzed else 0,
+                        "sentiment_counts": dict(sentiment_counts),
+                    },
+                }
+
+            if summary_future and not summary_sent and summary_future.done():
+                summary_sent = True
+                yield "summary", {"summary": _stream_summary(summary_future)}
+
+            if not scraping and not buffer and not inflight:
+                break
+
+            if buffer and len(inflight) < STREAM_MAX_INFLIGHT and (len(buffer) >= STREAM_BATCH_SIZE or not scraping):
+                batch, buffer = buffer[:STREAM_BATCH_SIZE], buffer[STREAM_BATCH_SIZE:]
+                inflight.add(executor.submit(analyze_chunk, batch))
+                continue
+
+            if scraping and len(buffer) < STREAM_BATCH_SIZE:
+                try:
+                    item = chunks.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _SCRAPE_DONE:
+                    scraping = False
+                    for detail in scrape_errors:
+                        yield "error", {"detail": detail}
+                    yield "scraped", {"total_reviews": scraped, "scrape_stats": scrape_stats}
+                    if review_texts:
+                        summary_future = executor.submit(telemetry.bind(sentiment.generate_business_summary), review_texts)
+                    continue
+                reviews, name = item
+                if business_name is None:
+                    business_name = name
+                    yield "meta", {"business_name": business_name}
+                if not reviews:
+                    continue
+                scraped += len(reviews)
+                buffer.extend(reviews)
+                review_texts.extend(r['text'] for r in reviews)
+                yield "reviews", {"reviews": reviews}
             else:
-                sent_res = sentiment.analyze_sentiment(r['text'])
-                final_sentiment = sent_res['sentiment']
-                final_score = float(sent_res['score'])
-                aspects_obj = [] # Basic aspect removed for clarity on fallback
-
-            if final_sentiment == 'Positive':
-                 total_score += 1.0
-            elif final_sentiment == 'Neutral':
-                 total_score += 0.5
-            
-            results.append(ReviewResult(
-                author=r['author'],
-                text=r['text'],
-                rating=r['rating'],
-                date=r['date'],
-                sentiment=final_sentiment,
-                confidence=final_score,
-                aspects=aspects_obj
-            ))
-                        
-        avg_score = total_score / len(results) if results else 0
-        
-        return AnalyzeResponse(
-            reviews=results,
-            total_reviews=len(results),
-            overall_sentiment_score=avg_score,
-            business_name=business_name,
-            summary=strategic_summary
-        )
+                wait(inflight, timeout=0.5, return_when=FIRST_COMPLETED)
 
+        if summary_future and not summary_sent:
+            yield "summary", {"summary": _stream_summary(summary_future)}
+
+        yield "done", {
+            "total_reviews": analyzed,
+            "overall_sentiment_score": total_score / analyzed if analyzed else 0,
+            "business_name": business_name,
+            "elapsed_s": round(time.monotonic() - started, 3),
+        }
+    finally:
+        stop.set()
+        for future in list(inflight) + [summary_future]:
+            if future: future.cancel()
+
+def _stream_summary(future):
+    try:
+        summary = _summary_result(future.result())
     except Exception as e:
-        print(f"Error: {e}")
+        telemetry.log(f"Executive Summary failed: {e}")
+        return None
+    return summary.model_dump() if summary else None
+
+def _encode_ndjson(events):
+    for event, data in events:
+        yield json.dumps({"event": event, **data}, ensure_ascii=False) + "\n"
+
+def _encode_sse(events):
+    for event, data in events:
+        yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# Incremental refresh stops scraping after this many consecutive known reviews
+# (a few pinned/reordered reviews at the top should not end the scan early)
+INCREMENTAL_KNOWN_STREAK = int(os.getenv("INCREMENTAL_KNOWN_STREAK", "10"))
+
+def _upgradable_tiers():
+    """Stored result tiers a refresh analyzes again: placeholders, and local results once an LLM is configured."""
+    return {"placeholder", "local"} if sentiment.registry.configured() else {"placeholder"}
+
+def run_incremental_analysis(url: str, limit: int, job=None, backend: Optional[str] = None) -> AnalyzeResponse:
+    """
+    Refreshes a product from its snapshot: scrapes newest-first until
+    INCREMENTAL_KNOWN_STREAK known reviews in a row (or `limit` new ones),
+    analyzes the new reviews and the returned ones stored with a degraded
+    tier, then rebuilds aggregates and - when something changed - the
+    summary from the `limit` newest stored reviews, which are also what the
+    response returns.
+    """
+    store = snapshots.get_store()
+    known = store.known_hashes(url)
+    _report(job, "scraping", 0.05, incremental=True, known_reviews=len(known))
+    should_stop = _should_stop(job)
+    scrape_stats = {}
+    new_reviews, business_name, streak = [], None, 0
+    with telemetry.span("scrape", limit=limit, incremental=True) as span, \
+            closing(scraper.stream_trendyol_reviews(url, limit, should_stop=should_stop,
+                                                    backend=backend, stats=scrape_stats)) as stream:
+        for reviews, business_name in stream:
+            for r in reviews:
+                if snapshots.review_hash(r['text']) in known:
+                    streak += 1
+                else:
+                    streak = 0
+                    new_reviews.append(r)
+            if streak >= INCREMENTAL_KNOWN_STREAK or len(new_reviews) >= limit:
+                break
+        span.update(new_reviews=len(new_reviews), backend=scrape_stats.get("backend"))
+    new_reviews = new_reviews[:limit]
+    scrape_tier = "complete" if streak >= INCREMENTAL_KNOWN_STREAK else _scrape_tier(len(new_reviews), limit)
+    # Stored reviews a deadline or an outage left on a fallback tier are
+    # analyzed again (from their stored text) if they are still returned
+    upgradable = _upgradable_tiers()
+    retry = [r for r in store.reviews(url, max(limit - len(new_reviews), 0)) if r.get('tier') in upgradable]
+    telemetry.log(f"Incremental scrape of {url}: {len(new_reviews)} new reviews, {len(retry)} to upgrade")
+    _report(job, "analyzing", 0.4, business_name=business_name, new_reviews=len(new_reviews),
+            upgraded_reviews=len(retry), scrape_stats=scrape_stats)
+
+    batch_stats = []
+    pending = new_reviews + retry
+    analyzed = _analyze_chunk(pending, batch_stats, job, parallel=True) if pending else []
+    with telemetry.span("snapshot_save", reviews=len(analyzed)):
+        store.save(url, business_name, [r.model_dump() for r in analyzed])
+
+    product = store.get_product(url)
+    results = [ReviewResult(**r) for r in store.reviews(url, limit)]
+    raw_summary = product["summary"]
+    summary_tier = "snapshot" if raw_summary else None
+    if new_reviews or not raw_summary:
+        _report(job, "summarizing", 0.85, llm_calls=batch_stats)
+        summary_stats = {}
+        try:
+            raw_summary = sentiment.generate_business_summary([r.text for r in results], summary_stats)
+            summary_tier = "keyword" if summary_stats.get("mode") == "offline" else "llm"
+        except Exception as e:
+            telemetry.log(f"Executive Summary failed: {e}")
+        if raw_summary:
+            store.save(url, business_name, [], summary=raw_summary)
+
+    total_score = sum(SENTIMENT_POINTS.get(r.sentiment, 0.0) for r in results)
+    return AnalyzeResponse(
+        reviews=results,
+        total_reviews=len(results),
+        overall_sentiment_score=total_score / len(results) if results else 0,
+        business_name=business_name or product["business_name"],
+        summary=_summary_result(raw_summary),
+        new_reviews=len(new_reviews),
+        deadline=_deadline_report(scrape_tier, analyzed, summary_tier)
+    )
+
+def _run_job(url: str, limit: int, job=None, **options) -> AnalyzeResponse:
+    # Jobs outlive the request that submitted them: traced on their own, under the job id
+    with telemetry.trace("job", request_id=job.id if job else None):
+        return run_analysis(url, limit, job=job, **options)
+
+job_manager = JobManager(_run_job, max_workers=int(os.getenv("ANALYSIS_WORKERS", "2")))
+
+# /analyze/batch: products are scraped and analyzed side by side (browsers come
+# from the shared Chrome pool); their LLM batches go through the same
+# dispatcher limits and result cache as single-product requests.
+BATCH_MAX_URLS = int(os.getenv("BATCH_MAX_URLS", "10"))
+product_executor = ThreadPoolExecutor(max_workers=int(os.getenv("BATCH_PRODUCT_WORKERS", "4")),
+                                      thread_name_prefix="product")
+
+def _analyze_product(url, limit, backend, incremental=False):
+    started = time.monotonic()
+    try:
+        # Under a batch deadline the product inherits the request's (see deadlines.scope)
+        result, error = run_analysis(url, limit, backend=backend, incremental=incremental), None
+    except Exception as e:
+        telemetry.log(f"Batch analysis of {url} failed: {e}")
+        result, error = None, str(e)
+    return ProductAnalysis(url=url, result=result, error=error, elapsed_s=round(time.monotonic() - started, 3))
+
+def run_batch_analysis(urls: List[str], limit: int, backend: Optional[str] = None, incremental: bool = False,
+                       deadline_ms: Optional[int] = None) -> BatchAnalyzeResponse:
+    started = time.monotonic()
+    urls = list(dict.fromkeys(urls))
+    # Products are submitted and awaited inside the scope; each task is bound
+    # to this context, so every product runs under the batch's one deadline
+    with deadlines.scope(deadline_ms):
+        analyze_product = telemetry.bind(_analyze_product)
+        futures = [product_executor.submit(analyze_product, url, limit, backend, incremental) for url in urls]
+        products = [f.result() for f in futures]
+    compared = comparison.compare_products({p.url: p.result for p in products if p.result})
+    return BatchAnalyzeResponse(
+        products=products,
+        comparison=ComparisonResult(**compared),
+        elapsed_s=round(time.monotonic() - started, 3)
+    )
+
+# PRELOAD_MODELS=1 (all) or a comma list such as "local,gemini" loads backends
+# in the background after startup; the server accepts traffic immediately.
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "0")
+preload_done = threading.Event()
+
+def _preload_backends():
+    try:
+        names = None if PRELOAD_MODELS == "1" else [n.strip() for n in PRELOAD_MODELS.split(",") if n.strip()]
+        sentiment.warmup(names)
+    finally:
+        preload_done.set()
+
+@app.on_event("startup")
+def start_background_warmup():
+    if os.getenv("CHROME_POOL_PRELAUNCH", "1") == "1":
+        threading.Thread(target=driver_pool.get_pool().warm, daemon=True, name="chrome-warmup").start()
+    if PRELOAD_MODELS != "0":
+        threading.Thread(target=_preload_backends, daemon=True, name="model-preload").start()
+    else:
+        preload_done.set()
+
+@app.post("/warmup")
+def warmup(backends: Optional[str] = None):
+    """Loads backends synchronously, e.g. /warmup?backends=local,gemini."""
+    names = [n.strip() for n in backends.split(",")] if backends else None
+    unknown = [n for n in names or [] if n not in sentiment.BACKENDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown backends: {', '.join(unknown)}")
+    return {"backends": sentiment.warmup(names)}
+
+@app.get("/health")
+def health():
+    status = sentiment.backend_status()
+    return {
+        "status": "ok",
+        "ready": preload_done.is_set(),
+        "backends": status,
+        "loaded": [name for name, s in status.items() if s["loaded"]],
+        "chrome_pool": driver_pool.get_pool().metrics(),
+    }
+
+@app.on_event("shutdown")
+def shutdown_jobs():
+    job_manager.shutdown()
+    product_executor.shutdown(wait=False, cancel_futures=True)
+    driver_pool.get_pool().shutdown()
+
+@app.get("/providers")
+def provider_stats():
+    return sentiment.registry.stats()
+
+@app.get("/snapshots")
+def snapshot_stats():
+    return snapshots.get_store().stats()
+
+@app.delete("/snapshots")
+def delete_snapshot(url: str):
+    """Forgets a product so its next run is a full scrape."""
+    if not snapshots.get_store().delete(url):
+        raise HTTPException(status_code=404, detail="No snapshot for this product")
+    return {"deleted": snapshots.canonical_product_url(url)}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(telemetry.render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/traces")
+def list_traces():
+    """Most recent request/job traces (TRACE_HISTORY), newest first."""
+    return [t.summary() for t in reversed(telemetry.recent_traces())]
+
+@app.get("/traces/{request_id}")
+def get_trace(request_id: str):
+    trace = telemetry.find_trace(request_id)
+    if not trace:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace.to_dict()
+
+@app.get("/cache")
+def cache_stats():
+    return result_cache.get_cache().stats()
+
+@app.get("/scraper/pool")
+def driver_pool_metrics():
+    return driver_pool.get_pool().metrics()
+
+def _validate_request(request):
+    if request.backend and request.backend != "auto" and request.backend not in scraper.BACKENDS:
+        raise HTTPException(status_code=400, detail=f"Unknown scraper backend '{request.backend}'")
+    if request.deadline_ms is not None and request.deadline_ms <= 0:
+        raise HTTPException(status_code=400, detail="deadline_ms must be positive")
+
+# Response shaping. "full" keeps the original AnalyzeResponse body; "compact"
+# adds aggregates and cuts each review down to `fields`; "aggregate" drops
+# the per-review list altogether.
+RESPONSE_MODES = ("full", "compact", "aggregate")
+COMPACT_FIELDS = ("rating", "date", "sentiment", "confidence")
+# Bodies at least this large are gzipped for clients sending Accept-Encoding: gzip
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+
+def _validate_shape(mode, fields):
+    if mode not in RESPONSE_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown response mode '{mode}'")
+    unknown = [f for f in fields or () if f not in ReviewResult.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown review fields: {', '.join(unknown)}")
+
+def _shape_result(result: AnalyzeResponse, mode="full", fields=None) -> Dict[str, Any]:
+    if mode == "full" and not fields:
+        return result.model_dump()
+    payload = result.model_dump(exclude={"reviews"})
+    if mode != "full":
+        payload["aggregates"] = aggregates.compute_aggregates(result.reviews)
+    if mode != "aggregate":
+        include = set(fields or COMPACT_FIELDS)
+        payload["reviews"] = [review.model_dump(include=include) for review in result.reviews]
+    return payload
+
+def _accepts_gzip(accept_encoding):
+    for coding in accept_encoding.lower().split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+def _json_response(payload, http_request: Request) -> Response:
+    """orjson-encoded JSON (stdlib json without it), gzipped when the client accepts it."""
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= GZIP_MIN_BYTES and _accepts_gzip(http_request.headers.get("accept-encoding", "")):
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, media_type="application/json", headers=headers)
+
+# The route returns its own Response (orjson, gzip), so the model only documents the body
+@app.post("/analyze", response_model=Union[AnalyzeResponse, ShapedAnalyzeResponse])
+def analyze_param_url(request: AnalyzeRequest, http_request: Request):
+    """
+    mode="full" (default) returns every review as before; "compact" and
+    "aggregate" add server-side aggregates (sentiment distribution, aspect
+    counts, rating histogram, score per month) and return projected or no
+    reviews. `fields` picks the per-review fields in any mode.
+    """
+    _validate_request(request)
+    _validate_shape(request.mode, request.fields)
+    try:
+        result = run_analysis(request.url, request.limit, backend=request.backend, incremental=request.incremental,
+                              deadline_ms=request.deadline_ms)
+    except Exception as e:
+        telemetry.log(f"Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    with telemetry.span("serialize", mode=request.mode):
+        return _json_response(_shape_result(result, request.mode, request.fields), http_request)
+
+@app.post("/analyze/batch", response_model=BatchAnalyzeResponse)
+def analyze_batch(request: BatchAnalyzeRequest):
+    """Analyzes several products in parallel and compares them aspect by aspect."""
+    _validate_request(request)
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="No URLs given")
+    if len(request.urls) > BATCH_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_URLS} URLs per batch")
+    return run_batch_analysis(request.urls, request.limit, backend=request.backend, incremental=request.incremental,
+                              deadline_ms=request.deadline_ms)
+
+@app.post("/analyze/stream")
+def analyze_stream(request: AnalyzeRequest, http_request: Request, format: Optional[str] = None):
+    """
+    Same pipeline as /analyze, streamed as it runs. NDJSON by default;
+    Server-Sent Events with ?format=sse or "Accept: text/event-stream".
+    """
+    _validate_request(request)
+    if format is None:
+        format = "sse" if "text/event-stream" in http_request.headers.get("accept", "") else "ndjson"
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail=f"Unknown stream format '{format}'")
+    # Streams always run the full scrape and send every analyzed review as it
+    # arrives; options that would change that are refused rather than ignored
+    unsupported = [name for name, value in (("deadline_ms", request.deadline_ms is not None),
+                                            ("incremental", request.incremental),
+                                            ("mode", request.mode != "full"),
+                                            ("fields", request.fields is not None)) if value]
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"Not supported for streams: {', '.join(unsupported)}")
+    events = stream_analysis(request.url, request.limit, backend=request.backend)
+    if format == "sse":
+        return StreamingResponse(_encode_sse(events), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    return StreamingResponse(_encode_ndjson(events), media_type="application/x-ndjson")
+
+@app.post("/jobs", response_model=JobSubmitResponse, status_code=202)
+def submit_job(request: AnalyzeRequest):
+    _validate_request(request)
+    job, deduplicated = job_manager.submit(request.url, request.limit, backend=request.backend,
+                                           incremental=request.incremental or None,
+                                           deadline_ms=request.deadline_ms)
+    if deduplicated:
+        telemetry.log(f"Reusing in-flight job {job.id} for {request.url}")
+    return JobSubmitResponse(job_id=job.id, status=job.status, deduplicated=deduplicated)
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+def get_job(job_id: str, http_request: Request, mode: str = "full", fields: Optional[str] = None):
+    """`mode` and `fields` (comma list) shape the finished result as for /analyze."""
+    fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    _validate_shape(mode, fields)
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    status = JobStatusResponse(**job.to_dict())
+    payload = status.model_dump(mode="json", exclude={"result"})
+    payload["result"] = _shape_result(status.result, mode, fields) if status.result else None
+    return _json_response(payload, http_request)
+
+@app.delete("/jobs/{job_id}", response_model=JobStatusResponse)
+def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatusResponse(**job.to_dict())
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8001)
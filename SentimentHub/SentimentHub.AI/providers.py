@@ -0,0 +1,364 @@
+import json
+import os
+import threading
+import time
+import deadlines
+import dispatcher
+import telemetry
+from lazy import LazyResource
+
+# Bump when the classification prompts change so cached results are not reused
+PROMPT_VERSION = "2"
+
+# Per-request timeout so a hanging provider fails fast instead of stalling a batch
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+
+class ProviderUnavailable(Exception):
+    """Raised when a provider is not configured or its circuit is open."""
+
+
+class MalformedResponse(ValueError):
+    """The provider answered, but not with the JSON shape we asked for (often truncated output)."""
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; while open
+    calls are skipped. After `reset_timeout` one trial call is let through
+    (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return True
+            return self.state == "closed"
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """
+        A call ended without a verdict on the provider (cut off by the
+        caller's deadline). A half-open trial goes back to open with its old
+        timer, so the next caller gets the trial; nothing is counted.
+        """
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+
+
+class LLMProvider:
+    """
+    Long-lived client for one LLM API with a common classify_batch/summarize
+    interface, a circuit breaker and latency/error stats.
+    """
+    name = "base"
+    # Prompt/response token budgets used by batching.plan_batches
+    input_token_budget = 8000
+    output_token_budget = 2048
+
+    def __init__(self, api_key, model, base_url=None, input_token_budget=None, output_token_budget=None):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url
+        self.input_token_budget = input_token_budget or self.input_token_budget
+        self.output_token_budget = output_token_budget or self.output_token_budget
+        self.client = LazyResource(f"{self.name} client", self._build_client)
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "3")),
+            reset_timeout=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "60")),
+        )
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "errors": 0, "short_circuited": 0, "latency_total_s": 0.0, "latency_max_s": 0.0,
+                       "input_tokens": 0, "output_tokens": 0}
+        self.last_error = None
+
+    # Subclass hooks
+    def _build_client(self):
+        raise NotImplementedError
+
+    def complete(self, prompt):
+        """
+        Sends one prompt. Returns (raw JSON text, usage) where usage is
+        {"input_tokens", "output_tokens"} as reported by the API (may be empty).
+        """
+        raise NotImplementedError
+
+    def classify_prompt(self, texts):
+        raise NotImplementedError
+
+    def parse_classification(self, payload):
+        return payload
+
+    @property
+    def configured(self):
+        return bool(self.api_key) and self.client.get() is not None
+
+    def call(self, prompt):
+        if not self.configured:
+            raise ProviderUnavailable(f"{self.name} is not configured")
+        # Before allow(): a skipped call must not take the half-open trial
+        if deadlines.expired("llm"):
+            raise deadlines.DeadlineExceeded(f"{self.name} call skipped, request deadline reached")
+        if not self.breaker.allow():
+            with self._stats_lock:
+                self._stats["short_circuited"] += 1
+            telemetry.LLM_CALLS.inc(provider=self.name, outcome="short_circuited")
+            raise ProviderUnavailable(f"{self.name} circuit is open")
+
+        started = time.perf_counter()
+        try:
+            text, usage = dispatcher.call_with_retry(self.name, self.complete, prompt)
+        except Exception as e:
+            if isinstance(e, deadlines.DeadlineExceeded) or deadlines.expired("llm"):
+                # Cut off by the request's own deadline: not the provider's fault
+                self.breaker.release()
+                telemetry.LLM_CALLS.inc(provider=self.name, outcome="deadline")
+                if isinstance(e, deadlines.DeadlineExceeded):
+                    raise
+                raise deadlines.DeadlineExceeded(f"{self.name} call cut off by the request deadline") from e
+            self.breaker.record_failure()
+            self.last_error = str(e)
+            self._record(time.perf_counter() - started, ok=False)
+            raise
+        self.breaker.record_success()
+        self._record(time.perf_counter() - started, ok=True, usage=usage)
+        return text, usage
+
+    def _record(self, latency, ok, usage=None):
+        telemetry.LLM_CALLS.inc(provider=self.name, outcome="ok" if ok else "error")
+        for key, direction in (("input_tokens", "input"), ("output_tokens", "output")):
+            if (usage or {}).get(key):
+                telemetry.LLM_TOKENS.inc(usage[key], provider=self.name, direction=direction)
+        with self._stats_lock:
+            self._stats["calls"] += 1
+            self._stats["latency_total_s"] += latency
+            self._stats["latency_max_s"] = max(self._stats["latency_max_s"], latency)
+            if not ok:
+                self._stats["errors"] += 1
+            for key in ("input_tokens", "output_tokens"):
+                self._stats[key] += (usage or {}).get(key) or 0
+
+    def classify_batch(self, texts):
+        """Returns (results, usage). Raises MalformedResponse when the JSON is unusable."""
+        text, usage = self.call(self.classify_prompt(texts))
+        try:
+            results = self.parse_classification(json.loads(text))
+        except ValueError as e:
+            raise MalformedResponse(f"{self.name} returned invalid JSON: {e}") from e
+        if not isinstance(results, list):
+            raise MalformedResponse(f"{self.name} returned {type(results).__name__}, expected a list")
+        return results, usage
+
+    def summarize(self, prompt):
+        text, _ = self.call(prompt)
+        return json.loads(text)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        calls = stats["calls"]
+        stats["latency_avg_s"] = round(stats["latency_total_s"] / calls, 3) if calls else 0.0
+        stats["latency_total_s"] = round(stats["latency_total_s"], 3)
+        stats["latency_max_s"] = round(stats["latency_max_s"], 3)
+        stats.update({
+            "model": self.model,
+            "has_key": bool(self.api_key),
+            "circuit": self.breaker.state,
+            "last_error": self.last_error,
+        })
+        return stats
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+    input_token_budget = 12000
+    output_token_budget = 2048
+
+    def _build_client(self):
+        import google.generativeai as genai
+        options = {"api_key": self.api_key}
+        if self.base_url:
+            # Local fake servers only speak REST
+            options.update(transport="rest", client_options={"api_endpoint": self.base_url})
+        genai.configure(**options)
+        return genai.GenerativeModel(self.model)
+
+    def complete(self, prompt):
+        # retry=None: the SDK would otherwise retry 503s for minutes; call_with_retry owns retries
+        timeout = deadlines.clamp(LLM_TIMEOUT, "llm")
+        response = self.client.get().generate_content(prompt, request_options={"timeout": timeout, "retry": None})
+        meta = getattr(response, "usage_metadata", None)
+        usage = {
+            "input_tokens": getattr(meta, "prompt_token_count", None),
+            "output_tokens": getattr(meta, "candidates_token_count", None),
+        }
+        # Clean generic json markdown
+        return response.text.replace("```json", "").replace("```", "").strip(), usage
+
+    def classify_prompt(self, texts):
+        return """
+            Aşağıdaki ürün/hizmet yorumlarını detaylıca analiz et. Çıktı olarak SADECE geçerli bir JSON listesi ver.
+            Listedeki sıralamayı ve sayıyı bozma. Her yorum için şu yapıyı kullan:
+            {
+                "sentiment": "Positive" | "Negative" | "Neutral",
+                "score": 0.95, (0.0 ile 1.0 arası güven skoru)
+                "aspects": [
+                    {"aspect": "Kargo", "sentiment": "Positive", "confidence": 0.9},
+                    {"aspect": "Kalite", "sentiment": "Negative", "confidence": 0.8},
+                    {"aspect": "Fiyat", "sentiment": "Neutral", "confidence": 0.6}
+                ]
+            }
+
+            Kullanabileceğin Standart Aspect (Konu) Etiketleri:
+            ["Kargo", "Paketleme", "Kalite", "Fiyat", "Müşteri Hizmetleri", "Kullanım Kolaylığı", "Tasarım", "Orijinallik"]
+
+            Eğer yorumda belirgin bir konu yoksa 'aspects' listesi boş olabilir.
+
+            Yorumlar Listesi:
+            """ + json.dumps(texts, ensure_ascii=False)
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+    input_token_budget = 16000
+    output_token_budget = 4096
+
+    def _build_client(self):
+        from openai import OpenAI
+        # One client per process keeps the underlying httpx connection pool warm
+        return OpenAI(api_key=self.api_key, base_url=self.base_url, timeout=LLM_TIMEOUT, max_retries=0)
+
+    def complete(self, prompt):
+        completion = self.client.get().chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            response_format={ "type": "json_object" },
+            max_tokens=self.output_token_budget,
+            timeout=deadlines.clamp(LLM_TIMEOUT, "llm")
+        )
+        usage = getattr(completion, "usage", None)
+        return completion.choices[0].message.content, {
+            "input_tokens": getattr(usage, "prompt_tokens", None),
+            "output_tokens": getattr(usage, "completion_tokens", None),
+        }
+
+    def classify_prompt(self, texts):
+        return f"""
+            Analyze these reviews and return a JSON object {{"reviews": [...]}} with one entry per
+            review, in the same order. Each entry:
+            {{
+                "text_snippet": "start of review...",
+                "sentiment": "Positive" | "Negative" | "Neutral",
+                "score": 0.95,
+                "aspects": [ {{"aspect": "service", "sentiment": "Negative", "confidence": 0.9}} ]
+            }}
+
+            Reviews: {json.dumps(texts, ensure_ascii=False)}
+            """
+
+    def parse_classification(self, payload):
+        return payload.get("reviews", []) if isinstance(payload, dict) else payload
+
+
+class ProviderRegistry:
+    """Providers in priority order; callers fall through to the next one on failure."""
+
+    def __init__(self, providers):
+        self.providers = list(providers)
+
+    def get(self, name):
+        for provider in self.providers:
+            if provider.name == name:
+                return provider
+        return None
+
+    def configured(self):
+        return [p for p in self.providers if p.configured]
+
+    def classify_batch(self, texts):
+        """
+        Returns (results, provider, usage) from the first provider that answers,
+        else (None, None, None). A malformed answer is returned as results=[]
+        rather than falling through, so the caller can split the batch.
+        """
+        for provider in self.providers:
+            if not provider.api_key:
+                continue
+            try:
+                results, usage = provider.classify_batch(texts)
+                return results, provider, usage
+            except deadlines.DeadlineExceeded:
+                break  # the next provider would be past the same cutoff
+            except MalformedResponse as e:
+                telemetry.LLM_MALFORMED.inc(provider=provider.name)
+                telemetry.log(f"{e} ({len(texts)} reviews)")
+                return [], provider, None
+            except Exception as e:
+                telemetry.log(f"{provider.name} classify error: {e}")
+        return None, None, None
+
+    def summarize(self, prompt):
+        for provider in self.providers:
+            if not provider.api_key:
+                continue
+            try:
+                return provider.summarize(prompt)
+            except deadlines.DeadlineExceeded:
+                return None
+            except Exception as e:
+                telemetry.log(f"{provider.name} summary error: {e}")
+        return None
+
+    def stats(self):
+        return {p.name: p.stats() for p in self.providers}
+
+
+def _env_int(name):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+def registry_from_env():
+    return ProviderRegistry([
+        GeminiProvider(os.getenv("GOOGLE_API_KEY"), os.getenv("GEMINI_MODEL", "gemini-pro"),
+                       base_url=os.getenv("GEMINI_API_ENDPOINT"),
+                       input_token_budget=_env_int("GEMINI_INPUT_TOKENS"),
+                       output_token_budget=_env_int("GEMINI_OUTPUT_TOKENS")),
+        OpenAIProvider(os.getenv("OPENAI_API_KEY"), os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
+                       base_url=os.getenv("OPENAI_BASE_URL"),
+                       input_token_budget=_env_int("OPENAI_INPUT_TOKENS"),
+                       output_token_budget=_env_int("OPENAI_OUTPUT_TOKENS")),
+    ])
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = registry_from_env()
+        return _registry
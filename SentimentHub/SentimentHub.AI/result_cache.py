@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+import telemetry
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sentiment_cache.db")
+
+
+def normalize_text(text):
+    """Whitespace/Unicode-insensitive form used for cache keys."""
+    text = unicodedata.normalize("NFC", text or "")
+    return " ".join(text.split()).casefold()
+
+
+def cache_key(text, provider, model, prompt_version):
+    raw = "\x1f".join((normalize_text(text), provider, model, prompt_version))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent per-review result cache (SQLite), keyed on normalized text +
+    provider + model + prompt version. Entries expire after `max_age_days`;
+    beyond `max_entries` the least recently used ones are evicted. Eviction
+    runs when the cache is opened and then after every `evict_every` written
+    rows, so the table can briefly hold up to that many extra entries.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_entries=100000, max_age_days=30, enabled=True, evict_every=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.enabled = enabled
+        self.evict_every = max(1, evict_every)
+        self._unevicted_writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        if enabled:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    provider TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_results_last_access ON results(last_access)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_results_created_at ON results(created_at)")
+            self._evict()
+
+    def get_many(self, texts, provider, model, prompt_version):
+        """Returns {text: result} for the texts that are cached."""
+        if not self.enabled or not texts:
+            return {}
+        keys = {cache_key(t, provider, model, prompt_version): t for t in texts}
+        found = {}
+        now = time.time()
+        with self._lock:
+            key_list = list(keys)
+            for i in range(0, len(key_list), 500):
+                chunk = key_list[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at FROM results WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if now - created_at <= self.max_age:
+                        found[key] = value
+            if found:
+                self._conn.executemany("UPDATE results SET last_access = ? WHERE key = ?",
+                                       [(now, k) for k in found])
+            self.hits += len(found)
+            self.misses += len(texts) - len(found)
+        telemetry.CACHE_LOOKUPS.inc(len(found), provider=provider, result="hit")
+        telemetry.CACHE_LOOKUPS.inc(len(texts) - len(found), provider=provider, result="miss")
+        return {keys[k]: json.loads(v) for k, v in found.items()}
+
+    def get(self, text, provider, model, prompt_version):
+        return self.get_many([text], provider, model, prompt_version).get(text)
+
+    def put_many(self, results, provider, model, prompt_version):
+        """results: {text: result dict}"""
+        if not self.enabled or not results:
+            return
+        now = time.time()
+        rows = [(cache_key(t, provider, model, prompt_version), provider, model,
+                 json.dumps(r, ensure_ascii=False), now, now) for t, r in results.items()]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.writes += len(rows)
+            self._unevicted_writes += len(rows)
+            if self._unevicted_writes >= self.evict_every:
+                self._evict()
+
+    def put(self, text, result, provider, model, prompt_version):
+        self.put_many({text: result}, provider, model, prompt_version)
+
+    def _evict(self):
+        self._unevicted_writes = 0
+        removed = self._conn.execute("DELETE FROM results WHERE created_at < ?", (time.time() - self.max_age,)).rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count > self.max_entries:
+            removed += self._conn.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,)
+            ).rowcount
+        self.evictions += max(removed, 0)
+
+    def stats(self):
+        entries = 0
+        if self.enabled:
+            with self._lock:
+                entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(
+                path=os.getenv("SENTIMENT_CACHE_PATH", DEFAULT_PATH),
+                max_entries=int(os.getenv("SENTIMENT_CACHE_MAX_ENTRIES", "100000")),
+                max_age_days=float(os.getenv("SENTIMENT_CACHE_MAX_AGE_DAYS", "30")),
+                enabled=os.getenv("SENTIMENT_CACHE", "1") == "1",
+                evict_every=int(os.getenv("SENTIMENT_CACHE_EVICT_EVERY", "1000")),
+            )
+        return _cache
@@ -1,54 +1,293 @@
+import os
 import time
-from selenium import webdriver
+from contextlib import closing
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-
-def scrape_trendyol_reviews(url: str, max_reviews: int = 100):
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    
-    reviews_data = []
-    business_name = "Trendyol Product"
-    
+import deadlines
+import driver_pool
+import telemetry
+from scroll import AdaptiveScroller
+from backends import ScraperBackend, DEFAULT_AUTHOR, DEFAULT_BUSINESS_NAME, reviews_page_url, collect
+from http_scraper import HttpBackend
+
+# Default card extraction: "bulk" (one execute_script per pass) or "element"
+# (WebDriver find_element calls per card, kept for debugging/comparison)
+EXTRACTION_MODE = os.getenv("SCRAPER_EXTRACTION", "bulk")
+# Selenium's own default; under a request deadline it is cut to the scrape cutoff
+PAGE_LOAD_TIMEOUT = float(os.getenv("SCRAPER_PAGE_LOAD_TIMEOUT", "300"))
+
+# Same fallback chain as _parse_card_element, evaluated page-side.
+# arguments[0] is the watermark: cards before it were parsed in earlier passes.
+EXTRACT_CARDS_JS = """
+var start = arguments[0] || 0;
+var cards = Array.prototype.slice.call(document.getElementsByClassName('rnr-com-w'));
+if (!cards.length) {
+    var snap = document.evaluate("//div[contains(@class, 'comment')]", document, null,
+                                 XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    for (var k = 0; k < snap.snapshotLength; k++) cards.push(snap.snapshotItem(k));
+}
+function txt(el) { return el ? (el.innerText || '').trim() : ''; }
+var out = [];
+for (var i = start; i < cards.length; i++) {
+    var c = cards[i];
+    var text = txt(c.querySelector('.rnr-com-tx'))
+            || txt(c.querySelector("div[class*='comment-text']"))
+            || txt(c.querySelector('p'));
+    if (!text) {
+        var lines = (c.innerText || '').split('\\n');
+        for (var j = 0; j < lines.length; j++) if (lines[j].length > text.length) text = lines[j];
+    }
+    var stars = c.querySelectorAll('.rnr-com-sr .full').length
+             || c.querySelectorAll('i.i-star-orange').length;
+    var usr = c.querySelector('.rnr-com-usr');
+    out.push({
+        index: i,
+        text: text,
+        rating: stars || 5,
+        author: usr ? txt(usr) : null,
+        date: txt(c.querySelector('.rnr-com-dt'))
+    });
+}
+return {total: cards.length, cards: out};
+"""
+
+# "selenium", "http" or "auto" (http first, Selenium when it finds nothing)
+DEFAULT_BACKEND = os.getenv("SCRAPER_BACKEND", "auto")
+
+class SeleniumBackend(ScraperBackend):
+    name = "selenium"
+
+    def __init__(self, extraction=None):
+        self.extraction = extraction or EXTRACTION_MODE
+
+    def stream(self, url, max_reviews=100, should_stop=None, stats=None):
+        if deadlines.expired("scrape"):
+            telemetry.log("Scrape window closed, not starting a browser")
+            return
+        # Borrow a warm browser instead of launching Chrome for every call;
+        # closing the generator early returns it to the pool
+        try:
+            with driver_pool.get_pool().session(timeout=deadlines.remaining("scrape")) as driver:
+                yield from _stream_with_driver(driver, url, max_reviews, should_stop, self.extraction, stats)
+        except TimeoutError:
+            if deadlines.current() is None:
+                raise
+            telemetry.log("No Chrome session free before the scrape cutoff")
+
+BACKENDS = {
+    "selenium": SeleniumBackend(),
+    "http": HttpBackend(),
+}
+
+def get_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown scraper backend '{name}'. Available: auto, {', '.join(BACKENDS)}")
+    return BACKENDS[name]
+
+def stream_trendyol_reviews(url: str, max_reviews: int = 100, should_stop=None, extraction=None, backend=None, stats=None):
+    """
+    Generator of (new_reviews, business_name) chunks as soon as each scroll
+    pass / API page is parsed. "auto" streams the HTTP backend and falls back
+    to Selenium when it produced no reviews at all.
+    """
+    with closing(_stream_backends(url, max_reviews, should_stop, extraction, backend, stats)) as stream:
+        for reviews, business_name in stream:
+            telemetry.REVIEWS.inc(len(reviews), source="scraped")
+            yield reviews, business_name
+
+def _stream_backends(url, max_reviews, should_stop, extraction, backend, stats):
+    backend = backend or DEFAULT_BACKEND
+    if stats is not None:
+        stats["backend"] = backend
+    if backend == "selenium" and extraction:
+        yield from SeleniumBackend(extraction).stream(url, max_reviews, should_stop, stats)
+        return
+    if backend != "auto":
+        yield from get_backend(backend).stream(url, max_reviews, should_stop, stats)
+        return
+
+    found = 0
+    business_name = DEFAULT_BUSINESS_NAME
+    for reviews, business_name in BACKENDS["http"].stream(url, max_reviews, should_stop, stats):
+        found += len(reviews)
+        if reviews:
+            yield reviews, business_name
+    if found:
+        if stats is not None:
+            stats["backend"] = "http"
+        return
+    if deadlines.expired("scrape"):
+        telemetry.log("HTTP backend found no reviews; no time left for the Selenium fallback")
+        return
+    telemetry.log("HTTP backend found no reviews, falling back to Selenium")
+    if stats is not None:
+        stats["backend"] = "selenium"
+    yield from BACKENDS["selenium"].stream(url, max_reviews, should_stop, stats)
+
+def scrape_trendyol_reviews(url: str, max_reviews: int = 100, should_stop=None, extraction=None, backend=None, stats=None):
+    """
+    Returns (reviews, business_name). Pass a dict as `stats` to receive
+    backend timings (per-pass scroll timings for Selenium).
+    """
+    return collect(stream_trendyol_reviews(url, max_reviews, should_stop, extraction, backend, stats))
+
+def _find_containers(driver):
+    containers = driver.find_elements(By.CLASS_NAME, "rnr-com-w")
+    if not containers:
+         # Fallback for mobile view or alternative classes
+         containers = driver.find_elements(By.XPATH, "//div[contains(@class, 'comment')]")
+    return containers
+
+def _extract_cards(driver, extraction, start, unique_texts):
+    if extraction == "bulk":
+        return _extract_cards_bulk(driver, start)
+    return _extract_cards_element(driver, start, unique_texts)
+
+def _extract_cards_bulk(driver, start=0):
+    """Parses every card from `start` onwards in a single WebDriver round-trip."""
+    payload = driver.execute_script(EXTRACT_CARDS_JS, start) or {}
+    cards = []
+    for raw in payload.get("cards", []):
+        text = raw.get("text") or ""
+        if len(text) < 3:
+            if raw.get("index", 0) < 5: telemetry.log(f"Skipping empty review at index {raw.get('index')}")
+            continue
+        author = raw.get("author")
+        cards.append({
+            "author": DEFAULT_AUTHOR if author is None else author,
+            "text": text,
+            "rating": int(raw.get("rating") or 5),
+            "date": raw.get("date") or ""
+        })
+    return int(payload.get("total", 0)), cards
+
+def _extract_cards_element(driver, start=0, unique_texts=()):
+    """Per-element WebDriver path: several round-trips per card."""
+    containers = _find_containers(driver)
+    cards = []
+    for index in range(start, len(containers)):
+        try:
+            card = _parse_card_element(containers[index], index, unique_texts)
+            if card:
+                cards.append(card)
+        except Exception as e:
+             if index < 3: telemetry.log(f"Card parse error: {e}")
+             continue
+    return len(containers), cards
+
+def _parse_card_element(card, index, unique_texts=()):
+    review_text = ""
+
+    # Strategy 1: Trendyol Specific Classes
     try:
-        # Pre-process URL: Ensure we are on the reviews page
-        if "/yorumlar" not in url:
-            # Check if it has query params
-            if "?" in url:
-                 base = url.split("?")[0]
-                 query = url.split("?")[1]
-                 target_url = f"{base}/yorumlar?{query}"
-            else:
-                 target_url = f"{url}/yorumlar"
-        else:
-            target_url = url
-            
-        print(f"Navigating to: {target_url}")
-        driver.get(target_url)
-        time.sleep(5) # Wait for initial load
+        review_text = card.find_element(By.CLASS_NAME, "rnr-com-tx").text
+    except:
+        pass
+
+    # Strategy 2: Common Alternatives from different layouts
+    if not review_text:
+        try:
+            review_text = card.find_element(By.XPATH, ".//div[contains(@class, 'comment-text')]").text
+        except:
+            pass
 
-        # 1. Extract Product Name (Business Name)
+    # Strategy 3: Any Paragraph
+    if not review_text:
         try:
-            # Trendyol header usually has class 'pr-new-br' or checking h1
-            h1 = driver.find_element(By.TAG_NAME, "h1")
-            business_name = h1.text
-            if not business_name:
-                 # Try brand name + product name
-                 brand = driver.find_element(By.CLASS_NAME, "brand-name").text
-                 prod = driver.find_element(By.CLASS_NAME, "product-name").text
-                 business_name = f"{brand} {prod}"
-            print(f"Found Product Name: {business_name}")
+            review_text = card.find_element(By.TAG_NAME, "p").text
         except:
-            print("Could not find product name, using default")
+            pass
+
+    # Strategy 4: Fallback to full card text (Aggressive)
+    if not review_text:
+        full_content = card.text.split('\n')
+        # Heuristic: the longest line is likely the review
+        if full_content:
+            review_text = max(full_content, key=len)
+
+    if not review_text or len(review_text) < 3:
+        if index < 5: telemetry.log(f"Skipping empty review at index {index}")
+        return None
+
+    # Skip the remaining lookups for duplicates
+    if review_text in unique_texts: return None
+
+    # Extract Rating
+    rating = 5 # Default
+    try:
+        # Star container: .rnr-com-sr -> .full
+        full_stars = card.find_elements(By.CSS_SELECTOR, ".rnr-com-sr .full")
+        if full_stars:
+            rating = len(full_stars)
+        else:
+             # Fallback: Count gold/orange stars classes
+             stars = card.find_elements(By.CSS_SELECTOR, "i.i-star-orange") # older class?
+             if stars: rating = len(stars)
+    except:
+        pass
+
+    # Author
+    author = DEFAULT_AUTHOR
+    try:
+        author = card.find_element(By.CLASS_NAME, "rnr-com-usr").text
+    except:
+        # Try to find from split lines (short line)
+        pass
+
+    # Date
+    date_val = ""
+    try:
+        date_val = card.find_element(By.CLASS_NAME, "rnr-com-dt").text
+    except:
+        pass
+
+    return {
+        "author": author,
+        "text": review_text,
+        "rating": rating,
+        "date": date_val
+    }
+
+def _scrape_with_driver(driver, url, max_reviews, should_stop=None, extraction="bulk", stats=None):
+    return collect(_stream_with_driver(driver, url, max_reviews, should_stop, extraction, stats))
+
+def _stream_with_driver(driver, url, max_reviews, should_stop=None, extraction="bulk", stats=None):
+    """Yields (new_reviews, business_name) after every scroll pass."""
+    total = 0
+    business_name = DEFAULT_BUSINESS_NAME
+    scroller = None
+    
+    try:
+        target_url = reviews_page_url(url)
+        telemetry.log(f"Navigating to: {target_url}")
+        with telemetry.span("page_load", backend="selenium") as span:
+            # Set on every use: the pooled session keeps it between requests
+            driver.set_page_load_timeout(deadlines.clamp(PAGE_LOAD_TIMEOUT, "scrape"))
+            try:
+                driver.get(target_url)
+            except TimeoutException:
+                if deadlines.current() is None:
+                    raise
+                telemetry.log("Page load cut off by the request deadline, using what has rendered")
+                driver.execute_script("window.stop();")
+            scroller = AdaptiveScroller(driver)
+            span["cards_found"] = scroller.wait_for_first_cards()
+            if not span["cards_found"]: # Wait for initial load
+                telemetry.log("No review cards appeared after load")
+
+            # 1. Extract Product Name (Business Name)
+            try:
+                # Trendyol header usually has class 'pr-new-br' or checking h1
+                h1 = driver.find_element(By.TAG_NAME, "h1")
+                business_name = h1.text
+                if not business_name:
+                     # Try brand name + product name
+                     brand = driver.find_element(By.CLASS_NAME, "brand-name").text
+                     prod = driver.find_element(By.CLASS_NAME, "product-name").text
+                     business_name = f"{brand} {prod}"
+                telemetry.log(f"Found Product Name: {business_name}")
+            except:
+                telemetry.log("Could not find product name, using default")
 
         # 2. Scrape Reviews (Trendyol Specific)
         unique_texts = set()
@@ -58,124 +297,56 @@ def scrape_trendyol_reviews(url: str, max_reviews: int = 100):
         # Text: .rnr-com-tx
         # Date: .rnr-com-dt
         
-        body = driver.find_element(By.TAG_NAME, "body")
-        
-        for i in range(max_reviews // 10): # Faster passes
-            print(f"--- Pass {i+1} ---")
-            
-            # Scroll strategy for Trendyol (Infinite scroll)
-            for _ in range(3):
-                body.send_keys(Keys.PAGE_DOWN)
-                time.sleep(0.3)
-            
-            time.sleep(1.0)
-            
-            # Find all review containers
-            containers = driver.find_elements(By.CLASS_NAME, "rnr-com-w")
-            if not containers:
-                 # Fallback for mobile view or alternative classes
-                 containers = driver.find_elements(By.XPATH, "//div[contains(@class, 'comment')]")
-            
-            print(f"Found {len(containers)} review containers.")
-            
-            new_in_this_pass = 0
-            
-            for index, card in enumerate(containers):
-                try:
-                    review_text = ""
-                    
-                    # Strategy 1: Trendyol Specific Classes
-                    try:
-                        review_text = card.find_element(By.CLASS_NAME, "rnr-com-tx").text
-                    except:
-                        pass
-                        
-                    # Strategy 2: Common Alternatives from different layouts
-                    if not review_text:
-                        try:
-                            review_text = card.find_element(By.XPATH, ".//div[contains(@class, 'comment-text')]").text
-                        except:
-                            pass
-
-                    # Strategy 3: Any Paragraph
-                    if not review_text:
-                        try:
-                            review_text = card.find_element(By.TAG_NAME, "p").text
-                        except:
-                            pass
-                            
-                    # Strategy 4: Fallback to full card text (Aggressive)
-                    if not review_text:
-                        full_content = card.text.split('\n')
-                        # Heuristic: the longest line is likely the review
-                        if full_content:
-                            review_text = max(full_content, key=len)
-                    
-                    if not review_text or len(review_text) < 3: 
-                        if index < 5: print(f"Skipping empty review at index {index}")
-                        continue
-                        
-                    # Check duplication
-                    if review_text in unique_texts: continue
-                    
-                    # Extract Rating
-                    rating = 5 # Default
-                    try:
-                        # Star container: .rnr-com-sr -> .full
-                        full_stars = card.find_elements(By.CSS_SELECTOR, ".rnr-com-sr .full")
-                        if full_stars:
-                            rating = len(full_stars)
-                        else:
-                             # Fallback: Count gold/orange stars classes
-                             stars = card.find_elements(By.CSS_SELECTOR, "i.i-star-orange") # older class?
-                             if stars: rating = len(stars)
-                             else:
-                                 # text based?
-                                 pass
-                    except:
-                        pass
-
-                    # Author
-                    author = "Müşteri"
-                    try:
-                        author = card.find_element(By.CLASS_NAME, "rnr-com-usr").text
-                    except:
-                        # Try to find from split lines (short line)
-                        pass
-                        
-                    # Date
-                    date_val = ""
-                    try:
-                        date_val = card.find_element(By.CLASS_NAME, "rnr-com-dt").text
-                    except:
-                        pass
-
-                    reviews_data.append({
-                        "author": author,
-                        "text": review_text,
-                        "rating": rating,
-                        "date": date_val
-                    })
-                    unique_texts.add(review_text)
-                    new_in_this_pass += 1
-                except Exception as e:
-                     if index < 3: print(f"Card parse error: {e}")
-                     continue
-            
-            print(f"Added {new_in_this_pass} new reviews. Total: {len(reviews_data)}")
-            
-            if len(reviews_data) >= max_reviews:
+        watermark = 0 # Containers already parsed; infinite scroll only appends
+
+        while scroller.should_continue():
+            if should_stop and should_stop():
+                telemetry.log("Scrape stopped by caller")
+                break
+
+            # Scroll strategy for Trendyol (Infinite scroll): wait for new cards, not a fixed time
+            with telemetry.span("scroll") as span:
+                record = scroller.scroll_pass()
+                span["pass"] = record['pass']
+            telemetry.log(f"--- Pass {record['pass']} (waited {record['wait_s']}s) ---")
+
+            extract_started = time.monotonic()
+            with telemetry.span("parse_cards", extraction=extraction, start=watermark) as span:
+                total_cards, cards = _extract_cards(driver, extraction, watermark, unique_texts)
+                if total_cards < watermark:
+                    # List was re-rendered; start over, dedup filters repeats
+                    watermark = 0
+                    total_cards, cards = _extract_cards(driver, extraction, watermark, unique_texts)
+                span["cards"] = len(cards)
+
+            telemetry.log(f"Found {total_cards} review containers ({total_cards - watermark} new).")
+            watermark = max(watermark, total_cards)
+
+            new_reviews = []
+
+            for card in cards:
+                # Check duplication
+                if card["text"] in unique_texts: continue
+                if total + len(new_reviews) >= max_reviews: break
+                new_reviews.append(card)
+                unique_texts.add(card["text"])
+
+            new_in_this_pass = len(new_reviews)
+            total += new_in_this_pass
+            scroller.record_result(record, new_in_this_pass, time.monotonic() - extract_started)
+            telemetry.log(f"Added {new_in_this_pass} new reviews. Total: {total}")
+            yield new_reviews, business_name
+
+            if total >= max_reviews:
                 break
-                
-            # Try to find "More" button (if not infinite scroll)
-            if new_in_this_pass == 0 and i > 2:
-                 pass
 
     except Exception as e:
-        print(f"Global Scraping Error: {e}")
+        telemetry.log(f"Global Scraping Error: {e}")
     finally:
-        driver.quit()
-        
-    return reviews_data, business_name
+        if scroller:
+            summary = scroller.summary()
+            telemetry.log(f"Scrolled {summary['passes']} passes in {summary['elapsed_s']}s")
+            if stats is not None:
+                stats.update(summary)
 
 
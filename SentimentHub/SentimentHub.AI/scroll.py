@@ -0,0 +1,149 @@
+import os
+import time
+import deadlines
+import telemetry
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Container count with the same fallback as scraper._find_containers
+COUNT_CARDS_JS = """
+var n = document.getElementsByClassName('rnr-com-w').length;
+if (!n) {
+    n = document.evaluate("count(//div[contains(@class, 'comment')])", document, null,
+                          XPathResult.NUMBER_TYPE, null).numberValue;
+}
+return n;
+"""
+
+# Cheap page-state probe: card count, finished resource fetches, document state
+PAGE_STATE_JS = """
+var n = document.getElementsByClassName('rnr-com-w').length;
+var res = (window.performance && performance.getEntriesByType) ? performance.getEntriesByType('resource').length : 0;
+return [n, res, document.readyState];
+"""
+
+SCROLL_TO_BOTTOM_JS = "window.scrollTo(0, document.body.scrollHeight); return document.body.scrollHeight;"
+
+
+class ScrollSettings:
+    """Tunables for AdaptiveScroller; defaults come from SCROLL_* env vars."""
+
+    def __init__(self, time_budget=None, initial_timeout=None, pass_timeout=None,
+                 settle_seconds=None, max_idle_passes=None, backoff=1.6, max_pass_timeout=8.0, poll=0.1):
+        # `is not None`: an explicit 0 (e.g. no settle wait) is a valid setting
+        self.time_budget = time_budget if time_budget is not None else float(os.getenv("SCROLL_TIME_BUDGET", "90"))
+        self.initial_timeout = (initial_timeout if initial_timeout is not None
+                                else float(os.getenv("SCROLL_INITIAL_TIMEOUT", "10")))
+        self.pass_timeout = pass_timeout if pass_timeout is not None else float(os.getenv("SCROLL_PASS_TIMEOUT", "1.5"))
+        self.settle_seconds = (settle_seconds if settle_seconds is not None
+                               else float(os.getenv("SCROLL_SETTLE_SECONDS", "0.3")))
+        self.max_idle_passes = (max_idle_passes if max_idle_passes is not None
+                                else int(os.getenv("SCROLL_MAX_IDLE_PASSES", "2")))
+        self.backoff = backoff
+        self.max_pass_timeout = max_pass_timeout
+        self.poll = poll
+
+
+class AdaptiveScroller:
+    """
+    Drives an infinite-scroll list without fixed sleeps: each pass scrolls, then
+    waits until the card count rises and the DOM/network settle, backing off
+    when nothing new arrives. Stops when the time budget is spent or after
+    `max_idle_passes` passes in a row add nothing.
+    """
+
+    def __init__(self, driver, settings=None):
+        self.driver = driver
+        self.settings = settings or ScrollSettings()
+        self.started = time.monotonic()
+        # Every wait is bounded by this, so it also ends at a request deadline's scrape cutoff
+        self.deadline = self.started + deadlines.clamp(self.settings.time_budget, "scrape")
+        self.idle_passes = 0
+        self.pass_timeout = self.settings.pass_timeout
+        self.timings = []
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+    def card_count(self):
+        return int(self.driver.execute_script(COUNT_CARDS_JS) or 0)
+
+    def _wait(self, predicate, timeout):
+        timeout = min(timeout, self.remaining())
+        if timeout <= 0:
+            return False
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=self.settings.poll).until(lambda d: predicate())
+            return True
+        except TimeoutException:
+            return False
+
+    def wait_for_first_cards(self):
+        """Replaces the fixed post-navigation sleep."""
+        started = time.monotonic()
+        found = self._wait(lambda: self.card_count() > 0, self.settings.initial_timeout)
+        if found:
+            self.wait_for_settle(self.settings.pass_timeout)
+        elapsed = time.monotonic() - started
+        self.timings.append({"pass": 0, "wait_s": round(elapsed, 3), "cards": self.card_count() if found else 0})
+        return found
+
+    def wait_for_settle(self, timeout):
+        """Waits until card count and finished network requests stop changing for settle_seconds."""
+        state = {"last": None, "since": time.monotonic()}
+
+        def settled():
+            snapshot = self.driver.execute_script(PAGE_STATE_JS)
+            now = time.monotonic()
+            if snapshot != state["last"]:
+                state["last"], state["since"] = snapshot, now
+                return False
+            return now - state["since"] >= self.settings.settle_seconds
+
+        return self._wait(settled, timeout)
+
+    def scroll_pass(self):
+        """Scrolls once and waits for new cards. Returns the per-pass timing record."""
+        started = time.monotonic()
+        before = self.card_count()
+        self.driver.execute_script(SCROLL_TO_BOTTOM_JS)
+        grew = self._wait(lambda: self.card_count() > before, self.pass_timeout)
+        if grew:
+            self.wait_for_settle(self.settings.pass_timeout)
+        record = {
+            "pass": len(self.timings),
+            "wait_s": round(time.monotonic() - started, 3),
+            "timeout_s": round(self.pass_timeout, 3),
+            "cards_before": before,
+            "grew": grew,
+        }
+        self.timings.append(record)
+        return record
+
+    def record_result(self, record, new_reviews, extract_seconds):
+        record["new_reviews"] = new_reviews
+        record["extract_s"] = round(extract_seconds, 3)
+        if new_reviews:
+            self.idle_passes = 0
+            self.pass_timeout = self.settings.pass_timeout
+        else:
+            # Nothing new: give slow loads more time before giving up
+            self.idle_passes += 1
+            self.pass_timeout = min(self.pass_timeout * self.settings.backoff, self.settings.max_pass_timeout)
+
+    def should_continue(self):
+        if self.remaining() <= 0:
+            telemetry.log(f"Scroll time budget ({self.settings.time_budget}s) exhausted")
+            return False
+        if self.idle_passes >= self.settings.max_idle_passes:
+            telemetry.log(f"No new reviews for {self.idle_passes} passes, stopping early")
+            return False
+        return True
+
+    def summary(self):
+        return {
+            "elapsed_s": round(time.monotonic() - self.started, 3),
+            "passes": len(self.timings) - 1,
+            "idle_passes": self.idle_passes,
+            "timings": self.timings,
+        }
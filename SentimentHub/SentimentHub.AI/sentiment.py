@@ -1,233 +1,152 @@
-import os
-import json
-import os
-import json
 from dotenv import load_dotenv
+import aspects
+import batching
+import deadlines
+import providers
+import result_cache
+import summary
+import telemetry
+from lazy import LazyResource
+from providers import PROMPT_VERSION
 
 load_dotenv()
 
-# Optional Imports (Handle missing libraries gracefully)
-genai = None
-OpenAI = None
-
-try:
-    import google.generativeai as genai
-except ImportError as e:
-    print(f"Warning: google-generativeai library not found. Gemini API will be unavailable. Error: {e}")
-
-try:
-    from openai import OpenAI
-except ImportError:
-    print("Warning: openai library not found. OpenAI API will be unavailable.")
-
-# Initialize Local Models (Fallback)
-sentiment_pipeline = None
-try:
-    from transformers import pipeline
-    sentiment_pipeline = pipeline("sentiment-analysis", model="savasy/bert-base-turkish-sentiment-cased")
-except Exception as e:
-    print(f"Local AI Model skipped (not installed or compatible): {e}")
-    sentiment_pipeline = None
-
-def analyze_sentiment_with_api(text_list):
+LOCAL_MODEL = "savasy/bert-base-turkish-sentiment-cased"
+
+# Optional Imports (Handle missing libraries gracefully). Nothing heavy is
+# imported at module load; each backend loads on first use or via warmup().
+def _load_local_engine():
+    # Initialize Local Models (Fallback)
+    from local_model import engine_from_env
+    return engine_from_env(LOCAL_MODEL)
+
+registry = providers.get_registry()
+
+BACKENDS = {
+    "gemini": registry.get("gemini").client,
+    "openai": registry.get("openai").client,
+    "local": LazyResource(f"local model {LOCAL_MODEL}", _load_local_engine),
+}
+
+def warmup(names=None):
+    """Loads the given backends (default: all) and returns their status."""
+    for name in names or BACKENDS:
+        BACKENDS[name].get()
+    return backend_status()
+
+def backend_status():
+    return {name: res.status() for name, res in BACKENDS.items()}
+
+def _store_results(text_list, results, provider):
+    # Called by batching.classify_adaptive only for answers that passed validation
+    result_cache.get_cache().put_many(dict(zip(text_list, results)), provider.name, provider.model, PROMPT_VERSION)
+
+def cached_api_results(text_list):
+    """
+    Returns {text: result} for reviews already classified by one of the
+    configured API providers, so only the rest needs to be sent out.
+    """
+    cache = result_cache.get_cache()
+    found = {}
+    for provider in registry.configured():
+        remaining = [t for t in text_list if t not in found]
+        if not remaining:
+            break
+        found.update(cache.get_many(remaining, provider.name, provider.model, PROMPT_VERSION))
+    return found
+
+def token_budgets():
+    """(input, output) token budgets of the provider that will be tried first."""
+    for provider in registry.providers:
+        if provider.api_key:
+            return provider.input_token_budget, provider.output_token_budget
+    return providers.LLMProvider.input_token_budget, providers.LLMProvider.output_token_budget
+
+def plan_api_batches(text_list):
+    """Splits reviews into prompt-sized batches (lists of indexes) for the active provider."""
+    return batching.plan_batches(text_list, *token_budgets())
+
+def analyze_sentiment_with_api(text_list, stats=None):
     """
     Analyzes a list of reviews using Google Gemini (Priority) or OpenAI.
-    Returns a dictionary mapping text -> {sentiment, score, aspects}.
+    Returns a list of {sentiment, score, aspects} aligned with text_list
+    (None for reviews no provider could classify), or None when no provider
+    answered at all. Malformed/truncated answers are retried in halves.
+    """
+    results = batching.classify_adaptive(text_list, registry.classify_batch, stats, on_valid=_store_results)
+    telemetry.REVIEWS.inc(sum(1 for r in results if r is not None), source="llm")
+    if all(r is None for r in results):
+        return None
+    return results
+
+# Stand-in when the local model is unavailable (or still loading under a
+# deadline); "placeholder" keeps it from being reported as a model result
+NEUTRAL_RESULT = {"sentiment": "Neutral", "score": 0.5, "placeholder": True}
+
+def analyze_sentiment_batch(texts):
+    """
+    Local-model sentiment for many reviews at once. Cached results are reused
+    and only the misses go through the batched engine.
+    Returns [{"sentiment", "score"}] aligned with `texts`; without the model
+    every entry is a copy of NEUTRAL_RESULT.
     """
-    
-    # 1. Try Google Gemini (Free Tier is great)
-    google_key = os.getenv("GOOGLE_API_KEY")
-    if google_key:
-        try:
-            genai.configure(api_key=google_key)
-            model = genai.GenerativeModel('gemini-pro')
-            
-            prompt = """
-            Aşağıdaki ürün/hizmet yorumlarını detaylıca analiz et. Çıktı olarak SADECE geçerli bir JSON listesi ver.
-            Listedeki sıralamayı ve sayıyı bozma. Her yorum için şu yapıyı kullan:
-            {
-                "sentiment": "Positive" | "Negative" | "Neutral",
-                "score": 0.95, (0.0 ile 1.0 arası güven skoru)
-                "aspects": [ 
-                    {"aspect": "Kargo", "sentiment": "Positive", "confidence": 0.9},
-                    {"aspect": "Kalite", "sentiment": "Negative", "confidence": 0.8},
-                    {"aspect": "Fiyat", "sentiment": "Neutral", "confidence": 0.6}
-                ]
-            }
-            
-            Kullanabileceğin Standart Aspect (Konu) Etiketleri: 
-            ["Kargo", "Paketleme", "Kalite", "Fiyat", "Müşteri Hizmetleri", "Kullanım Kolaylığı", "Tasarım", "Orijinallik"]
-            
-            Eğer yorumda belirgin bir konu yoksa 'aspects' listesi boş olabilir.
-            
-            Yorumlar Listesi:
-            """ + json.dumps(text_list, ensure_ascii=False)
-            
-            response = model.generate_content(prompt)
-            # Clean generic json markdown
-            clean_text = response.text.replace("```json", "").replace("```", "").strip()
-            return json.loads(clean_text)
-        except Exception as e:
-            print(f"Gemini Error: {e}")
-
-    # 2. Try OpenAI
-    openai_key = os.getenv("OPENAI_API_KEY")
-    if openai_key:
-        try:
-            client = OpenAI(api_key=openai_key)
-            prompt = f"""
-            Analyze these reviews and return a JSON array. For each review:
-            {{
-                "text_snippet": "start of review...",
-                "sentiment": "Positive" | "Negative" | "Neutral",
-                "score": 0.95,
-                "aspects": [ {{"aspect": "service", "sentiment": "Negative", "confidence": 0.9}} ]
-            }}
-            
-            Reviews: {json.dumps(text_list, ensure_ascii=False)}
-            """
-            
-            completion = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                response_format={ "type": "json_object" }
-            )
-            return json.loads(completion.choices[0].message.content).get("reviews", [])
-        except Exception as e:
-            print(f"OpenAI Error: {e}")
-            
-    return None
+    if not texts:
+        return []
+    # Under a request deadline a cold model load (seconds) is not waited for
+    local = BACKENDS["local"]
+    local_engine = local.get_nowait() if deadlines.current() else local.get()
+    if not local_engine:
+        return [dict(NEUTRAL_RESULT) for _ in texts]
+
+    cache = result_cache.get_cache()
+    known = cache.get_many(texts, "local", LOCAL_MODEL, PROMPT_VERSION)
+    missing = list(dict.fromkeys(t for t in texts if t not in known))
+    if missing:
+        predicted = dict(zip(missing, local_engine.predict(missing)))
+        cache.put_many(predicted, "local", LOCAL_MODEL, PROMPT_VERSION)
+        known.update(predicted)
+    return [known[t] for t in texts]
 
 def analyze_sentiment(text):
     # Fallback to local
-    if sentiment_pipeline:
-        result = sentiment_pipeline(text[:512])[0]
-        label_map = {
-            "positive": "Positive",
-            "negative": "Negative",
-            "neutral": "Neutral"
-        }
-        return {
-            "sentiment": label_map.get(result['label'], "Neutral"),
-            "score": result['score']
-        }
-    return {"sentiment": "Neutral", "score": 0.5}
+    return analyze_sentiment_batch([text])[0]
+
+def analyze_aspects_batch(texts):
+    """
+    Offline aspect extraction: one compiled lexicon scan per review and the
+    local model run once per distinct sentence that mentions an aspect.
+    Returns [[{"aspect", "sentiment", "confidence", "spans"}]] aligned with `texts`.
+    """
+    return aspects.extract_aspects_batch(texts, aspects.get_matcher(), analyze_sentiment_batch)
 
 def analyze_aspects(text):
     # Basic keyword based aspect extraction if API fails
-    aspects = []
-    keywords = {
-        "Kargo": ["kargo", "teslimat", "paket", "ulaşım", "hızlı", "geç", "gün"],
-        "Kalite": ["kalite", "kumaş", "sağlam", "bozuk", "yırtık", "dikiş", "materyal"],
-        "Beden/Uyum": ["beden", "kalıp", "dar", "bol", "küçük", "büyük", "tam"],
-        "Fiyat/Performans": ["fiyat", "pahalı", "ucuz", "değer", "indirim", "performance"],
-        "Satıcı": ["satıcı", "ilgi", "cevap", "yanlış", "eksik", "hediye"]
-    }
-    
-    text_lower = text.lower()
-    for cat, words in keywords.items():
-        if any(w in text_lower for w in words):
-            # Simple heuristic: if whole text is neg, aspect is likely neg
-            sent = analyze_sentiment(text)['sentiment']
-            aspects.append({
-                "aspect": cat,
-                "sentiment": sent,
-                "confidence": 0.8
-            })
-            
-    return aspects
-
-def generate_business_summary(review_texts):
+    return analyze_aspects_batch([text])[0]
+
+def analyze_local_batch(texts):
+    """Review-level sentiment plus lexicon aspects, for reviews no API provider covered."""
+    return [{**sent, "aspects": asp}
+            for sent, asp in zip(analyze_sentiment_batch(texts), analyze_aspects_batch(texts))]
+
+def generate_business_summary(review_texts, stats=None):
     """
     Generates a high-level strategic summary (Strengths, Weaknesses, Advice)
-    using all reviews.
+    using all reviews: map-reduce over token-bounded chunks with the LLM
+    providers, or corpus statistics when none is available or the request
+    deadline leaves no time for it. `stats["mode"]` tells which one it was.
     """
     if not review_texts:
         return None
-        
-    # Summarize input if too long (take first 50 reviews or random sample)
-    sample_text = json.dumps(review_texts[:50], ensure_ascii=False)
-    
-    prompt = f"""
-    Sen uzman bir E-Ticaret Danismanisin. Asagidaki urun yorumlarini analiz ederek satici/ureticiye ozel bir rapor hazirla.
-    
-    Ciktiyi SADECE asagidaki JSON formatinda ver:
-    {{
-        "strengths": ["Güçlü yön 1 (Örn: Hızlı kargo)", "Güçlü yön 2"...],
-        "weaknesses": ["Zayıf nokta 1 (Örn: Paketleme kötü)", "Zayıf nokta 2"...],
-        "advice": ["Tavsiye 1 (Örn: Aras Kargo ile çalışmayı bırakın)", "Tavsiye 2"...]
-    }}
-    
-    Her liste icin en az 3, en fazla 5 madde olsun. Maddeler kisa, net ve e-ticaret odakli olsun.
-    
-    Yorumlar:
-    {sample_text}
-    """
-    
-    # 1. Try Gemini
-    google_key = os.getenv("GOOGLE_API_KEY")
-    if google_key:
-        try:
-            genai.configure(api_key=google_key)
-            model = genai.GenerativeModel('gemini-pro')
-            response = model.generate_content(prompt)
-            clean_text = response.text.replace("```json", "").replace("```", "").strip()
-            return json.loads(clean_text)
-        except Exception as e:
-            print(f"Gemini Summary Error: {e}")
-
-    # 2. Try OpenAI
-    openai_key = os.getenv("OPENAI_API_KEY")
-    if openai_key:
-        try:
-            client = OpenAI(api_key=openai_key)
-            completion = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                response_format={ "type": "json_object" }
-            )
-            return json.loads(completion.choices[0].message.content)
-        except Exception as e:
-            print(f"OpenAI Summary Error: {e}")
-            
-    # Fallback (Rule Based) if no API
-    # Calculate most frequent positive/negative words (Simple heuristic for Turkish)
-    
-    # Simple word frequency
-    all_text = " ".join(review_texts).lower()
-    
-    # Mock intelligent response based on content
-    strengths = []
-    weaknesses = []
-    
-    if "hızlı" in all_text and "kargo" in all_text:
-        strengths.append("Kargo süreçleri hızlı işliyor")
-    if "kaliteli" in all_text or "sağlam" in all_text:
-        strengths.append("Ürün kalitesi beğeniliyor")
-    if "hediye" in all_text:
-        strengths.append("Hediye gönderimi memnuniyet yaratmış")
-        
-    if "geç" in all_text and "geldi" in all_text:
-        weaknesses.append("Teslimat sürelerinde gecikmeler yaşanıyor")
-    if "özensiz" in all_text or "yırtık" in all_text:
-        weaknesses.append("Paketleme konusunda şikayetler var")
-    if "küçük" in all_text or "dar" in all_text:
-        weaknesses.append("Beden/Boyut konusunda uyumsuzluklar var")
-        
-    # Defaults if empty
-    if not strengths: strengths = ["Genel müşteri memnuniyeti yüksek görünüyor"]
-    if not weaknesses: weaknesses = ["Belirgin bir sistemsel sorun tespit edilemedi"]
-    
-    advice = []
-    if "paket" in str(weaknesses):
-        advice.append("Paketleme standartlarınızı gözden geçirin, daha korunaklı ambalaj kullanın.")
-    if "beden" in str(weaknesses):
-        advice.append("Ürün açıklamalarına detaylı beden tablosu ekleyin.")
-    else:
-        advice.append("Mevcut hizmet kalitesini koruyarak kampanyalarla satışı artırın.")
-
-    return {
-        "strengths": strengths[:5],
-        "weaknesses": weaknesses[:5],
-        "advice": advice[:3]
-    }
+    if stats is None:
+        stats = {}
+
+    with telemetry.span("summary", reviews=len(review_texts)) as span:
+        # 1. Gemini, 2. OpenAI (skipping providers whose circuit is open)
+        result = summary.summarize_with_llm(review_texts, registry, stats) if deadlines.llm_window_open() else None
+        span["mode"] = stats["mode"] = "llm"
+        if result:
+            return result
+
+        # Fallback (Rule Based) if no API
+        span["mode"] = stats["mode"] = "offline"
+        return summary.offline_summary(review_texts)
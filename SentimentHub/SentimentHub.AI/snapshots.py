@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+from result_cache import normalize_text
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots.db")
+
+
+def canonical_product_url(url):
+    """Same product regardless of query string, fragment, host case or the /yorumlar suffix."""
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/")
+    if path.endswith("/yorumlar"):
+        path = path[:-len("/yorumlar")]
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{path}"
+
+
+def review_hash(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class SnapshotStore:
+    """
+    Per-product review snapshots (SQLite): every scraped review with its
+    date, content hash and analysis result, plus the last summary. Lets a
+    refresh scrape only until it reaches known reviews and analyze just the
+    new ones. Reviews are kept newest first: by the run that first saw them,
+    then by their position in that run.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, enabled=True):
+        self.path = path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn = None
+        if enabled:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS products (
+                    key TEXT PRIMARY KEY,
+                    business_name TEXT,
+                    summary TEXT,
+                    review_count INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS reviews (
+                    product_key TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    date TEXT,
+                    result TEXT NOT NULL,
+                    first_seen REAL NOT NULL,
+                    position INTEGER NOT NULL,
+                    PRIMARY KEY (product_key, hash)
+                )""")
+
+    def get_product(self, url):
+        """{business_name, summary, review_count, updated_at} or None if the product was never saved."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT business_name, summary, review_count, updated_at FROM products WHERE key = ?",
+                (canonical_product_url(url),)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "business_name": row[0],
+            "summary": json.loads(row[1]) if row[1] else None,
+            "review_count": row[2],
+            "updated_at": row[3],
+        }
+
+    def known_hashes(self, url):
+        if not self.enabled:
+            return set()
+        with self._lock:
+            rows = self._conn.execute("SELECT hash FROM reviews WHERE product_key = ?",
+                                      (canonical_product_url(url),)).fetchall()
+        return {row[0] for row in rows}
+
+    def reviews(self, url, limit=None):
+        """Stored review results (dicts), newest first; at most `limit` when given."""
+        if not self.enabled:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result FROM reviews WHERE product_key = ? ORDER BY first_seen DESC, position LIMIT ?",
+                (canonical_product_url(url), -1 if limit is None else limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def save(self, url, business_name, results, summary=None):
+        """
+        Upserts review results (dicts with at least "text"; scrape order, newest
+        first) and the product row. Reviews already stored keep their place;
+        their result is refreshed. `summary` replaces the stored one when given.
+        """
+        if not self.enabled:
+            return
+        key = canonical_product_url(url)
+        now = time.time()
+        rows = [(key, review_hash(r["text"]), r.get("date"), json.dumps(r, ensure_ascii=False), now, position)
+                for position, r in enumerate(results)]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("""
+                    INSERT INTO reviews VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(product_key, hash) DO UPDATE SET result = excluded.result, date = excluded.date
+                """, rows)
+                count = self._conn.execute("SELECT COUNT(*) FROM reviews WHERE product_key = ?", (key,)).fetchone()[0]
+                self._conn.execute("""
+                    INSERT INTO products VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        business_name = COALESCE(excluded.business_name, products.business_name),
+                        summary = COALESCE(excluded.summary, products.summary),
+                        review_count = excluded.review_count,
+                        updated_at = excluded.updated_at
+                """, (key, business_name, json.dumps(summary, ensure_ascii=False) if summary else None, count, now, now))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, url):
+        if not self.enabled:
+            return False
+        key = canonical_product_url(url)
+        with self._lock:
+            self._conn.execute("DELETE FROM reviews WHERE product_key = ?", (key,))
+            return self._conn.execute("DELETE FROM products WHERE key = ?", (key,)).rowcount > 0
+
+    def stats(self):
+        products = reviews = 0
+        if self.enabled:
+            with self._lock:
+                products = self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+                reviews = self._conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+        return {"enabled": self.enabled, "products": products, "reviews": reviews}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SnapshotStore(
+                path=os.getenv("SNAPSHOT_PATH", DEFAULT_PATH),
+                enabled=os.getenv("SNAPSHOTS", "1") == "1",
+            )
+        return _store
@@ -0,0 +1,290 @@
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import aspects
+import batching
+import result_cache
+import telemetry
+from providers import PROMPT_VERSION
+from result_cache import normalize_text
+
+# Map step: reviews are sharded into chunks that fit the provider's prompt
+# budget; each chunk is summarized on its own (cached by content) and the
+# partial lists are merged in one reduce call.
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "6000"))
+SUMMARY_MAX_CHUNKS = int(os.getenv("SUMMARY_MAX_CHUNKS", "16"))
+SUMMARY_MAX_WORKERS = int(os.getenv("SUMMARY_MAX_WORKERS", "4"))
+# Content-defined chunk boundaries: a review whose hash is divisible by this
+# ends a chunk, so inserting reviews only changes the chunks around them
+SUMMARY_CHUNK_BOUNDARY = int(os.getenv("SUMMARY_CHUNK_BOUNDARY", "40"))
+SUMMARY_MIN_CHUNK_REVIEWS = 10
+
+# Used as is when all reviews fit in one chunk
+SUMMARY_PROMPT = """
+    Sen uzman bir E-Ticaret Danismanisin. Asagidaki urun yorumlarini analiz ederek satici/ureticiye ozel bir rapor hazirla.
+
+    Ciktiyi SADECE asagidaki JSON formatinda ver:
+    {{
+        "strengths": ["Güçlü yön 1 (Örn: Hızlı kargo)", "Güçlü yön 2"...],
+        "weaknesses": ["Zayıf nokta 1 (Örn: Paketleme kötü)", "Zayıf nokta 2"...],
+        "advice": ["Tavsiye 1 (Örn: Aras Kargo ile çalışmayı bırakın)", "Tavsiye 2"...]
+    }}
+
+    Her liste icin en az 3, en fazla 5 madde olsun. Maddeler kisa, net ve e-ticaret odakli olsun.
+
+    Yorumlar:
+    {reviews}
+    """
+
+MAP_PROMPT = """
+    Sen uzman bir E-Ticaret Danismanisin. Asagida bir urunun yorumlarindan bir bolum var.
+    Bu bolumdeki yorumlara dayanarak satici/ureticiye ozel notlar cikar.
+
+    Ciktiyi SADECE asagidaki JSON formatinda ver:
+    {{
+        "strengths": ["Güçlü yön 1 (Örn: Hızlı kargo)", "Güçlü yön 2"...],
+        "weaknesses": ["Zayıf nokta 1 (Örn: Paketleme kötü)", "Zayıf nokta 2"...],
+        "advice": ["Tavsiye 1 (Örn: Aras Kargo ile çalışmayı bırakın)", "Tavsiye 2"...]
+    }}
+
+    Her liste en fazla 5 madde olsun. Maddeler kisa, net ve e-ticaret odakli olsun.
+
+    Yorumlar:
+    {reviews}
+    """
+
+REDUCE_PROMPT = """
+    Sen uzman bir E-Ticaret Danismanisin. Bir urunun {review_count} yorumu {chunk_count} bolume ayrilip
+    ayri ayri ozetlendi. Asagida her bolumun notlari var. Bunlari tek bir rapor halinde birlestir:
+    tekrar edenleri birlestir, cok bolumde gecenlere oncelik ver.
+
+    Ciktiyi SADECE asagidaki JSON formatinda ver:
+    {{
+        "strengths": ["Güçlü yön 1", "Güçlü yön 2"...],
+        "weaknesses": ["Zayıf nokta 1", "Zayıf nokta 2"...],
+        "advice": ["Tavsiye 1", "Tavsiye 2"...]
+    }}
+
+    Her liste icin en az 3, en fazla 5 madde olsun. Maddeler kisa, net ve e-ticaret odakli olsun.
+
+    Bolum notlari:
+    {partials}
+    """
+
+SUMMARY_KEYS = ("strengths", "weaknesses", "advice")
+
+_map_executor = ThreadPoolExecutor(max_workers=SUMMARY_MAX_WORKERS, thread_name_prefix="summary")
+
+
+def _review_hash(text):
+    return int(hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()[:8], 16)
+
+
+def plan_chunks(texts, input_budget):
+    """
+    Shards reviews into prompt-sized chunks (lists of texts). Boundaries are
+    taken at content-defined points where possible, so a refresh that adds
+    reviews leaves most chunks - and their cached summaries - unchanged.
+    """
+    available = max(input_budget - batching.PROMPT_OVERHEAD_TOKENS, 1)
+    if sum(batching.estimate_tokens(t) for t in texts) <= available:
+        return [list(texts)]  # small products: one call, no reduce step
+    chunks, current, used = [], [], 0
+    for text in texts:
+        cost = batching.estimate_tokens(text)
+        if current and used + cost > available:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(text)
+        used += cost
+        if len(current) >= SUMMARY_MIN_CHUNK_REVIEWS and _review_hash(text) % SUMMARY_CHUNK_BOUNDARY == 0:
+            chunks.append(current)
+            current, used = [], 0
+    if current:
+        chunks.append(current)
+    if len(chunks) > SUMMARY_MAX_CHUNKS:
+        # Bound the cost: keep evenly spaced chunks across the whole corpus
+        step = len(chunks) / SUMMARY_MAX_CHUNKS
+        chunks = [chunks[int(i * step)] for i in range(SUMMARY_MAX_CHUNKS)]
+    return chunks
+
+
+def _clean_summary(payload, limits=(5, 5, 5)):
+    if not isinstance(payload, dict):
+        return None
+    return {key: [str(item) for item in (payload.get(key) or []) if item][:limit]
+            for key, limit in zip(SUMMARY_KEYS, limits)}
+
+
+def _summarize_chunk(chunk, registry, cache_model, template=MAP_PROMPT):
+    cache = result_cache.get_cache()
+    # Cached by chunk content (and prompt kind), so unchanged chunks are free on refresh
+    kind = "full" if template is SUMMARY_PROMPT else "map"
+    with telemetry.span("summary_chunk", kind=kind, reviews=len(chunk)) as span:
+        chunk_key = kind + "\n" + "\n".join(chunk)
+        cached = cache.get(chunk_key, "summary", cache_model, PROMPT_VERSION)
+        span["cached"] = bool(cached)
+        if cached:
+            return cached, True
+        prompt = template.format(reviews=json.dumps(chunk, ensure_ascii=False))
+        partial = _clean_summary(registry.summarize(prompt))
+        span["ok"] = partial is not None
+        if partial:
+            cache.put(chunk_key, partial, "summary", cache_model, PROMPT_VERSION)
+        return partial, False
+
+
+def merge_partials(partials, limits=(5, 5, 3)):
+    """Deterministic reduce: items ranked by how many chunks mention them."""
+    merged = {}
+    for key, limit in zip(SUMMARY_KEYS, limits):
+        counts, first = Counter(), {}
+        for partial in partials:
+            for item in partial.get(key, []):
+                norm = normalize_text(item)
+                counts[norm] += 1
+                first.setdefault(norm, item)
+        merged[key] = [first[norm] for norm, _ in counts.most_common(limit)]
+    return merged
+
+
+def summarize_with_llm(texts, registry, stats=None):
+    """
+    Map-reduce summary over every review. Returns the summary dict or None
+    when no provider answered. `stats` (a dict) receives chunk counts.
+    """
+    configured = registry.configured()
+    if not configured or not texts:
+        return None
+    provider = configured[0]
+    cache_model = "|".join(p.model for p in configured)
+    chunks = plan_chunks(texts, min(provider.input_token_budget, SUMMARY_CHUNK_TOKENS))
+    template = SUMMARY_PROMPT if len(chunks) == 1 else MAP_PROMPT
+
+    results = list(_map_executor.map(telemetry.bind(lambda c: _summarize_chunk(c, registry, cache_model, template)), chunks))
+    partials = [partial for partial, _ in results if partial]
+    if stats is not None:
+        stats.update(chunks=len(chunks), chunks_cached=sum(1 for _, hit in results if hit),
+                     chunks_failed=len(chunks) - len(partials))
+    if not partials:
+        return None
+    if len(partials) == 1:
+        return _clean_summary(partials[0], (5, 5, 5))
+
+    partials_json = json.dumps(partials, ensure_ascii=False)
+    prompt = REDUCE_PROMPT.format(review_count=len(texts), chunk_count=len(partials), partials=partials_json)
+    cache = result_cache.get_cache()
+    # Keyed by the ordered partials, so an unchanged corpus skips the reduce call too
+    reduce_key = f"reduce\n{len(texts)}\n{partials_json}"
+    with telemetry.span("summary_reduce", partials=len(partials)) as span:
+        reduced = cache.get(reduce_key, "summary", cache_model, PROMPT_VERSION)
+        span["cached"] = bool(reduced)
+        if not reduced:
+            reduced = _clean_summary(registry.summarize(prompt))
+            if reduced:
+                cache.put(reduce_key, reduced, "summary", cache_model, PROMPT_VERSION)
+        span["ok"] = reduced is not None
+    if stats is not None:
+        stats["reduce_cached"] = span["cached"]
+    return reduced or merge_partials(partials)
+
+
+# Offline fallback: cue words decide a review's polarity, then term and
+# aspect frequencies are counted per polarity over the whole corpus.
+POSITIVE_CUES = {"güzel", "hızlı", "iyi", "kaliteli", "sağlam", "teşekkür", "teşekkürler", "tavsiye",
+                 "harika", "mükemmel", "beğendim", "memnun", "süper", "hediye"}
+NEGATIVE_CUES = {"kötü", "geç", "yırtık", "özensiz", "kalitesiz", "bozuk", "iade", "berbat", "küçük",
+                 "dar", "eksik", "yanlış", "pişman", "sorun", "açıldı"}
+STOPWORDS = {"ve", "bir", "bu", "çok", "da", "de", "ama", "için", "ile", "gibi", "daha", "en", "ben",
+             "biz", "o", "mi", "mı", "ne", "her", "şu", "olarak", "gayet", "oldu", "geldi", "ürün", "ürünü"}
+
+ASPECT_ADVICE = {
+    "Kargo": "Kargo firması ve teslimat sürelerini gözden geçirin.",
+    "Kalite": "Üretim ve kalite kontrol süreçlerini sıkılaştırın.",
+    "Beden/Uyum": "Ürün açıklamalarına detaylı beden tablosu ekleyin.",
+    "Fiyat/Performans": "Fiyatlandırmayı rakiplerle karşılaştırıp kampanyalarla destekleyin.",
+    "Satıcı": "Müşteri sorularına daha hızlı ve doğru yanıt verin.",
+    "Paketleme": "Paketleme standartlarınızı gözden geçirin, daha korunaklı ambalaj kullanın.",
+}
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def corpus_stats(texts, matcher=None):
+    """
+    Document frequencies over the full corpus, split by cue-word polarity:
+    {"docs", "positive_docs", "negative_docs", "terms": {"positive": Counter,
+    "negative": Counter} (unigrams and bigrams), "aspects": {aspect: Counter(polarity)}}
+    """
+    matcher = matcher or aspects.get_matcher()
+    terms = {"positive": Counter(), "negative": Counter()}
+    aspect_counts = {}
+    polarity_docs = Counter()
+    for text in texts:
+        tokens = _TOKEN_RE.findall(aspects.turkish_lower(text))
+        token_set = set(tokens)
+        pos, neg = len(token_set & POSITIVE_CUES), len(token_set & NEGATIVE_CUES)
+        polarity = "positive" if pos > neg else "negative" if neg > pos else None
+        if polarity:
+            polarity_docs[polarity] += 1
+            content = [t for t in tokens if t not in STOPWORDS and not t.isdigit() and len(t) > 2]
+            terms[polarity].update(set(content) | {f"{a} {b}" for a, b in zip(content, content[1:])})
+        for aspect in {hit["aspect"] for hit in matcher.find(text)}:
+            aspect_counts.setdefault(aspect, Counter())[polarity or "neutral"] += 1
+    return {
+        "docs": len(texts),
+        "positive_docs": polarity_docs["positive"],
+        "negative_docs": polarity_docs["negative"],
+        "terms": terms,
+        "aspects": aspect_counts,
+    }
+
+
+def offline_summary(texts, matcher=None):
+    """Strengths/weaknesses/advice from corpus statistics, when no LLM is available."""
+    stats = corpus_stats(texts, matcher)
+    docs = max(stats["docs"], 1)
+    min_docs = max(2, docs // 50)
+
+    def ranked(polarity):
+        ranked_aspects = sorted(((c[polarity], aspect) for aspect, c in stats["aspects"].items()
+                                 if c[polarity] >= min_docs and c[polarity] >= c["positive" if polarity == "negative" else "negative"]),
+                                reverse=True)
+        return [(aspect, count) for count, aspect in ranked_aspects]
+
+    strengths = [f"{aspect} konusunda olumlu yorumlar öne çıkıyor ({count} yorum, %{100 * count // docs})"
+                 for aspect, count in ranked("positive")[:3]]
+    weaknesses = [f"{aspect} konusunda şikayetler var ({count} yorum, %{100 * count // docs})"
+                  for aspect, count in ranked("negative")[:3]]
+
+    # Frequent phrases fill the rest (bigrams preferred: they read better)
+    for polarity, items, template in (("positive", strengths, '"{}" ifadesi {} olumlu yorumda geçiyor'),
+                                      ("negative", weaknesses, '"{}" ifadesi {} olumsuz yorumda geçiyor')):
+        counter = stats["terms"][polarity]
+        phrases = sorted(((count, " " in term, term) for term, count in counter.items() if count >= min_docs),
+                         reverse=True)
+        used_words = set()
+        for count, _, term in phrases:
+            if len(items) >= 5:
+                break
+            words = term.split()
+            if used_words.intersection(words):
+                continue  # overlapping n-grams of the same phrase
+            used_words.update(words)
+            items.append(template.format(term, count))
+
+    if not strengths: strengths = ["Genel müşteri memnuniyeti yüksek görünüyor"]
+    if not weaknesses: weaknesses = ["Belirgin bir sistemsel sorun tespit edilemedi"]
+
+    advice = [ASPECT_ADVICE[aspect] for aspect, _ in ranked("negative") if aspect in ASPECT_ADVICE][:3]
+    if not advice:
+        advice.append("Mevcut hizmet kalitesini koruyarak kampanyalarla satışı artırın.")
+
+    return {
+        "strengths": strengths[:5],
+        "weaknesses": weaknesses[:5],
+        "advice": advice[:3]
+    }
@@ -0,0 +1,387 @@
+import bisect
+import contextvars
+import cProfile
+import os
+import pstats
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+# Per-request tracing and Prometheus metrics for the AI service.
+#
+# Every HTTP request (TraceMiddleware) and every background job runs inside a
+# Trace that collects one span per pipeline stage (scrape, dedup, LLM call,
+# summary chunk, local fallback, ...). Spans also feed the stage latency
+# histogram exported on /metrics. The trace lives in a context variable;
+# work handed to other threads must go through bind() to stay attached.
+
+TRACE_HISTORY = int(os.getenv("TRACE_HISTORY", "100"))
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "2000"))
+# PROFILING=1 lets a request ask for a profile with "X-Profile: 1" or ?profile=1
+PROFILING = os.getenv("PROFILING", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"))
+PROFILE_TOP = 60
+
+REQUEST_ID_HEADER = "x-request-id"
+# Scraped by Prometheus / polled by the load balancer: counted, not traced
+UNTRACED_PATHS = {"/metrics", "/health"}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 200)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * (len(self.buckets) + 2)
+            if slot < len(self.buckets):
+                data[slot] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, data in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, data):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, [('le', _format_number(float(bound)))])} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, [('le', '+Inf')])} {data[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_number(float(data[-2]))}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {data[-1]}")
+        return lines
+
+
+REQUESTS = Counter("sentimenthub_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+REQUEST_SECONDS = Histogram("sentimenthub_request_duration_seconds",
+                            "HTTP request latency until the last body byte (streams included)", ("method", "route"))
+JOB_SECONDS = Histogram("sentimenthub_job_duration_seconds", "Background analysis job latency", ("status",))
+STAGE_SECONDS = Histogram("sentimenthub_stage_duration_seconds", "Latency of one pipeline stage", ("stage",))
+STAGE_ERRORS = Counter("sentimenthub_stage_errors_total", "Pipeline stages that raised", ("stage", "error"))
+LLM_CALLS = Counter("sentimenthub_llm_calls_total", "LLM requests by provider and outcome", ("provider", "outcome"))
+LLM_MALFORMED = Counter("sentimenthub_llm_malformed_total",
+                        "Classification answers that were not the JSON list asked for", ("provider",))
+LLM_TOKENS = Counter("sentimenthub_llm_tokens_total", "Tokens reported by the LLM providers", ("provider", "direction"))
+LLM_RETRIES = Counter("sentimenthub_llm_retries_total", "LLM requests retried after a 429/5xx", ("provider", "status"))
+LLM_BATCH_REVIEWS = Histogram("sentimenthub_llm_batch_reviews", "Reviews per classification call",
+                              ("provider",), buckets=SIZE_BUCKETS)
+CACHE_LOOKUPS = Counter("sentimenthub_cache_lookups_total", "Result cache lookups", ("provider", "result"))
+REVIEWS = Counter("sentimenthub_reviews_total",
+                  "Reviews by how their result was obtained (scraped counts every scraped review)", ("source",))
+
+METRICS = [REQUESTS, REQUEST_SECONDS, JOB_SECONDS, STAGE_SECONDS, STAGE_ERRORS, LLM_CALLS, LLM_MALFORMED, LLM_TOKENS,
+           LLM_RETRIES, LLM_BATCH_REVIEWS, CACHE_LOOKUPS, REVIEWS]
+
+
+def render_metrics():
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class Trace:
+    """Spans recorded for one request or job; shared by every thread working on it."""
+
+    def __init__(self, name, request_id=None, profile=False):
+        self.name = name
+        self.request_id = request_id or uuid.uuid4().hex[:16]
+        self.profile = profile
+        self.started_at = time.time()
+        self.status = None
+        self.duration_s = None
+        self.spans = []
+        self.dropped_spans = 0
+        self.profile_path = None
+        self._profile_stats = None
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_span(self, record):
+        with self._lock:
+            if len(self.spans) < TRACE_MAX_SPANS:
+                self.spans.append(record)
+            else:
+                self.dropped_spans += 1
+
+    def add_profile(self, profiler):
+        with self._lock:
+            if self._profile_stats is None:
+                self._profile_stats = pstats.Stats(profiler)
+            else:
+                self._profile_stats.add(profiler)
+
+    def stage_totals(self):
+        """{stage: {count, total_ms}}; overlapping spans (parallel batches) add up."""
+        totals = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            entry = totals.setdefault(span["stage"], {"count": 0, "total_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + span["duration_ms"], 3)
+        return totals
+
+    def summary(self):
+        return {
+            "request_id": self.request_id,
+            "name": self.name,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_s": self.duration_s,
+            "spans": len(self.spans),
+        }
+
+    def to_dict(self):
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            **self.summary(),
+            "stages": self.stage_totals(),
+            "span_list": spans,
+            "dropped_spans": self.dropped_spans,
+            "profile": self.profile_path,
+        }
+
+    def _write_profile(self):
+        if self._profile_stats is None:
+            return
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, self.request_id)
+        self._profile_stats.dump_stats(base + ".prof")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            self._profile_stats.stream = f
+            self._profile_stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+        self.profile_path = base + ".prof"
+        log(f"Profile written to {self.profile_path} (.txt alongside)")
+
+
+_current = contextvars.ContextVar("sentimenthub_trace", default=None)
+_recent = deque(maxlen=TRACE_HISTORY)
+_recent_lock = threading.Lock()
+_thread = threading.local()
+
+
+def current():
+    return _current.get()
+
+
+def request_id():
+    trace = _current.get()
+    return trace.request_id if trace else None
+
+
+def log(message, request_id=None):
+    """
+    print() prefixed with the current request id, so interleaved requests can
+    be told apart. Pass `request_id` when logging outside the trace (e.g. a
+    job's outcome, after its trace has finished).
+    """
+    if request_id is None:
+        trace = _current.get()
+        request_id = trace.request_id if trace else None
+    print(f"[{request_id}] {message}" if request_id else message)
+
+
+def start_trace(name, request_id=None, profile=False):
+    """Makes a new trace current; returns (trace, token) for finish_trace()."""
+    trace = Trace(name, request_id=request_id, profile=profile and PROFILING)
+    return trace, _current.set(trace)
+
+
+def finish_trace(trace, token, status=None):
+    trace.duration_s = round(time.perf_counter() - trace._t0, 4)
+    trace.status = status
+    try:
+        trace._write_profile()
+    except Exception as e:
+        log(f"Profile dump failed: {e}")
+    _current.reset(token)
+    with _recent_lock:
+        _recent.append(trace)
+
+
+@contextmanager
+def trace(name, request_id=None, profile=False):
+    """Trace for work outside an HTTP request (background jobs)."""
+    current_trace, token = start_trace(name, request_id, profile)
+    status = "ok"
+    try:
+        yield current_trace
+    except BaseException as e:
+        status = type(e).__name__
+        raise
+    finally:
+        finish_trace(current_trace, token, status)
+        JOB_SECONDS.observe(current_trace.duration_s, status=status)
+
+
+def recent_traces():
+    with _recent_lock:
+        return list(_recent)
+
+
+def find_trace(request_id):
+    with _recent_lock:
+        for trace in reversed(_recent):
+            if trace.request_id == request_id:
+                return trace
+    return None
+
+
+def bind(fn):
+    """
+    Wraps `fn` to run in the caller's context (current trace included) from
+    another thread. Each call gets its own copy, so the wrapper can be
+    submitted many times or used with executor.map.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+
+@contextmanager
+def span(stage, **attrs):
+    """
+    Times one pipeline stage. Yields the attrs dict so the stage can add
+    counts (reviews, cache hits, provider...) before it ends. Recorded into
+    the current trace when there is one and always into the stage histogram.
+    While a profiled trace is current, the outermost span of each thread
+    runs under cProfile and its stats are merged into the trace's profile.
+    """
+    trace = _current.get()
+    profiler = None
+    if trace is not None and trace.profile and getattr(_thread, "profiler", None) is None:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            _thread.profiler = profiler
+        except ValueError:  # another profiler already owns this interpreter/thread
+            profiler = None
+    started = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs["error"] = type(e).__name__
+        STAGE_ERRORS.inc(stage=stage, error=attrs["error"])
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        if profiler is not None:
+            profiler.disable()
+            _thread.profiler = None
+            trace.add_profile(profiler)
+        STAGE_SECONDS.observe(duration, stage=stage)
+        if trace is not None:
+            trace.add_span({
+                "stage": stage,
+                "start_ms": round((started - trace._t0) * 1000, 3),
+                "duration_ms": round(duration * 1000, 3),
+                "thread": threading.current_thread().name,
+                **attrs,
+            })
+
+
+def _route_of(scope):
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    return "unmatched"  # raw paths of 404s would explode the label set
+
+
+class TraceMiddleware:
+    """
+    Plain ASGI middleware (BaseHTTPMiddleware would end the trace before a
+    streamed body is sent). Takes the request id from X-Request-ID or makes
+    one, echoes it in the response and records the request metrics once the
+    last body chunk has gone out.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        incoming_id = headers.get(REQUEST_ID_HEADER.encode(), b"").decode("latin-1").strip()[:64] or None
+        traced = scope["path"] not in UNTRACED_PATHS
+        profile = headers.get(b"x-profile") == b"1" or b"profile=1" in scope.get("query_string", b"")
+        started = time.perf_counter()
+        current_trace, token = start_trace(f"{scope['method']} {scope['path']}", incoming_id, profile) if traced else (None, None)
+        status = {"code": 500}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if current_trace is not None:
+                    message["headers"] = list(message.get("headers") or []) + [
+                        (REQUEST_ID_HEADER.encode(), current_trace.request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            route = _route_of(scope)
+            REQUESTS.inc(method=scope["method"], route=route, status=status["code"])
+            REQUEST_SECONDS.observe(time.perf_counter() - started, method=scope["method"], route=route)
+            if current_trace is not None:
+                current_trace.name = f"{scope['method']} {route}"
+                finish_trace(current_trace, token, status["code"])
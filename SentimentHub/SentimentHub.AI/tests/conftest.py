@@ -0,0 +1,88 @@
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "..", "benchmarks"))
+
+# Set before the service modules are imported (they read settings at import
+# time). Empty keys keep .env credentials out of the tests; nothing is cached
+# or stored on disk and no model is downloaded.
+os.environ.update({
+    "GOOGLE_API_KEY": "",
+    "OPENAI_API_KEY": "",
+    "SENTIMENT_CACHE": "0",
+    "SNAPSHOTS": "0",
+    "CHROME_POOL_PRELAUNCH": "0",
+    "HF_HUB_OFFLINE": "1",
+    "GEMINI_RPM": "6000",  # the fake LLM server has no quota
+    "OPENAI_RPM": "6000",
+})
+
+import pytest  # noqa: E402
+
+from fake_llm_server import FakeLLMServer  # noqa: E402
+from fixture_server import FixtureServer, generate_varied_reviews  # noqa: E402
+
+
+@pytest.fixture
+def site(monkeypatch):
+    """Fixture server with 60 generated reviews; the HTTP scraper backend reads from it."""
+    import scraper
+    from http_scraper import HttpBackend
+
+    server = FixtureServer(reviews=generate_varied_reviews(60, seed=3)).start()
+    monkeypatch.setitem(scraper.BACKENDS, "http", HttpBackend(api_template=server.api_template))
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def snapshot_store(tmp_path, monkeypatch):
+    import snapshots
+
+    store = snapshots.SnapshotStore(path=str(tmp_path / "snapshots.db"))
+    monkeypatch.setattr(snapshots, "get_store", lambda: store)
+    return store
+
+
+@pytest.fixture
+def local_model(monkeypatch):
+    """Stands in for the Hugging Face model, which is not downloaded in tests."""
+    import sentiment
+
+    calls = []
+
+    def predict(texts):
+        calls.append(list(texts))
+        return [{"sentiment": "Neutral", "score": 0.5, "aspects": []} for _ in texts]
+
+    monkeypatch.setattr(sentiment, "analyze_local_batch", predict)
+    return calls
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """
+    Factory: llm(provider="openai", **FakeLLMServer kwargs) starts a fake LLM
+    server and makes a one-provider registry pointing at it the one sentiment uses.
+    """
+    import providers
+    import sentiment
+
+    servers = []
+
+    def start(provider="openai", **kwargs):
+        server = FakeLLMServer(**kwargs).start()
+        servers.append(server)
+        if provider == "openai":
+            client = providers.OpenAIProvider("fake", "gpt-test", base_url=server.openai_base_url)
+        else:
+            client = providers.GeminiProvider("fake", "gemini-test", base_url=server.gemini_endpoint)
+        monkeypatch.setattr(sentiment, "registry", providers.ProviderRegistry([client]))
+        server.provider = client
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
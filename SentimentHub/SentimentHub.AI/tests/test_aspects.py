@@ -0,0 +1,83 @@
+import pytest
+import aspects
+
+
+matcher = aspects.AspectMatcher()
+
+
+def found(text):
+    return [(hit["aspect"], hit["term"]) for hit in matcher.find(text)]
+
+
+@pytest.mark.parametrize("text", [
+    "Güneş gözlüğü çok şık duruyor.",
+    "Gündüz kullanmak için aldım.",
+    "Ürünle ilgili bir şey söyleyemem.",
+    "Değerlendirmemi sonra yazacağım.",
+    "Ürün tamamen anlatıldığı gibi.",
+])
+def test_unrelated_words_sharing_a_stem_do_not_match(text):
+    assert found(text) == []
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Ertesi gün elimdeydi.", [("Kargo", "gün")]),
+    ("İki günde geldi.", [("Kargo", "günde")]),
+    ("Paketleme çok özensizdi.", [("Kargo", "Paketleme")]),
+    ("Satıcı hiç ilgilenmedi.", [("Satıcı", "Satıcı"), ("Satıcı", "ilgilenmedi")]),
+    ("Fiyatına göre değer.", [("Fiyat/Performans", "Fiyatına"), ("Fiyat/Performans", "değer")]),
+    ("Beden tam oldu.", [("Beden/Uyum", "Beden"), ("Beden/Uyum", "tam oldu")]),
+])
+def test_listed_forms_match(text, expected):
+    assert found(text) == expected
+
+
+def test_turkish_capitals_are_lowered():
+    # "I" is dotless: "KALITE" lowers to "kalıte", not "kalite"
+    assert found("KALİTE SÜPER") == [("Kalite", "KALİTE")]
+    assert found("KALITE") == []
+    assert aspects.turkish_lower("IĞDIR İZMİR") == "ığdır izmir"
+
+
+def test_multi_word_terms_allow_any_whitespace():
+    assert found("Kargo geç\n  geldi") == [("Kargo", "Kargo"), ("Kargo", "geç\n  geldi")]
+
+
+def test_spans_point_into_the_original_text():
+    text = "Ürün güzel. KARGOSU ise İKİ gün sürdü."
+    for hit in matcher.find(text):
+        assert text[hit["start"]:hit["end"]] == hit["term"]
+    assert [hit["term"] for hit in matcher.find(text)] == ["KARGOSU", "gün"]
+
+
+def test_sentence_spans():
+    text = "Kumaş iyi. Kargo geç geldi!\nBeden dar"
+    assert [text[s:e] for s, e in aspects.sentence_spans(text)] == ["Kumaş iyi.", " Kargo geç geldi!", "Beden dar"]
+    assert aspects.sentence_spans("") == []
+
+
+def test_batch_labels_each_distinct_sentence_once():
+    calls = []
+
+    def sentiment_fn(sentences):
+        calls.append(list(sentences))
+        return [{"sentiment": "Negative" if "geç" in s else "Positive", "score": 0.9} for s in sentences]
+
+    texts = ["Kumaş kaliteli. Kargo geç geldi.", "Kargo geç geldi.", "Kumaş kaliteli.", "Güzel."]
+    results = aspects.extract_aspects_batch(texts, matcher, sentiment_fn)
+    assert calls == [["Kumaş kaliteli.", "Kargo geç geldi."]]
+    assert results[0] == [
+        {"aspect": "Kalite", "sentiment": "Positive", "confidence": 0.9, "spans": [[0, 5], [6, 14]]},
+        {"aspect": "Kargo", "sentiment": "Negative", "confidence": 0.9, "spans": [[16, 21], [22, 31]]},
+    ]
+    assert results[1] == [{"aspect": "Kargo", "sentiment": "Negative", "confidence": 0.9, "spans": [[0, 5], [6, 15]]}]
+    assert results[3] == []
+
+
+def test_most_confident_sentence_labels_the_aspect():
+    scores = {"Kargo hızlıydı.": ("Positive", 0.6), "Ama kargo kutusu ezik.": ("Negative", 0.95)}
+    results = aspects.extract_aspects_batch(["Kargo hızlıydı. Ama kargo kutusu ezik."], matcher,
+                                            lambda sentences: [dict(zip(("sentiment", "score"), scores[s]))
+                                                               for s in sentences])
+    assert results == [[{"aspect": "Kargo", "sentiment": "Negative", "confidence": 0.95,
+                         "spans": [[0, 5], [6, 14], [20, 25]]}]]
@@ -0,0 +1,118 @@
+import pytest
+
+import batching
+import result_cache
+import sentiment
+
+
+class FakeProvider:
+    name = "fake"
+    model = "fake-model"
+
+
+def positive(texts):
+    return [{"sentiment": "Positive", "score": 0.9} for _ in texts]
+
+
+class Scripted:
+    """classify_fn that truncates any batch longer than `fits` reviews, like a cut-off answer."""
+
+    def __init__(self, fits=None, provider=FakeProvider()):
+        self.fits = fits
+        self.provider = provider
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        if self.provider is None:
+            return None, None, None
+        results = positive(texts)
+        if self.fits is not None and len(texts) > self.fits:
+            results = results[:self.fits]  # answer stopped early
+        return results, self.provider, {"input_tokens": 10, "output_tokens": 5}
+
+
+def texts(n):
+    return [f"review {i}" for i in range(n)]
+
+
+def test_valid_answer_is_a_single_call():
+    classify = Scripted()
+    stats = []
+    results = batching.classify_adaptive(texts(8), classify, stats)
+    assert results == positive(texts(8))
+    assert len(classify.calls) == 1
+    assert stats[0]["ok"] and stats[0]["provider"] == "fake"
+
+
+def test_truncated_answer_is_retried_in_halves():
+    classify = Scripted(fits=4)
+    results = batching.classify_adaptive(texts(8), classify, max_depth=2)
+    assert results == positive(texts(8))
+    assert [len(c) for c in classify.calls] == [8, 4, 4]
+
+
+def test_split_depth_is_capped():
+    classify = Scripted(fits=1)
+    stats = []
+    results = batching.classify_adaptive(texts(16), classify, stats, max_depth=2)
+    # 16 -> 8+8 -> 4+4+4+4, then those reviews are left for the local model
+    assert [len(c) for c in classify.calls] == [16, 8, 4, 4, 8, 4, 4]
+    assert results == [None] * 16
+    assert not any(record["ok"] for record in stats)
+
+
+def test_partially_recovered_batch_keeps_alignment():
+    classify = Scripted(fits=3)
+    results = batching.classify_adaptive(texts(8), classify, max_depth=1)
+    assert results == [None] * 8  # halves of 4 still do not fit
+    results = batching.classify_adaptive(texts(6), classify, max_depth=1)
+    assert results == positive(texts(6))
+
+
+def test_no_provider_is_not_retried():
+    classify = Scripted(provider=None)
+    assert batching.classify_adaptive(texts(8), classify) == [None] * 8
+    assert len(classify.calls) == 1
+
+
+def test_on_valid_sees_only_validated_answers():
+    classify = Scripted(fits=2)
+    accepted = []
+    batching.classify_adaptive(texts(4), classify, max_depth=1,
+                               on_valid=lambda t, r, p: accepted.append((list(t), p.name)))
+    assert accepted == [(texts(4)[:2], "fake"), (texts(4)[2:], "fake")]
+
+
+class FakeRegistry:
+    def __init__(self, answers):
+        self.answers = list(answers)
+
+    def classify_batch(self, texts):
+        results = self.answers.pop(0)
+        return results, FakeProvider(), {}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = result_cache.ResultCache(path=str(tmp_path / "cache.db"))
+    monkeypatch.setattr(result_cache, "get_cache", lambda: cache)
+    return cache
+
+
+def test_rejected_answer_is_not_cached(cache, monkeypatch):
+    # Right length but one entry has no sentiment: the batch fails validation
+    bad = [{"sentiment": "Positive", "score": 0.9}, {"score": 0.1}]
+    monkeypatch.setattr(sentiment, "registry", FakeRegistry([bad, [], []]))
+    monkeypatch.setattr(batching, "MAX_SPLIT_DEPTH", 1)
+    assert sentiment.analyze_sentiment_with_api(["iyi", "kötü"]) is None
+    assert cache.get_many(["iyi", "kötü"], "fake", "fake-model", sentiment.PROMPT_VERSION) == {}
+    assert cache.writes == 0
+
+
+def test_validated_answer_is_cached(cache, monkeypatch):
+    good = [{"sentiment": "Positive", "score": 0.9}, {"sentiment": "Negative", "score": 0.8}]
+    monkeypatch.setattr(sentiment, "registry", FakeRegistry([good]))
+    assert sentiment.analyze_sentiment_with_api(["iyi", "kötü"]) == good
+    cached = cache.get_many(["iyi", "kötü"], "fake", "fake-model", sentiment.PROMPT_VERSION)
+    assert cached == {"iyi": good[0], "kötü": good[1]}
@@ -0,0 +1,80 @@
+import comparison
+from aggregates import SENTIMENT_POINTS
+from main import AnalyzeResponse, AspectResult, ReviewResult
+
+
+def review(sentiment, *aspects):
+    """aspects: (name, sentiment) pairs."""
+    return ReviewResult(author="A** B**", text="yorum", rating=4, date="2026-10-01", sentiment=sentiment,
+                        confidence=0.9, aspects=[AspectResult(aspect=name, sentiment=label, confidence=0.8)
+                                                 for name, label in aspects])
+
+
+def product(name, *reviews):
+    score = sum(SENTIMENT_POINTS.get(r.sentiment, 0.0) for r in reviews) / len(reviews) if reviews else 0
+    return AnalyzeResponse(reviews=list(reviews), total_reviews=len(reviews), overall_sentiment_score=score,
+                           business_name=name)
+
+
+A = product("Mağaza A",
+            review("Positive", ("Kargo", "Positive"), ("Kalite", "Positive")),
+            review("Positive", ("Kargo", "Positive")),
+            review("Negative", ("Kargo", "Negative"), ("Beden/Uyum", "Negative")),
+            review("Neutral", ("Kalite", "Neutral")))
+B = product("Mağaza B",
+            review("Negative", ("Kargo", "Negative")),
+            review("Negative", ("Kargo", "Negative"), ("Kalite", "Positive")),
+            review("Positive", ("Kalite", "Positive")))
+
+
+def test_overview_rates():
+    overview = comparison.product_overview(A)
+    assert overview == {"business_name": "Mağaza A", "total_reviews": 4, "overall_sentiment_score": 0.625,
+                        "positive_rate": 50.0, "negative_rate": 25.0}
+
+
+def test_aspect_counts():
+    counts = comparison.aspect_counts(A)
+    assert counts["Kargo"] == {"mentions": 3, "positive": 2, "negative": 1, "neutral": 0}
+    assert counts["Kalite"] == {"mentions": 2, "positive": 1, "negative": 0, "neutral": 1}
+
+
+def test_aspect_score_uses_the_overall_scale():
+    kalite = comparison.compare_products({"a": A})["aspects"][1]
+    assert kalite["aspect"] == "Kalite"
+    assert kalite["products"]["a"]["score"] == 0.75  # Positive 1 + Neutral 0.5 over 2 mentions
+
+
+def test_compare_ranks_aspects_and_picks_the_best():
+    compared = comparison.compare_products({"a": A, "b": B})
+    assert compared["best_overall"] == "a"
+    # Sorted by total mentions: Kargo 5, Kalite 4, Beden/Uyum 1
+    assert [a["aspect"] for a in compared["aspects"]] == ["Kargo", "Kalite", "Beden/Uyum"]
+    kargo, kalite, beden = compared["aspects"]
+    assert kargo["best"] == "a"
+    assert kargo["products"]["b"] == {"mentions": 2, "positive": 0, "negative": 2, "neutral": 0, "score": 0.0}
+    assert kalite["best"] == "b"  # 1.0 against 0.75
+    # Only A mentions it: B gets zero counts, and there is nothing to compare
+    assert beden["products"]["b"]["mentions"] == 0
+    assert beden["best"] is None
+
+
+def test_min_mentions_excludes_thin_evidence():
+    compared = comparison.compare_products({"a": A, "b": B}, min_mentions=3)
+    kargo, kalite, _ = compared["aspects"]
+    assert kargo["best"] is None  # B has 2 Kargo mentions: one eligible product is no comparison
+    assert kalite["best"] is None
+
+
+def test_single_product_has_no_winner():
+    compared = comparison.compare_products({"a": A})
+    assert compared["best_overall"] is None
+    assert all(a["best"] is None for a in compared["aspects"])
+
+
+def test_empty_product():
+    compared = comparison.compare_products({"a": A, "empty": product("Boş")})
+    assert compared["overview"]["empty"]["total_reviews"] == 0
+    assert compared["overview"]["empty"]["positive_rate"] == 0.0
+    assert compared["aspects"][0]["products"]["empty"]["score"] == 0.0
+    assert compared["best_overall"] == "a"
@@ -0,0 +1,146 @@
+import time
+
+import pytest
+
+import deadlines
+import driver_pool
+import scraper
+
+
+class RecordingBackend:
+    def __init__(self, chunks=()):
+        self.chunks = list(chunks)
+        self.calls = 0
+
+    def stream(self, url, max_reviews=100, should_stop=None, stats=None):
+        self.calls += 1
+        yield from self.chunks
+
+
+def busy_pool(acquire_timeout=300):
+    pool = driver_pool.DriverPool(size=1, acquire_timeout=acquire_timeout)
+    assert pool._slots.acquire(blocking=False)  # the only slot is taken by another scrape
+    return pool
+
+
+def test_pool_acquire_honours_explicit_timeout():
+    pool = busy_pool()
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+    assert time.monotonic() - started < 1
+
+
+def test_selenium_waits_for_a_browser_only_until_the_scrape_cutoff(monkeypatch):
+    monkeypatch.setattr(driver_pool, "get_pool", lambda: busy_pool())
+    started = time.monotonic()
+    with deadlines.scope(500):
+        chunks = list(scraper.SeleniumBackend().stream("https://example.com/p-1"))
+    assert chunks == []
+    assert time.monotonic() - started < 1
+
+
+def test_selenium_pool_timeout_still_raises_without_deadline(monkeypatch):
+    monkeypatch.setattr(driver_pool, "get_pool", lambda: busy_pool(acquire_timeout=0.05))
+    with pytest.raises(TimeoutError):
+        list(scraper.SeleniumBackend().stream("https://example.com/p-1"))
+
+
+def test_auto_skips_selenium_fallback_after_scrape_cutoff(monkeypatch):
+    selenium = RecordingBackend([([{"text": "x"}], "Shop")])
+    monkeypatch.setitem(scraper.BACKENDS, "http", RecordingBackend())
+    monkeypatch.setitem(scraper.BACKENDS, "selenium", selenium)
+    with deadlines.scope(100):
+        time.sleep(0.06)  # past the scrape cutoff (40% of the budget)
+        chunks = list(scraper.stream_trendyol_reviews("https://example.com/p-1", backend="auto"))
+    assert chunks == []
+    assert selenium.calls == 0
+
+
+def test_auto_falls_back_to_selenium_inside_the_window(monkeypatch):
+    selenium = RecordingBackend([([{"text": "x"}], "Shop")])
+    monkeypatch.setitem(scraper.BACKENDS, "http", RecordingBackend())
+    monkeypatch.setitem(scraper.BACKENDS, "selenium", selenium)
+    with deadlines.scope(60_000):
+        chunks = list(scraper.stream_trendyol_reviews("https://example.com/p-1", backend="auto"))
+    assert chunks == [([{"text": "x"}], "Shop")]
+    assert selenium.calls == 1
+
+
+def test_batch_products_share_the_batch_deadline(monkeypatch):
+    import main
+
+    seen = []
+
+    def run_analysis(url, limit, backend=None, incremental=False):
+        seen.append((url, deadlines.current()))
+        raise RuntimeError("not analyzed in this test")
+
+    monkeypatch.setattr(main, "run_analysis", run_analysis)
+    urls = [f"https://example.com/p-{i}" for i in range(3)]
+    response = main.run_batch_analysis(urls, 10, deadline_ms=5000)
+    assert [p.error for p in response.products] == ["not analyzed in this test"] * 3
+    shared = {id(deadline) for _, deadline in seen}
+    assert len(seen) == 3 and len(shared) == 1
+    assert seen[0][1].budget_ms == 5000
+
+    seen.clear()
+    main.run_batch_analysis(urls, 10)
+    assert [deadline for _, deadline in seen] == [None] * 3
+
+
+def test_without_deadline_everything_comes_from_the_llm(site, llm, local_model):
+    import main
+
+    llm(latency_ms=10)
+    result = main.run_analysis(site.product_url, 60, backend="http")
+    assert result.deadline is None
+    assert result.total_reviews == 60
+    assert {r.tier for r in result.reviews} == {"llm"}
+    assert not any(local_model)  # the local model got nothing to do
+
+
+def test_slow_llm_degrades_to_local_model_and_keyword_summary(site, llm, local_model):
+    import main
+
+    server = llm(latency_ms=10_000)
+    started = time.monotonic()
+    result = main.run_analysis(site.product_url, 60, backend="http", deadline_ms=3000)
+    elapsed = time.monotonic() - started
+    assert elapsed < 3.5
+    report = result.deadline
+    assert report.met and report.scrape == "complete"
+    assert "llm" not in report.reviews and sum(report.reviews.values()) == 60
+    assert report.summary == "keyword" and result.summary is not None
+    assert server.requests >= 1  # the LLM was tried, then cut off at the LLM cutoff
+    # A cut-off call is not a provider failure
+    assert server.provider.breaker.state == "closed"
+
+
+def test_no_llm_window_skips_the_llm_entirely(site, llm, local_model):
+    import main
+
+    server = llm(latency_ms=10)
+    # 1s budget leaves less than DEADLINE_MIN_LLM_MS before the LLM cutoff
+    result = main.run_analysis(site.product_url, 60, backend="http", deadline_ms=1000)
+    assert result.deadline.met
+    assert server.requests == 0
+    assert "llm" not in result.deadline.reviews
+
+
+def test_slow_pages_give_a_partial_scrape(llm, local_model, monkeypatch):
+    import main
+    from fixture_server import FixtureServer, generate_varied_reviews
+    from http_scraper import HttpBackend
+
+    llm(latency_ms=10)
+    server = FixtureServer(reviews=generate_varied_reviews(600, seed=5), latency_ms=300).start()
+    try:
+        monkeypatch.setitem(scraper.BACKENDS, "http", HttpBackend(api_template=server.api_template, concurrency=2))
+        result = main.run_analysis(server.product_url, 600, backend="http", deadline_ms=2500)
+    finally:
+        server.stop()
+    report = result.deadline
+    assert report.scrape == "partial"
+    assert 0 < result.total_reviews < 600
+    assert report.met
@@ -0,0 +1,48 @@
+import pytest
+
+import dedup
+
+
+def duplicates(*texts):
+    return dedup.cluster_texts(list(texts), enabled=True).stats()["duplicates"]
+
+
+def test_punctuation_and_case_variants_merge():
+    assert duplicates("Ürün çok güzel, beğendim. Kargo hızlıydı teşekkürler!",
+                      "ürün çok güzel beğendim kargo hızlıydı teşekkürler") == 1
+
+
+def test_near_duplicate_with_an_extra_word_merges():
+    assert duplicates("Ürün çok güzel beğendim kargo hızlıydı teşekkürler",
+                      "Ürün çok güzel beğendim kargo hızlıydı teşekkürler satıcıya") == 1
+
+
+@pytest.mark.parametrize("positive, negated", [
+    ("Kargo hızlı geldi ürün güzel teşekkürler satıcıya",
+     "Kargo hızlı geldi ürün güzel değil teşekkürler satıcıya"),
+    ("Beden tam oldu", "Beden tam olmadı"),
+    ("Ürün çok güzel beğendim kargo hızlıydı teşekkürler",
+     "Ürün çok güzel beğenmedim kargo hızlıydı teşekkürler"),
+    ("Kumaşı kaliteli rengi fotoğraftaki gibi tavsiye ederim",
+     "Kumaşı kaliteli rengi fotoğraftaki gibi tavsiye etmiyorum"),
+])
+def test_negated_pairs_stay_apart(positive, negated):
+    assert duplicates(positive, negated) == 0
+
+
+def test_negation_of_a_different_word_stays_apart():
+    assert duplicates("Ürün güzel değil kargo hızlı geldi teşekkürler satıcıya",
+                      "Ürün güzel kargo hızlı değil geldi teşekkürler satıcıya") == 0
+
+
+def test_negations_ignore_words_that_only_look_negated():
+    words = dedup.normalize("Tamamen memnunum, malzeme mükemmel, zamanında geldi olmalı").split()
+    assert dedup.negations(words) == ()
+
+
+def test_representative_is_first_in_scrape_order():
+    first = "Ürün çok güzel beğendim kargo hızlıydı teşekkürler"
+    second = "Ürün çok güzel beğendim, kargo hızlıydı teşekkürler!!"
+    clusters = dedup.cluster_texts([first, second, "Beden tam olmadı"], enabled=True)
+    assert clusters.representative[second] == first
+    assert clusters.representatives == [first, "Beden tam olmadı"]
@@ -0,0 +1,175 @@
+import threading
+import pytest
+import deadlines
+import dispatcher
+
+
+class FakeClock:
+    """Stands in for the `time` module: sleep() advances monotonic() instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class HttpError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        if retry_after is not None:
+            self.response = type("Response", (), {"headers": {"retry-after": str(retry_after)}})()
+
+
+class Flaky:
+    """Raises the given errors in turn, then returns "ok"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(dispatcher, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def unlimited(monkeypatch):
+    """Provider name without a limiter: retry tests only record the backoff sleeps."""
+    monkeypatch.delitem(dispatcher.LIMITERS, "fake", raising=False)
+    return "fake"
+
+
+def test_bucket_allows_a_burst_then_the_rate(clock):
+    bucket = dispatcher.TokenBucket(rate=2, capacity=3)
+    assert all(bucket.acquire() for _ in range(3))
+    assert clock.sleeps == []
+    assert bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]  # one token at 2/s
+    clock.now += 10
+    assert all(bucket.acquire() for _ in range(3))  # refilled, but never above capacity
+    assert len(clock.sleeps) == 1
+
+
+def test_bucket_gives_up_without_taking_tokens(clock):
+    bucket = dispatcher.TokenBucket(rate=1, capacity=1)
+    assert bucket.acquire()
+    assert not bucket.acquire(timeout=0.5)
+    assert clock.sleeps == []  # knew up front the wait was too long
+    clock.now += 1
+    assert bucket.acquire(timeout=0)
+
+
+def test_limiter_caps_concurrency(clock):
+    limiter = dispatcher.ProviderLimiter("fake", max_concurrency=2, requests_per_minute=60)
+    assert limiter.acquire(timeout=0) and limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0)
+    limiter.release()
+    clock.now += 1  # a request token, so only the slot is in question
+    assert limiter.acquire(timeout=0)
+
+
+def test_limiter_returns_the_slot_when_the_rate_runs_out(clock):
+    limiter = dispatcher.ProviderLimiter("fake", max_concurrency=2, requests_per_minute=6)
+    assert limiter.acquire(timeout=0) and limiter.acquire(timeout=0)  # burst of 2
+    limiter.release()
+    limiter.release()
+    assert not limiter.acquire(timeout=1)  # next token in 10s
+    clock.now += 10
+    assert limiter.acquire(timeout=0) and limiter._slots.acquire(blocking=False)  # the slot came back
+
+
+def test_retries_429_and_5xx_with_growing_backoff(unlimited, clock, monkeypatch):
+    monkeypatch.setattr(dispatcher.random, "uniform", lambda low, high: high)
+    fn = Flaky(HttpError(429), HttpError(503), HttpError(500))
+    assert dispatcher.call_with_retry(unlimited, fn, max_attempts=4, base_delay=0.5, max_delay=3.0) == "ok"
+    assert fn.calls == 4
+    assert clock.sleeps == [1.0, 2.0, 3.0]  # 0.5 * 2**attempt, capped at max_delay
+
+
+def test_every_attempt_releases_its_slot(clock, monkeypatch):
+    limiter = dispatcher.ProviderLimiter("fake", max_concurrency=3, requests_per_minute=60)
+    monkeypatch.setitem(dispatcher.LIMITERS, "fake", limiter)
+    monkeypatch.setattr(dispatcher.random, "uniform", lambda low, high: high)  # 1s, 2s: the bucket refills
+    fn = Flaky(HttpError(503), HttpError(503))
+    assert dispatcher.call_with_retry("fake", fn) == "ok"
+    assert fn.calls == 3 and clock.sleeps == [1.0, 2.0]
+    assert all(limiter._slots.acquire(blocking=False) for _ in range(3))
+
+
+def test_backoff_is_full_jitter(unlimited, clock, monkeypatch):
+    bounds = []
+    monkeypatch.setattr(dispatcher.random, "uniform", lambda low, high: bounds.append((low, high)) or 0.0)
+    dispatcher.call_with_retry(unlimited, Flaky(HttpError(502)), base_delay=0.5)
+    assert bounds == [(0, 1.0)]
+
+
+def test_retry_after_header_wins(unlimited, clock):
+    dispatcher.call_with_retry(unlimited, Flaky(HttpError(429, retry_after=7)))
+    assert clock.sleeps == [7.0]
+
+
+@pytest.mark.parametrize("status", [400, 401, 404, None])
+def test_client_errors_are_not_retried(unlimited, clock, status):
+    error = HttpError(status) if status else ValueError("bad answer")
+    fn = Flaky(error)
+    with pytest.raises(type(error)):
+        dispatcher.call_with_retry(unlimited, fn)
+    assert fn.calls == 1 and clock.sleeps == []
+
+
+def test_gives_up_after_max_attempts(unlimited, clock):
+    fn = Flaky(*[HttpError(503)] * 5)
+    with pytest.raises(HttpError):
+        dispatcher.call_with_retry(unlimited, fn, max_attempts=3)
+    assert fn.calls == 3 and len(clock.sleeps) == 2
+
+
+def test_no_retry_past_the_llm_cutoff(unlimited, clock):
+    fn = Flaky(HttpError(429, retry_after=5))
+    with deadlines.scope(1000), pytest.raises(deadlines.DeadlineExceeded):
+        dispatcher.call_with_retry(unlimited, fn)
+    assert fn.calls == 1 and clock.sleeps == []
+
+
+def test_rate_limit_wait_past_the_llm_cutoff(monkeypatch):
+    limiter = dispatcher.ProviderLimiter("fake", max_concurrency=1, requests_per_minute=1)
+    monkeypatch.setitem(dispatcher.LIMITERS, "fake", limiter)
+    assert dispatcher.call_with_retry("fake", Flaky()) == "ok"
+    fn = Flaky()
+    with deadlines.scope(1000), pytest.raises(deadlines.DeadlineExceeded):
+        dispatcher.call_with_retry("fake", fn)  # next token in 60s
+    assert fn.calls == 0
+    assert limiter._slots.acquire(blocking=False)  # the slot was handed back
+
+
+def test_status_of_reads_the_common_exception_shapes():
+    assert dispatcher.status_of(HttpError(429)) == 429
+    error = Exception()
+    error.code = 503
+    assert dispatcher.status_of(error) == 503
+    error = Exception()
+    error.response = type("Response", (), {"status_code": 502})()
+    assert dispatcher.status_of(error) == 502
+    assert dispatcher.status_of(ValueError()) is None
+
+
+def test_executor_is_shared_and_named():
+    names = dispatcher.get_executor().submit(lambda: threading.current_thread().name).result()
+    assert dispatcher.get_executor() is dispatcher.get_executor()
+    assert names.startswith("llm")
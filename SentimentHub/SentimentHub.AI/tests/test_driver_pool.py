@@ -0,0 +1,64 @@
+import threading
+
+import driver_pool
+
+
+class FakeDriver:
+    window_handles = ["main"]
+
+    def quit(self):
+        pass
+
+
+class FakePool(driver_pool.DriverPool):
+    """DriverPool whose launches create FakeDriver sessions; `gate` can hold a launch mid-way."""
+
+    def __init__(self, size, gate=None):
+        super().__init__(size=size, acquire_timeout=1)
+        self.gate = gate
+        self.launched = 0
+
+    def _launch(self):
+        with self._lock:
+            self.launched += 1
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        return driver_pool.PooledDriver(FakeDriver())
+
+
+def test_warm_fills_the_pool():
+    pool = FakePool(size=2)
+    pool.warm()
+    assert pool.launched == 2
+    assert pool.metrics()["idle"] == 2
+
+
+def test_warm_counts_borrowed_sessions():
+    pool = FakePool(size=2)
+    pool.acquire()
+    pool.warm()
+    assert pool.launched == 2
+    assert pool.metrics()["idle"] == 1
+
+
+def test_warm_does_not_launch_past_size_while_a_scrape_is_launching():
+    gate = threading.Event()
+    pool = FakePool(size=2, gate=gate)
+    borrower = threading.Thread(target=pool.acquire)
+    borrower.start()
+    while pool.launched == 0:
+        pass  # the borrower holds a slot and is starting Chrome
+    warmer = threading.Thread(target=pool.warm)
+    warmer.start()
+    gate.set()
+    borrower.join()
+    warmer.join()
+    assert pool.launched == 2
+
+
+def test_warm_stops_when_every_slot_is_busy():
+    pool = FakePool(size=1)
+    pool.acquire()
+    pool.warm()
+    assert pool.launched == 1
+    assert pool.metrics()["idle"] == 0
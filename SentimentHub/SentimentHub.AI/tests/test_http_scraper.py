@@ -0,0 +1,60 @@
+from fixture_server import FixtureServer, generate_reviews
+from http_scraper import HttpBackend, parse_review_json
+
+
+def scrape(server, max_reviews, **kwargs):
+    backend = HttpBackend(api_template=server.api_template)
+    chunks = list(backend.stream(server.product_url, max_reviews, **kwargs))
+    return [r for reviews, _ in chunks for r in reviews], chunks
+
+
+def test_parse_review_json_maps_api_fields():
+    payload = {"result": {"productReviews": {"totalPages": 3, "content": [
+        {"comment": "  Ürün güzel  ", "rate": 4, "userFullName": "A** B**", "commentDateISOtype": "2026-01-02"},
+        {"comment": "ok"},  # too short to be a review
+    ]}}}
+    reviews, total_pages = parse_review_json(payload)
+    assert total_pages == 3
+    assert reviews == [{"author": "A** B**", "text": "Ürün güzel", "rating": 4, "date": "2026-01-02"}]
+
+
+def test_streams_html_cards_then_api_pages_without_duplicates():
+    server = FixtureServer(review_count=95, html_reviews=10).start()
+    try:
+        reviews, chunks = scrape(server, 200)
+    finally:
+        server.stop()
+    texts = [r["text"] for r in reviews]
+    assert len(texts) == len(set(texts)) == 95  # the 10 server-rendered cards repeat on API page 0
+    assert chunks[0][1] == "Fixture Ürün"
+    assert texts == [r["comment"] for r in server.reviews]
+
+
+def test_stops_at_max_reviews_without_fetching_every_page():
+    server = FixtureServer(review_count=300).start()
+    try:
+        reviews, _ = scrape(server, 45)
+        requests = server.requests
+    finally:
+        server.stop()
+    assert len(reviews) == 45
+    assert requests <= 1 + 2  # review page + the two API pages that hold 45 reviews
+
+
+def test_should_stop_ends_the_scrape_early():
+    server = FixtureServer(review_count=300).start()
+    try:
+        reviews, _ = scrape(server, 300, should_stop=lambda: True)
+    finally:
+        server.stop()
+    assert len(reviews) == 30  # HTML cards and API page 0 only
+
+
+def test_missing_api_leaves_the_html_cards():
+    server = FixtureServer(review_count=50, html_reviews=10).start()
+    try:
+        backend = HttpBackend(api_template=server.api_template.replace("/api/review/", "/missing/"))
+        reviews = [r for chunk, _ in backend.stream(server.product_url, 100) for r in chunk]
+    finally:
+        server.stop()
+    assert [r["text"] for r in reviews] == [r["comment"] for r in generate_reviews(10)]
@@ -0,0 +1,93 @@
+import threading
+
+import main
+import sentiment
+
+
+WORDS = ["mavi", "geniş", "sağlam", "yumuşak", "parlak", "hafif", "sıcak", "şık", "uzun", "dar", "kalın", "pratik",
+         "sessiz", "kokusuz", "dayanıklı", "zarif"]
+
+
+def new_reviews(count, tag):
+    """Distinct reviews (no near-duplicates among them) newer than anything stored."""
+    return [{"comment": f"{tag} {WORDS[i]} {WORDS[(i * 7 + 3) % len(WORDS)]} ürün, {i * 37 + 11} gün kullandım",
+             "rate": 4, "userFullName": "Y** K**", "commentDateISOtype": "2026-10-01"} for i in range(count)]
+
+
+def test_incremental_response_honours_limit(site, snapshot_store, local_model):
+    first = main.run_analysis(site.product_url, 100, backend="http")
+    assert first.total_reviews == 60
+
+    site.reviews[:0] = new_reviews(5, "a")  # newest reviews come first
+    refreshed = main.run_analysis(site.product_url, 20, backend="http", incremental=True)
+    assert refreshed.new_reviews == 5
+    assert refreshed.total_reviews == len(refreshed.reviews) == 20
+    newest = {r["comment"] for r in new_reviews(5, "a")}
+    assert {r.text for r in refreshed.reviews[:5]} == newest
+
+
+def test_incremental_llm_batches_run_on_the_dispatcher_pool(site, snapshot_store, local_model, monkeypatch):
+    main.run_analysis(site.product_url, 100, backend="http")
+    site.reviews[:0] = new_reviews(12, "b")
+
+    threads = []
+    monkeypatch.setattr(sentiment, "plan_api_batches",
+                        lambda texts: [list(range(i, min(i + 3, len(texts)))) for i in range(0, len(texts), 3)])
+
+    def analyze(batch, stats=None):
+        threads.append(threading.current_thread().name)
+        return None
+
+    monkeypatch.setattr(sentiment, "analyze_sentiment_with_api", analyze)
+    refreshed = main.run_analysis(site.product_url, 100, backend="http", incremental=True)
+    assert refreshed.new_reviews == 12
+    assert len(threads) >= 4
+    assert all(name.startswith("llm") for name in threads)
+
+
+def duplicated(comment, copies):
+    """`comment` plus near-duplicate copies (punctuation changes)."""
+    variants = [comment, comment + "!!", comment.replace(",", ""), comment + " 👍"]
+    return [{"comment": text, "rate": 5, "userFullName": "D** E**", "commentDateISOtype": "2026-10-02"}
+            for text in variants[:copies]]
+
+
+def test_cluster_ids_from_different_refreshes_do_not_overlap(site, snapshot_store, local_model):
+    site.reviews[:0] = duplicated("Eski sipariş: kumaş yumuşak, dikişler sağlam, rengi solmadı", 3)
+    main.run_analysis(site.product_url, 200, backend="http")
+
+    site.reviews[:0] = duplicated("Yeni sipariş: kargo iki günde geldi, kutu ezik ama ürün sağlam", 3)
+    refreshed = main.run_analysis(site.product_url, 200, backend="http", incremental=True)
+    assert refreshed.new_reviews == 3
+
+    new_ids = {r.cluster_id for r in refreshed.reviews[:3]}
+    old_ids = {r.cluster_id for r in refreshed.reviews[3:] if r.cluster_id is not None}
+    assert len(new_ids) == 1 and None not in new_ids  # the three copies share one cluster
+    assert old_ids and not new_ids & old_ids
+
+
+def test_refresh_upgrades_reviews_a_deadline_left_on_the_local_model(site, snapshot_store, local_model, llm):
+    llm(latency_ms=10_000)
+    degraded = main.run_analysis(site.product_url, 60, backend="http", deadline_ms=3000)
+    assert "llm" not in degraded.deadline.reviews
+
+    server = llm(latency_ms=10)
+    site.reviews[:0] = new_reviews(2, "c")
+    refreshed = main.run_analysis(site.product_url, 60, backend="http", incremental=True)
+    assert refreshed.new_reviews == 2
+    assert {r.tier for r in refreshed.reviews} == {"llm"}
+    assert server.requests >= 1
+    stored = snapshot_store.reviews(site.product_url)
+    assert {r["tier"] for r in stored[:60]} == {"llm"}
+    # Reviews the refresh no longer returns are left for a refresh that does
+    assert {r["tier"] for r in stored[60:]} == {"local"}
+
+
+def test_local_results_are_kept_while_no_llm_is_configured(site, snapshot_store, local_model):
+    main.run_analysis(site.product_url, 60, backend="http")
+    local_model.clear()
+    site.reviews[:0] = new_reviews(2, "d")
+    refreshed = main.run_analysis(site.product_url, 60, backend="http", incremental=True)
+    assert refreshed.new_reviews == 2
+    assert sum(len(call) for call in local_model) == 2  # only the new reviews
+    assert {r.tier for r in refreshed.reviews} == {"local"}
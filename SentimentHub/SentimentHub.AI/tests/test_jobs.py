@@ -0,0 +1,35 @@
+import threading
+
+from jobs import COMPLETED, JobManager
+
+key = JobManager._dedupe_key
+
+
+def test_scheme_and_host_case_and_trailing_slash_are_ignored():
+    assert key("HTTPS://WWW.Trendyol.com/marka/urun-p-1/", 50) == key("https://www.trendyol.com/marka/urun-p-1", 50)
+
+
+def test_path_and_query_case_are_kept():
+    assert key("https://www.trendyol.com/Marka/urun-p-1", 50) != key("https://www.trendyol.com/marka/urun-p-1", 50)
+    assert key("https://x.com/urun-p-1?merchantId=AB", 50) != key("https://x.com/urun-p-1?merchantId=ab", 50)
+
+
+def test_fragment_is_ignored():
+    assert key("https://x.com/urun-p-1#yorumlar", 50) == key("https://x.com/urun-p-1", 50)
+
+
+def test_limit_and_options_are_part_of_the_key():
+    assert key("https://x.com/urun-p-1", 50) != key("https://x.com/urun-p-1", 60)
+    assert key("https://x.com/urun-p-1", 50, {"backend": "http"}) != key("https://x.com/urun-p-1", 50)
+
+
+def test_identical_inflight_requests_share_a_job():
+    release = threading.Event()
+    manager = JobManager(lambda url, limit, job=None: release.wait(5), max_workers=1)
+    first, deduplicated = manager.submit("https://X.com/urun-p-1", 10)
+    second, again = manager.submit("https://x.com/urun-p-1/", 10)
+    assert not deduplicated and again and second is first
+    release.set()
+    first.future.result(timeout=5)
+    assert first.status == COMPLETED
+    manager.shutdown()
@@ -0,0 +1,121 @@
+import threading
+import time
+from fastapi.testclient import TestClient
+import main
+import sentiment
+from lazy import LazyResource
+
+
+class SlowFactory:
+    """Counts loads; each one waits until `release` is set."""
+
+    def __init__(self, value="client", error=None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error:
+            raise self.error
+        return self.value
+
+
+def test_concurrent_gets_load_once():
+    factory = SlowFactory()
+    resource = LazyResource("slow", factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(resource.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    assert factory.started.wait(5)
+    factory.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["client"] * 8
+    assert factory.calls == 1
+    assert resource.loaded and resource.status()["load_seconds"] is not None
+
+
+def test_failed_load_is_remembered_until_reset():
+    factory = SlowFactory(error=ImportError("no module named sdk"))
+    factory.release.set()
+    resource = LazyResource("broken", factory)
+    assert resource.get() is None
+    assert resource.get() is None
+    assert factory.calls == 1
+    assert resource.status() == {**resource.status(), "loaded": False, "attempted": True,
+                                 "error": "no module named sdk"}
+
+    factory.error = None
+    resource.reset()
+    assert resource.get() == "client"
+    assert factory.calls == 2 and resource.error is None
+
+
+def test_get_nowait_starts_one_background_load():
+    factory = SlowFactory()
+    resource = LazyResource("slow", factory)
+    assert resource.get_nowait() is None  # returns at once, the load runs in the background
+    assert factory.started.wait(5)
+    assert resource.get_nowait() is None  # still loading: no second load
+    factory.release.set()
+    deadline = time.monotonic() + 5
+    while not resource.loaded and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert resource.get_nowait() == "client"
+    assert factory.calls == 1
+
+
+client = TestClient(main.app)
+
+
+def fake_backends(monkeypatch):
+    failing = SlowFactory(error=RuntimeError("no API key"))
+    failing.release.set()
+    working = SlowFactory()
+    working.release.set()
+    backends = {"working": LazyResource("working", working), "failing": LazyResource("failing", failing)}
+    monkeypatch.setattr(sentiment, "BACKENDS", backends)
+    return backends
+
+
+def test_warmup_loads_the_named_backends(monkeypatch):
+    backends = fake_backends(monkeypatch)
+    response = client.post("/warmup", params={"backends": "working"})
+    assert response.status_code == 200
+    status = response.json()["backends"]
+    assert status["working"]["loaded"] is True
+    assert status["failing"]["attempted"] is False  # not asked for
+    assert not backends["failing"].status()["attempted"]
+
+    status = client.post("/warmup").json()["backends"]  # all of them
+    assert status["failing"] == {**status["failing"], "loaded": False, "attempted": True, "error": "no API key"}
+
+
+def test_warmup_rejects_unknown_backends(monkeypatch):
+    fake_backends(monkeypatch)
+    response = client.post("/warmup", params={"backends": "working,gpt-9"})
+    assert response.status_code == 400
+    assert "gpt-9" in response.json()["detail"]
+
+
+def test_health_reports_readiness_and_loaded_backends(monkeypatch):
+    fake_backends(monkeypatch)
+    preload_done = threading.Event()
+    monkeypatch.setattr(main, "preload_done", preload_done)
+    body = client.get("/health").json()
+    assert body["status"] == "ok" and body["ready"] is False
+    assert body["loaded"] == []
+    assert set(body["backends"]) == {"working", "failing"}
+    assert "size" in body["chrome_pool"]
+
+    client.post("/warmup")
+    preload_done.set()
+    body = client.get("/health").json()
+    assert body["ready"] is True
+    assert body["loaded"] == ["working"]
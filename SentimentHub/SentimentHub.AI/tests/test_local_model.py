@@ -0,0 +1,45 @@
+import pytest
+
+import main
+import sentiment
+from local_model import LocalSentimentEngine, window_step
+
+
+def engine(max_length, stride, specials=2):
+    """Engine with just the windowing state; no tokenizer or weights are loaded."""
+    engine = LocalSentimentEngine.__new__(LocalSentimentEngine)
+    engine.max_length, engine.stride = max_length, stride
+    engine._body, engine._step = window_step(max_length, specials, stride)
+    return engine
+
+
+@pytest.mark.parametrize("max_length, stride", [(66, 64), (64, 64), (10, 64)])
+def test_window_config_that_cannot_advance_is_rejected(max_length, stride):
+    with pytest.raises(ValueError, match="stride"):
+        window_step(max_length, 2, stride)
+
+
+def test_windows_cover_every_token_with_overlap():
+    ids = list(range(1000))
+    windows = engine(max_length=130, stride=64)._windows(ids)
+    assert all(len(w) <= 128 for w in windows)
+    assert sorted(set(t for w in windows for t in w)) == ids
+    assert windows[1][0] == windows[0][-64]
+
+
+def test_smallest_valid_window_still_advances():
+    windows = engine(max_length=67, stride=64)._windows(list(range(200)))
+    assert windows[1][0] == 1
+
+
+def test_missing_model_gives_placeholder_tier(monkeypatch):
+    monkeypatch.setattr(sentiment.BACKENDS["local"], "get", lambda: None)
+    result = sentiment.analyze_sentiment_batch(["Ürün güzel"])[0]
+    review = main._to_review_result({"author": "A", "text": "Ürün güzel", "rating": 5, "date": ""}, None, result)
+    assert (review.sentiment, review.confidence, review.tier) == ("Neutral", 0.5, "placeholder")
+
+
+def test_model_results_keep_local_tier():
+    review = main._to_review_result({"author": "A", "text": "Ürün güzel", "rating": 5, "date": ""}, None,
+                                    {"sentiment": "Positive", "score": 0.97, "aspects": []})
+    assert review.tier == "local"
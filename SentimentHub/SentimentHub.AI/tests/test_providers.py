@@ -0,0 +1,185 @@
+import time
+
+import pytest
+
+import deadlines
+from fake_llm_server import FakeLLMServer
+from providers import (CircuitBreaker, GeminiProvider, LLMProvider, OpenAIProvider, ProviderRegistry,
+                       ProviderUnavailable)
+
+
+class StubProvider(LLMProvider):
+    name = "stub"
+
+    def __init__(self, complete, **breaker):
+        super().__init__("key", "stub-model")
+        self.breaker = CircuitBreaker(**breaker)
+        self._complete = complete
+
+    def _build_client(self):
+        return object()
+
+    def complete(self, prompt):
+        return self._complete(prompt)
+
+
+def failing(prompt):
+    raise RuntimeError("boom")
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_half_open_trial_success_closes_failure_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_release_gives_the_trial_back():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == "half_open"
+    breaker.release()
+    assert breaker.state == "open" and breaker.failures == 1
+    assert breaker.allow()
+
+
+def test_deadline_cut_trial_does_not_wedge_the_breaker():
+    def slow_then_timeout(prompt):
+        time.sleep(0.2)
+        raise TimeoutError("read timed out")
+
+    provider = StubProvider(slow_then_timeout, failure_threshold=1, reset_timeout=0)
+    provider.breaker.record_failure()
+    with deadlines.scope(50):
+        with pytest.raises(deadlines.DeadlineExceeded):
+            provider.call("prompt")
+    assert provider.breaker.state == "open"
+    assert provider.breaker.failures == 1  # the cut is not the provider's failure
+    assert provider.breaker.allow()  # the next caller gets a trial
+
+
+def test_expired_deadline_does_not_take_the_trial():
+    provider = StubProvider(failing, failure_threshold=1, reset_timeout=0)
+    provider.breaker.record_failure()
+    with deadlines.scope(1):
+        time.sleep(0.01)
+        with pytest.raises(deadlines.DeadlineExceeded):
+            provider.call("prompt")
+    assert provider.breaker.state == "open"
+    assert provider.breaker.allow()
+
+
+def test_real_failures_still_open_the_circuit():
+    provider = StubProvider(failing, failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            provider.call("prompt")
+    with pytest.raises(ProviderUnavailable):
+        provider.call("prompt")
+
+
+# Registry against the fake LLM server (benchmarks/fake_llm_server.py)
+
+REVIEWS = ["Ürün çok güzel, kargo hızlı", "Kutu yırtık geldi, kalitesiz", "Fiyatına göre idare eder"]
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(**kwargs):
+        server = FakeLLMServer(latency_ms=0, **kwargs).start()
+        started.append(server)
+        return server
+
+    yield start
+    for server in started:
+        server.stop()
+
+
+def openai_at(server, **breaker):
+    provider = OpenAIProvider("fake", "gpt-test", base_url=server.openai_base_url)
+    if breaker:
+        provider.breaker = CircuitBreaker(**breaker)
+    return provider
+
+
+@pytest.mark.parametrize("kind", ["openai", "gemini"])
+def test_registry_classifies_with_each_provider(servers, kind):
+    server = servers()
+    provider = (openai_at(server) if kind == "openai"
+                else GeminiProvider("fake", "gemini-test", base_url=server.gemini_endpoint))
+    results, used, usage = ProviderRegistry([provider]).classify_batch(REVIEWS)
+    assert used is provider
+    assert [r["sentiment"] for r in results] == ["Positive", "Negative", "Neutral"]
+    assert provider.stats()["calls"] == 1
+
+
+def test_client_is_built_once_and_reused(servers):
+    provider = openai_at(servers())
+    registry = ProviderRegistry([provider])
+    registry.classify_batch(REVIEWS)
+    client = provider.client.get()
+    registry.classify_batch(REVIEWS)
+    assert provider.client.get() is client
+    assert provider.stats()["calls"] == 2
+
+
+def test_failing_provider_falls_through_to_the_next(servers):
+    broken, healthy = servers(failure_rate=1.0, failure_status=400), servers()
+    first, second = openai_at(broken), openai_at(healthy)
+    first.name = "openai-broken"  # separate limiter/metrics label
+    results, used, _ = ProviderRegistry([first, second]).classify_batch(REVIEWS)
+    assert used is second and len(results) == 3
+    assert first.stats()["errors"] == 1
+
+
+def test_open_circuit_skips_the_provider(servers):
+    broken, healthy = servers(failure_rate=1.0, failure_status=400), servers()
+    first = openai_at(broken, failure_threshold=2, reset_timeout=60)
+    first.name = "openai-broken"
+    registry = ProviderRegistry([first, openai_at(healthy)])
+    for _ in range(4):
+        registry.classify_batch(REVIEWS)
+    assert broken.requests == 2  # the circuit opened after two failures
+    assert first.stats()["short_circuited"] == 2
+    assert healthy.requests == 4
+
+
+def test_truncated_answer_is_reported_as_malformed(servers):
+    provider = openai_at(servers(max_answer_reviews=1))
+    results, used, _ = ProviderRegistry([provider]).classify_batch(REVIEWS)
+    assert results == [] and used is provider  # the caller splits the batch
+
+
+def test_fake_server_answers_unknown_paths_with_404(servers, capfd):
+    import json
+    import urllib.error
+    import urllib.request
+
+    server = servers()
+    request = urllib.request.Request(server.base_url + "/v1/embeddings", data=b'{"input": "x"}',
+                                     headers={"Content-Type": "application/json"})
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request, timeout=5)
+    assert error.value.code == 404
+    assert "unknown path" in json.loads(error.value.read())["error"]["message"]
+    results, _, _ = ProviderRegistry([openai_at(server)]).classify_batch(REVIEWS)
+    assert len(results) == len(REVIEWS)
+    assert "Traceback" not in capfd.readouterr().err  # the 404 handler finished cleanly
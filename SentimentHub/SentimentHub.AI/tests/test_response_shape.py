@@ -0,0 +1,62 @@
+import pytest
+
+import main
+
+
+def response():
+    reviews = [main.ReviewResult(author="A", text=f"yorum {i}", rating=5 - i, date="2026-01-05",
+                                 sentiment=("Positive", "Negative")[i % 2], confidence=0.9,
+                                 aspects=[main.AspectResult(aspect="Kargo", sentiment="Positive", confidence=0.8)][:i % 2])
+               for i in range(4)]
+    return main.AnalyzeResponse(reviews=reviews, total_reviews=4, overall_sentiment_score=0.5)
+
+
+def test_full_mode_is_the_original_body():
+    assert main._shape_result(response()) == response().model_dump()
+
+
+def test_full_mode_with_fields_projects_reviews_without_aggregates():
+    payload = main._shape_result(response(), "full", ["text", "sentiment"])
+    assert "aggregates" not in payload
+    assert payload["reviews"][0] == {"text": "yorum 0", "sentiment": "Positive"}
+
+
+def test_compact_mode_adds_aggregates_and_default_fields():
+    payload = main._shape_result(response(), "compact")
+    assert payload["aggregates"]["sentiment_distribution"] == {"Positive": 2, "Negative": 2, "Neutral": 0}
+    assert set(payload["reviews"][0]) == set(main.COMPACT_FIELDS)
+
+
+def test_aggregate_mode_drops_reviews():
+    payload = main._shape_result(response(), "aggregate")
+    assert "reviews" not in payload
+    assert payload["total_reviews"] == 4
+
+
+@pytest.mark.parametrize("mode, fields", [("tiny", None), ("compact", ["nope"])])
+def test_unknown_mode_or_field_is_rejected(mode, fields):
+    with pytest.raises(main.HTTPException) as info:
+        main._validate_shape(mode, fields)
+    assert info.value.status_code == 400
+
+
+@pytest.mark.parametrize("mode, fields", [("compact", None), ("aggregate", None), ("full", ["text"]),
+                                          ("compact", ["sentiment", "tier"])])
+def test_shaped_bodies_match_the_documented_model(mode, fields):
+    payload = main._shape_result(response(), mode, fields)
+    # Round-trips unchanged: no field the model lacks, none it types differently
+    assert main.ShapedAnalyzeResponse.model_validate(payload).model_dump(exclude_unset=True) == payload
+
+
+def test_full_body_matches_the_response_model():
+    payload = main._shape_result(response())
+    assert main.AnalyzeResponse.model_validate(payload).model_dump() == payload
+
+
+def test_openapi_documents_every_analyze_body():
+    from fastapi.testclient import TestClient
+
+    schema = TestClient(main.app).get("/openapi.json").json()
+    body = schema["paths"]["/analyze"]["post"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert {ref["$ref"].rsplit("/", 1)[1] for ref in body["anyOf"]} == {"AnalyzeResponse", "ShapedAnalyzeResponse"}
+    assert "aggregates" in schema["components"]["schemas"]["ShapedAnalyzeResponse"]["properties"]
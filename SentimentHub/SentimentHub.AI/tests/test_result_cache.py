@@ -0,0 +1,43 @@
+import time
+
+import result_cache
+
+RESULT = {"sentiment": "Positive", "score": 0.9}
+
+
+def make_cache(tmp_path, **kwargs):
+    return result_cache.ResultCache(path=str(tmp_path / "cache.db"), **kwargs)
+
+
+def entries(cache):
+    return cache._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def test_round_trip_ignores_whitespace_and_case(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("Ürün  güzel", RESULT, "fake", "m", "v1")
+    assert cache.get("ürün güzel", "fake", "m", "v1") == RESULT
+    assert cache.get("ürün güzel", "fake", "m", "v2") is None
+
+
+def test_eviction_waits_for_evict_every_rows(tmp_path):
+    cache = make_cache(tmp_path, max_entries=5, evict_every=10)
+    cache.put_many({f"r{i}": RESULT for i in range(8)}, "fake", "m", "v1")
+    assert entries(cache) == 8  # over max_entries until the next eviction
+    cache.put_many({f"s{i}": RESULT for i in range(2)}, "fake", "m", "v1")
+    assert entries(cache) == 5
+    assert cache.evictions == 5
+
+
+def test_expired_entries_are_evicted_on_open(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("eski", RESULT, "fake", "m", "v1")
+    cache._conn.execute("UPDATE results SET created_at = ?", (time.time() - 40 * 86400,))
+    reopened = make_cache(tmp_path)
+    assert entries(reopened) == 0
+
+
+def test_created_at_is_indexed(tmp_path):
+    cache = make_cache(tmp_path)
+    plan = cache._conn.execute("EXPLAIN QUERY PLAN DELETE FROM results WHERE created_at < ?", (0,)).fetchall()
+    assert any("ix_results_created_at" in row[-1] for row in plan)
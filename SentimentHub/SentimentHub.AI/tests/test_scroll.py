@@ -0,0 +1,130 @@
+import time
+import deadlines
+import scroll
+
+
+def test_explicit_zeros_are_kept(monkeypatch):
+    monkeypatch.setenv("SCROLL_SETTLE_SECONDS", "0.3")
+    settings = scroll.ScrollSettings(settle_seconds=0, max_idle_passes=0, pass_timeout=0.0)
+    assert (settings.settle_seconds, settings.max_idle_passes, settings.pass_timeout) == (0, 0, 0.0)
+
+
+def test_unset_values_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("SCROLL_TIME_BUDGET", "12")
+    monkeypatch.setenv("SCROLL_MAX_IDLE_PASSES", "5")
+    settings = scroll.ScrollSettings()
+    assert (settings.time_budget, settings.max_idle_passes) == (12.0, 5)
+
+
+class FakeDriver:
+    """
+    Infinite-scroll page: starts with `cards` cards; each scroll adds `per_scroll`
+    more (up to `total`) after `lag` seconds.
+    """
+
+    def __init__(self, cards=20, per_scroll=10, total=None, lag=0.02):
+        self.cards = cards
+        self.per_scroll = per_scroll
+        self.total = total
+        self.lag = lag
+        self.pending = []  # (ready_at, cards)
+        self.scrolls = 0
+
+    def _arrived(self):
+        now = time.monotonic()
+        self.cards += sum(n for ready_at, n in self.pending if ready_at <= now)
+        self.pending = [(ready_at, n) for ready_at, n in self.pending if ready_at > now]
+        return self.cards
+
+    def execute_script(self, script):
+        if script == scroll.SCROLL_TO_BOTTOM_JS:
+            self.scrolls += 1
+            queued = self.cards + sum(n for _, n in self.pending)
+            more = self.per_scroll if self.total is None else max(0, min(self.per_scroll, self.total - queued))
+            if more:
+                self.pending.append((time.monotonic() + self.lag, more))
+            return 1000
+        if script == scroll.COUNT_CARDS_JS:
+            return self._arrived()
+        if script == scroll.PAGE_STATE_JS:
+            cards = self._arrived()
+            return [cards, cards // 10, "complete"]
+        raise AssertionError("unexpected script")
+
+
+def fast(**overrides):
+    values = dict(time_budget=5, initial_timeout=0.2, pass_timeout=0.1, settle_seconds=0.02,
+                  max_idle_passes=2, backoff=2, max_pass_timeout=0.3, poll=0.005)
+    values.update(overrides)
+    return scroll.ScrollSettings(**values)
+
+
+def drive(scroller, driver):
+    """The scraper's loop: scroll, count what is new, report it."""
+    seen = driver.cards
+    while scroller.should_continue():
+        record = scroller.scroll_pass()
+        cards = driver.execute_script(scroll.COUNT_CARDS_JS)
+        scroller.record_result(record, cards - seen, 0.0)
+        seen = cards
+    return scroller.summary()
+
+
+def test_stops_after_idle_passes_once_the_list_ends():
+    driver = FakeDriver(cards=20, per_scroll=10, total=40)
+    scroller = scroll.AdaptiveScroller(driver, fast())
+    assert scroller.wait_for_first_cards()
+    summary = drive(scroller, driver)
+    assert driver.cards == 40
+    grew = [t["grew"] for t in summary["timings"][1:]]
+    assert grew == [True, True, False, False]  # two idle passes, then stop
+    assert summary["passes"] == 4 and summary["idle_passes"] == 2
+    assert summary["elapsed_s"] < 2
+
+
+def test_idle_passes_back_off_and_new_cards_reset_the_timeout():
+    scroller = scroll.AdaptiveScroller(FakeDriver(), fast(max_idle_passes=10))
+    timeouts = []
+    for new in (0, 0, 0, 5, 0):
+        record = {}
+        timeouts.append(scroller.pass_timeout)
+        scroller.record_result(record, new, 0.0)
+        assert record["new_reviews"] == new
+    assert timeouts == [0.1, 0.2, 0.3, 0.3, 0.1]  # doubled, capped at max_pass_timeout, reset
+    assert scroller.idle_passes == 1
+
+
+def test_a_slow_load_inside_the_backed_off_timeout_counts():
+    # Cards take longer than the first pass timeout but less than the backed-off one
+    driver = FakeDriver(cards=10, per_scroll=10, lag=0.2)
+    scroller = scroll.AdaptiveScroller(driver, fast(max_idle_passes=3))
+    first = scroller.scroll_pass()
+    assert not first["grew"] and first["timeout_s"] == 0.1
+    scroller.record_result(first, 0, 0.0)
+    second = scroller.scroll_pass()
+    assert second["grew"] and second["timeout_s"] == 0.2
+
+
+def test_time_budget_ends_an_endless_list():
+    driver = FakeDriver(cards=10, per_scroll=10, lag=0.01)
+    scroller = scroll.AdaptiveScroller(driver, fast(time_budget=0.4))
+    started = time.monotonic()
+    summary = drive(scroller, driver)
+    assert time.monotonic() - started < 0.4 + 0.3  # at most one settle past the budget
+    # The budget stopped it (the pass it cut short may count as idle)
+    assert summary["idle_passes"] < 2 and summary["passes"] >= 2
+    assert not scroller.should_continue() and scroller.remaining() == 0
+
+
+def test_request_deadline_shortens_the_budget():
+    with deadlines.scope(1000):
+        scroller = scroll.AdaptiveScroller(FakeDriver(), fast(time_budget=90))
+    assert scroller.deadline - scroller.started <= 0.4  # the scrape cutoff of a 1s request
+
+
+def test_empty_page_gives_up_after_the_initial_timeout():
+    scroller = scroll.AdaptiveScroller(FakeDriver(cards=0, per_scroll=0), fast())
+    started = time.monotonic()
+    assert not scroller.wait_for_first_cards()
+    assert 0.2 <= time.monotonic() - started < 1
+    assert scroller.timings == [{"pass": 0, "wait_s": scroller.timings[0]["wait_s"], "cards": 0}]
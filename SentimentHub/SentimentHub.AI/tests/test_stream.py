@@ -0,0 +1,26 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+client = TestClient(main.app)
+
+
+@pytest.mark.parametrize("option", [{"deadline_ms": 5000}, {"incremental": True}, {"mode": "compact"},
+                                    {"fields": ["sentiment"]}])
+def test_stream_rejects_options_it_cannot_honour(option):
+    response = client.post("/analyze/stream", json={"url": "https://example.com/p-1", **option})
+    assert response.status_code == 400
+    assert next(iter(option)) in response.json()["detail"]
+
+
+def test_stream_sends_every_review(site, local_model):
+    response = client.post("/analyze/stream", json={"url": site.product_url, "limit": 60, "backend": "http"})
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines()]
+    analyzed = sum(len(e["reviews"]) for e in events if e["event"] == "results")
+    done = events[-1]
+    assert done["event"] == "done"
+    assert analyzed == done["total_reviews"] == 60
@@ -0,0 +1,172 @@
+import pytest
+import batching
+import result_cache
+import summary
+
+WORDS = ["kargo", "kumaş", "beden", "renk", "fiyat", "paket", "dikiş", "kalıp", "satıcı", "iade"]
+
+
+def new_reviews(count, tag):
+    """Distinct reviews of a few dozen tokens each."""
+    return [f"{tag} yorum {i}: {WORDS[i % 10]} {WORDS[i * 3 % 10]} konusunda {i * 13 % 97} gün sonra yazıyorum, "
+            f"ürün {WORDS[i * 7 % 10]} açısından beklediğim gibi çıktı." for i in range(count)]
+
+
+class FakeProvider:
+    model = "fake-model"
+
+    def __init__(self, input_token_budget):
+        self.input_token_budget = input_token_budget
+
+
+class FakeRegistry:
+    """summarize() answers every prompt with one item per list, derived from the prompt kind."""
+
+    def __init__(self, input_token_budget=100000):
+        self.provider = FakeProvider(input_token_budget)
+        self.prompts = []
+
+    def configured(self):
+        return [self.provider]
+
+    def summarize(self, prompt):
+        self.prompts.append(prompt)
+        kind = "reduce" if "Bolum notlari" in prompt else "map"
+        return {"strengths": [f"{kind} güçlü"], "weaknesses": [f"{kind} zayıf"], "advice": [f"{kind} tavsiye"]}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = result_cache.ResultCache(path=str(tmp_path / "cache.db"))
+    monkeypatch.setattr(result_cache, "get_cache", lambda: cache)
+    return cache
+
+
+def test_small_corpus_is_one_chunk():
+    texts = new_reviews(5, "az")
+    assert summary.plan_chunks(texts, 100000) == [texts]
+
+
+def test_chunks_fit_the_budget_and_keep_order(monkeypatch):
+    monkeypatch.setattr(summary, "SUMMARY_MAX_CHUNKS", 1000)
+    texts = new_reviews(300, "çok")
+    budget = batching.PROMPT_OVERHEAD_TOKENS + 500
+    chunks = summary.plan_chunks(texts, budget)
+    assert len(chunks) > 1
+    assert [t for chunk in chunks for t in chunk] == texts
+    for chunk in chunks:
+        assert len(chunk) == 1 or sum(batching.estimate_tokens(t) for t in chunk) <= 500
+
+
+def test_added_reviews_leave_most_chunks_unchanged(monkeypatch):
+    monkeypatch.setattr(summary, "SUMMARY_MAX_CHUNKS", 1000)
+    texts = new_reviews(400, "eski")
+    budget = batching.PROMPT_OVERHEAD_TOKENS + 2000
+    before = summary.plan_chunks(texts, budget)
+    after = summary.plan_chunks(new_reviews(3, "yeni") + texts, budget)
+    assert len(before) > 3
+    # Content-defined boundaries resynchronize after the inserted reviews
+    unchanged = [chunk for chunk in before if chunk in after]
+    assert len(unchanged) >= len(before) - 2
+
+
+def test_chunk_count_is_capped_across_the_corpus(monkeypatch):
+    monkeypatch.setattr(summary, "SUMMARY_MAX_CHUNKS", 4)
+    texts = new_reviews(300, "çok")
+    chunks = summary.plan_chunks(texts, batching.PROMPT_OVERHEAD_TOKENS + 200)
+    assert len(chunks) == 4
+    assert chunks[0][0] == texts[0]
+    assert texts.index(chunks[-1][0]) > len(texts) // 2  # evenly spaced, not the first four
+
+
+def test_merge_partials_ranks_by_chunk_count():
+    partials = [
+        {"strengths": ["Hızlı kargo", "Kaliteli kumaş"], "weaknesses": ["Dar kalıp"], "advice": []},
+        {"strengths": ["hızlı  kargo", "Şık"], "weaknesses": [], "advice": ["Beden tablosu ekleyin"]},
+        {"strengths": ["Kaliteli kumaş", "HIZLI KARGO"], "weaknesses": ["Dar kalıp"], "advice": []},
+    ]
+    merged = summary.merge_partials(partials, limits=(2, 5, 3))
+    # First spelling wins; normalization merges case and whitespace variants
+    assert merged["strengths"] == ["Hızlı kargo", "Kaliteli kumaş"]
+    assert merged["weaknesses"] == ["Dar kalıp"]
+    assert merged["advice"] == ["Beden tablosu ekleyin"]
+
+
+def test_unchanged_corpus_makes_no_llm_calls(cache, monkeypatch):
+    monkeypatch.setattr(summary, "SUMMARY_CHUNK_TOKENS", batching.PROMPT_OVERHEAD_TOKENS + 500)
+    texts = new_reviews(200, "özet")
+    registry = FakeRegistry()
+    stats = {}
+    first = summary.summarize_with_llm(texts, registry, stats)
+    assert first["strengths"] == ["reduce güçlü"]
+    calls = len(registry.prompts)
+    assert calls == stats["chunks"] + 1  # map calls and one reduce
+    assert stats["chunks"] > 1 and not stats["reduce_cached"]
+
+    stats = {}
+    assert summary.summarize_with_llm(texts, registry, stats) == first
+    assert len(registry.prompts) == calls
+    assert stats["chunks_cached"] == stats["chunks"] and stats["reduce_cached"]
+
+
+def test_reduce_reruns_when_a_partial_changes(cache, monkeypatch):
+    monkeypatch.setattr(summary, "SUMMARY_CHUNK_TOKENS", batching.PROMPT_OVERHEAD_TOKENS + 500)
+    texts = new_reviews(200, "özet")
+    registry = FakeRegistry()
+    summary.summarize_with_llm(texts, registry)
+    calls = len(registry.prompts)
+    summary.summarize_with_llm(texts + ["Yepyeni bir yorum, kargo çok geç geldi."], registry)
+    reduces = [p for p in registry.prompts[calls:] if "Bolum notlari" in p]
+    assert len(reduces) == 1
+    assert 0 < len(registry.prompts) - calls - 1 < calls - 1  # only the changed chunk is mapped again
+
+
+def test_failed_reduce_falls_back_to_merge(cache, monkeypatch):
+    monkeypatch.setattr(summary, "SUMMARY_CHUNK_TOKENS", batching.PROMPT_OVERHEAD_TOKENS + 500)
+    registry = FakeRegistry()
+    answer = registry.summarize
+    registry.summarize = lambda prompt: None if "Bolum notlari" in prompt else answer(prompt)
+    result = summary.summarize_with_llm(new_reviews(200, "özet"), registry)
+    assert result == {"strengths": ["map güçlü"], "weaknesses": ["map zayıf"], "advice": ["map tavsiye"]}
+    # The fallback is not cached: the next run asks for the reduce again
+    stats = {}
+    summary.summarize_with_llm(new_reviews(200, "özet"), registry, stats)
+    assert stats["chunks_cached"] == stats["chunks"] and not stats["reduce_cached"]
+
+
+CORPUS = (
+    ["Kargo çok hızlı geldi, teşekkürler."] * 6
+    + ["Kumaş kalitesiz, dikişleri bozuk çıktı."] * 4
+    + ["Paketleme özensiz, kutu yırtık geldi."] * 3
+    + ["Sipariş verdim."]
+)
+
+
+def test_corpus_stats_splits_by_polarity():
+    stats = summary.corpus_stats(CORPUS)
+    assert stats["docs"] == 14
+    assert stats["positive_docs"] == 6
+    assert stats["negative_docs"] == 7
+    assert stats["terms"]["positive"]["kargo"] == 6
+    assert stats["terms"]["positive"]["kargo hızlı"] == 6
+    assert stats["terms"]["negative"]["kalitesiz"] == 4
+    assert "çok" not in stats["terms"]["positive"]  # stopword
+    assert stats["aspects"]["Kargo"]["positive"] == 6
+    assert stats["aspects"]["Kalite"]["negative"] == 4 + 3  # "yırtık" in the packaging complaints
+    assert "Kargo" not in stats["aspects"] or stats["aspects"]["Kargo"]["neutral"] == 0
+
+
+def test_offline_summary_reports_frequent_aspects():
+    result = summary.offline_summary(CORPUS)
+    assert set(result) == {"strengths", "weaknesses", "advice"}
+    assert result["strengths"][0].startswith("Kargo konusunda olumlu")
+    assert any(item.startswith("Kalite konusunda şikayetler") for item in result["weaknesses"])
+    assert summary.ASPECT_ADVICE["Kalite"] in result["advice"]
+    assert all(len(items) <= 5 for items in result.values()) and len(result["advice"]) <= 3
+
+
+def test_offline_summary_without_signal():
+    result = summary.offline_summary(["Sipariş verdim.", "Bugün geldi."])
+    assert result["strengths"] == ["Genel müşteri memnuniyeti yüksek görünüyor"]
+    assert result["weaknesses"] == ["Belirgin bir sistemsel sorun tespit edilemedi"]
+    assert result["advice"] == ["Mevcut hizmet kalitesini koruyarak kampanyalarla satışı artırın."]
@@ -0,0 +1,124 @@
+import re
+import threading
+import pytest
+from fastapi.testclient import TestClient
+import main
+import telemetry
+
+
+def test_counter_renders_labels_sorted_and_escaped():
+    counter = telemetry.Counter("demo_total", "Demo counter", ("provider", "outcome"))
+    counter.inc(provider="openai", outcome="ok")
+    counter.inc(2, provider="openai", outcome="ok")
+    counter.inc(provider='ge"mini', outcome="error\n")
+    assert counter.render() == [
+        "# HELP demo_total Demo counter",
+        "# TYPE demo_total counter",
+        'demo_total{provider="ge\\"mini",outcome="error\\n"} 1',
+        'demo_total{provider="openai",outcome="ok"} 3',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = telemetry.Histogram("demo_seconds", "Demo", ("stage",), buckets=(0.1, 1, 10))
+    for value in (0.05, 0.1, 0.5, 5, 50):
+        histogram.observe(value, stage="scrape")
+    lines = histogram.render()
+    assert lines[2:] == [
+        'demo_seconds_bucket{stage="scrape",le="0.1"} 2',  # le is inclusive: 0.1 lands in 0.1
+        'demo_seconds_bucket{stage="scrape",le="1.0"} 3',
+        'demo_seconds_bucket{stage="scrape",le="10.0"} 4',
+        'demo_seconds_bucket{stage="scrape",le="+Inf"} 5',
+        'demo_seconds_sum{stage="scrape"} 55.65',
+        'demo_seconds_count{stage="scrape"} 5',
+    ]
+
+
+def test_render_metrics_lists_every_metric():
+    text = telemetry.render_metrics()
+    assert text.endswith("\n")
+    for metric in telemetry.METRICS:
+        kind = "histogram" if isinstance(metric, telemetry.Histogram) else "counter"
+        assert f"# TYPE {metric.name} {kind}\n" in text
+
+
+def test_nested_spans_are_recorded_inside_their_parent():
+    with telemetry.trace("job") as trace:
+        with telemetry.span("outer", reviews=3) as outer:
+            with telemetry.span("inner") as inner:
+                inner["cached"] = True
+            outer["ok"] = True
+    inner_span, outer_span = trace.spans  # a span is recorded when it ends
+    assert inner_span["stage"] == "inner" and inner_span["cached"] is True
+    assert outer_span["stage"] == "outer" and outer_span == {**outer_span, "reviews": 3, "ok": True}
+    assert outer_span["start_ms"] <= inner_span["start_ms"]
+    assert (inner_span["start_ms"] + inner_span["duration_ms"]
+            <= outer_span["start_ms"] + outer_span["duration_ms"] + 0.001)
+    assert trace.stage_totals()["inner"]["count"] == 1
+    assert telemetry.current() is None and telemetry.find_trace(trace.request_id) is trace
+
+
+def test_failed_span_records_the_error():
+    with pytest.raises(ValueError), telemetry.trace("job") as trace:
+        with telemetry.span("parse"):
+            raise ValueError("bad")
+    assert trace.spans[0]["error"] == "ValueError"
+    assert trace.status == "ValueError"
+    assert 'sentimenthub_stage_errors_total{stage="parse",error="ValueError"}' in telemetry.render_metrics()
+
+
+def test_bind_carries_the_trace_to_other_threads():
+    with telemetry.trace("job") as trace:
+        def work():
+            with telemetry.span("threaded"):
+                pass
+        worker = threading.Thread(target=telemetry.bind(work), name="worker")
+        worker.start()
+        worker.join()
+        unbound = threading.Thread(target=work)
+        unbound.start()
+        unbound.join()
+    assert [(s["stage"], s["thread"]) for s in trace.spans] == [("threaded", "worker")]
+
+
+def test_span_limit_drops_the_rest(monkeypatch):
+    monkeypatch.setattr(telemetry, "TRACE_MAX_SPANS", 2)
+    with telemetry.trace("job") as trace:
+        for _ in range(5):
+            with telemetry.span("step"):
+                pass
+    assert len(trace.spans) == 2 and trace.dropped_spans == 3
+
+
+client = TestClient(main.app)
+
+
+def test_request_id_round_trip_and_metrics(site, local_model):
+    response = client.post("/analyze", json={"url": site.product_url, "limit": 20, "backend": "http"},
+                           headers={"X-Request-ID": "test-req-1"})
+    assert response.status_code == 200
+    assert response.headers["x-request-id"] == "test-req-1"
+
+    trace = client.get("/traces/test-req-1").json()
+    assert trace["name"] == "POST /analyze" and trace["status"] == 200
+    assert {"scrape", "dedup", "local_fallback"} <= set(trace["stages"])
+
+    metrics = client.get("/metrics")
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "x-request-id" not in metrics.headers  # scrapes are counted, not traced
+    assert re.search(r'sentimenthub_requests_total\{method="POST",route="/analyze",status="200"\} [1-9]',
+                     metrics.text)
+    assert 'sentimenthub_stage_duration_seconds_bucket{stage="scrape",le="+Inf"}' in metrics.text
+
+
+def test_request_id_is_generated_and_truncated():
+    generated = client.get("/traces").headers["x-request-id"]
+    assert re.fullmatch(r"[0-9a-f]{16}", generated)
+    long_id = client.get("/traces", headers={"X-Request-ID": "x" * 100}).headers["x-request-id"]
+    assert long_id == "x" * 64
+
+
+def test_unknown_routes_share_one_label():
+    client.get("/no/such/path/123")
+    assert 'route="unmatched",status="404"' in telemetry.render_metrics()
+    assert "/no/such/path" not in telemetry.render_metrics()